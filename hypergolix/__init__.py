@@ -71,6 +71,7 @@ from .objproxy import PickleObj
 from .objproxy import PickleProxy
 from .objproxy import JsonObj
 from .objproxy import JsonProxy
+from .objproxy import ChunkedObj
 
 from .embed import HGXLink
 
@@ -97,4 +98,5 @@ __all__ = [
     'PickleProxy',
     'JsonObj',
     'JsonProxy',
+    'ChunkedObj',
 ]
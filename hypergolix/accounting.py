@@ -34,6 +34,7 @@ hypergolix: A python Golix client.
 import logging
 import os
 import asyncio
+import traceback
 
 # This is only used for padding **within** encrypted containers
 import random
@@ -61,9 +62,10 @@ from .utils import weak_property
 from .utils import SetMap
 
 from .gao import GAO
-from .gao import GAOSet
 from .gao import GAODict
-from .gao import GAOSetMap
+from .gao import ShardedGAOSet
+from .gao import ShardedGAODict
+from .gao import ShardedGAOSetMap
 
 # Local dependencies
 # from .persistence import _GarqLite
@@ -108,8 +110,13 @@ class Account(metaclass=API):
     _librarian = weak_property('__librarian')
     _salmonator = weak_property('__salmonator')
     
+    # How long (in seconds) to wait for more flush requests before actually
+    # pushing anything.
+    FLUSH_DEBOUNCE = .01
+    
     @public_api
-    def __init__(self, user_id, root_secret, *args, hgxcore, **kwargs):
+    def __init__(self, user_id, root_secret, *args, hgxcore,
+                 flush_debounce=None, **kwargs):
         ''' Gets everything ready for account bootstrapping.
         
         +   user_id explicitly passed with None means create a new
@@ -117,6 +124,7 @@ class Account(metaclass=API):
         +   identity explicitly passed with None means load an existing
             account.
         +   user_id XOR identity must be passed.
+        +   flush_debounce overrides FLUSH_DEBOUNCE.
         '''
         super().__init__(*args, **kwargs)
         
@@ -146,6 +154,12 @@ class Account(metaclass=API):
         
         self._root_secret = root_secret
         
+        if flush_debounce is None:
+            flush_debounce = self.FLUSH_DEBOUNCE
+        self._flush_debounce = flush_debounce
+        # The batch that the next flush() call will be folded into.
+        self._pending_flush = None
+    
     @__init__.fixture
     def __init__(self, identity, *args, **kwargs):
         ''' Lulz just ignore errytang and skip calling super!
@@ -187,7 +201,7 @@ class Account(metaclass=API):
         '''
         # We need to pre-allocate the privateer stuff so we can bootstrap it
         # before pulling the root node when reloading.
-        self.privateer_persistent = GAODict(
+        self.privateer_persistent = ShardedGAODict(
             ghid = None,
             dynamic = True,
             author = None,
@@ -196,9 +210,10 @@ class Account(metaclass=API):
             ghidproxy = self._ghidproxy,
             privateer = self._privateer,
             percore = self._percore,
-            librarian = self._librarian
+            librarian = self._librarian,
+            inject_leaf = self._inject_gao
         )
-        self.privateer_quarantine = GAODict(
+        self.privateer_quarantine = ShardedGAODict(
             ghid = None,
             dynamic = True,
             author = None,
@@ -207,7 +222,8 @@ class Account(metaclass=API):
             ghidproxy = self._ghidproxy,
             privateer = self._privateer,
             percore = self._percore,
-            librarian = self._librarian
+            librarian = self._librarian,
+            inject_leaf = self._inject_gao
         )
         
         # Privateer can be bootstrapped with or without pulling. Even though it
@@ -462,7 +478,7 @@ class Account(metaclass=API):
         # imply an ad-hoc, on-the-fly upgrade process)
         
         # Rolodex gaos:
-        self.rolodex_pending = GAODict(
+        self.rolodex_pending = ShardedGAODict(
             ghid = rolodex_pending_ghid,
             dynamic = True,
             author = None,
@@ -472,9 +488,10 @@ class Account(metaclass=API):
             privateer = self._privateer,
             percore = self._percore,
             librarian = self._librarian,
+            inject_leaf = self._inject_gao,
             master_secret = rolodex_pending_master
         )
-        self.rolodex_outstanding = GAOSetMap(
+        self.rolodex_outstanding = ShardedGAOSetMap(
             ghid = rolodex_outstanding_ghid,
             dynamic = True,
             author = None,
@@ -484,11 +501,12 @@ class Account(metaclass=API):
             privateer = self._privateer,
             percore = self._percore,
             librarian = self._librarian,
+            inject_leaf = self._inject_gao,
             master_secret = rolodex_outstanding_master
         )
         
         # Dispatch gaos:
-        self.dispatch_tokens = GAOSet(
+        self.dispatch_tokens = ShardedGAOSet(
             ghid = dispatch_tokens_ghid,
             dynamic = True,
             author = None,
@@ -498,9 +516,10 @@ class Account(metaclass=API):
             privateer = self._privateer,
             percore = self._percore,
             librarian = self._librarian,
+            inject_leaf = self._inject_gao,
             master_secret = dispatch_tokens_master
         )
-        self.dispatch_startup = GAODict(
+        self.dispatch_startup = ShardedGAODict(
             ghid = dispatch_startup_ghid,
             dynamic = True,
             author = None,
@@ -510,9 +529,10 @@ class Account(metaclass=API):
             privateer = self._privateer,
             percore = self._percore,
             librarian = self._librarian,
+            inject_leaf = self._inject_gao,
             master_secret = dispatch_startup_master
         )
-        self.dispatch_private = GAODict(
+        self.dispatch_private = ShardedGAODict(
             ghid = dispatch_private_ghid,
             dynamic = True,
             author = None,
@@ -522,9 +542,10 @@ class Account(metaclass=API):
             privateer = self._privateer,
             percore = self._percore,
             librarian = self._librarian,
+            inject_leaf = self._inject_gao,
             master_secret = dispatch_private_master
         )
-        self.dispatch_incoming = GAOSet(
+        self.dispatch_incoming = ShardedGAOSet(
             ghid = dispatch_incoming_ghid,
             dynamic = True,
             author = None,
@@ -534,9 +555,10 @@ class Account(metaclass=API):
             privateer = self._privateer,
             percore = self._percore,
             librarian = self._librarian,
+            inject_leaf = self._inject_gao,
             master_secret = dispatch_incoming_master
         )
-        self.dispatch_orphan_acks = GAOSetMap(
+        self.dispatch_orphan_acks = ShardedGAOSetMap(
             ghid = dispatch_orphan_acks_ghid,
             dynamic = True,
             author = None,
@@ -546,9 +568,10 @@ class Account(metaclass=API):
             privateer = self._privateer,
             percore = self._percore,
             librarian = self._librarian,
+            inject_leaf = self._inject_gao,
             master_secret = dispatch_orphan_acks_master
         )
-        self.dispatch_orphan_naks = GAOSetMap(
+        self.dispatch_orphan_naks = ShardedGAOSetMap(
             ghid = dispatch_orphan_naks_ghid,
             dynamic = True,
             author = None,
@@ -558,6 +581,7 @@ class Account(metaclass=API):
             privateer = self._privateer,
             percore = self._percore,
             librarian = self._librarian,
+            inject_leaf = self._inject_gao,
             master_secret = dispatch_orphan_naks_master
         )
         
@@ -674,24 +698,78 @@ class Account(metaclass=API):
         
         logger.info('Account login successful.')
     
+    @property
+    def _containers(self):
+        ''' All of the account GAOs that flush() is responsible for.
+        '''
+        return (
+            self.privateer_persistent,
+            self.privateer_quarantine,
+            self.rolodex_pending,
+            self.rolodex_outstanding,
+            self.dispatch_tokens,
+            self.dispatch_startup,
+            self.dispatch_private,
+            self.dispatch_incoming,
+            self.dispatch_orphan_acks,
+            self.dispatch_orphan_naks
+        )
+    
     @fixture_noop
     @public_api
-    async def flush(self):
+    async def flush(self, *, wait=True):
         ''' Push changes to any modified account components.
+        
+        Flush requests made within the debounce window are coalesced
+        into a single batch, which only pushes dirty components. If wait
+        is True, returns once the batch that covers any mutations made
+        before this call has completed, re-raising the error if any
+        component failed to push; otherwise, just schedules it.
+        '''
+        batch = self._pending_flush
+        if batch is None:
+            batch = make_background_future(self._flush_batch())
+            self._pending_flush = batch
+        
+        if wait:
+            # Shield it, so that a cancelled caller doesn't cancel the flush
+            # for everyone else.
+            await asyncio.shield(batch)
+    
+    async def _flush_batch(self):
+        ''' Wait out the debounce window, and then push everything that
+        was modified. Components that fail to push are left dirty, so
+        that the next batch retries them.
         '''
-        tasks = {
-            make_background_future(self.privateer_persistent.push()),
-            make_background_future(self.privateer_quarantine.push()),
-            make_background_future(self.rolodex_pending.push()),
-            make_background_future(self.rolodex_outstanding.push()),
-            make_background_future(self.dispatch_tokens.push()),
-            make_background_future(self.dispatch_startup.push()),
-            make_background_future(self.dispatch_private.push()),
-            make_background_future(self.dispatch_incoming.push()),
-            make_background_future(self.dispatch_orphan_acks.push()),
-            make_background_future(self.dispatch_orphan_naks.push())
-        }
-        await asyncio.wait(fs=tasks, return_when=asyncio.ALL_COMPLETED)
+        await asyncio.sleep(self._flush_debounce)
+        # Detach ourselves before looking for dirty GAOs, so that anything
+        # mutated from here on will be picked up by the next batch.
+        self._pending_flush = None
+        
+        dirty = [gao for gao in self._containers if gao.dirty]
+        if not dirty:
+            return
+        
+        results = await asyncio.gather(
+            *(gao.push() for gao in dirty),
+            return_exceptions = True
+        )
+        failure = None
+        for gao, result in zip(dirty, results):
+            if isinstance(result, Exception):
+                logger.error(
+                    'Failed to flush account component ' + str(gao.ghid) +
+                    ' w/ traceback:\n' + ''.join(traceback.format_exception(
+                        type(result), result, result.__traceback__
+                    ))
+                )
+                gao._mutated = True
+                if failure is None:
+                    failure = result
+        
+        # Re-raise for anyone waiting on the batch.
+        if failure is not None:
+            raise failure
 
 
 class Accountant:
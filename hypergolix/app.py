@@ -35,6 +35,7 @@ import logging
 import traceback
 import asyncio
 import loopa
+import pathlib
 import concurrent.futures
 
 from golix import Secret
@@ -69,6 +70,7 @@ from hypergolix.remotes import RemotePersistenceProtocol
 from hypergolix.core import GolixCore
 from hypergolix.core import GhidProxier
 from hypergolix.core import Oracle
+from hypergolix.inquisition import Inquisitor
 from hypergolix.rolodex import Rolodex
 from hypergolix.dispatch import Dispatcher
 from hypergolix.ipc import IPCServerProtocol
@@ -99,11 +101,18 @@ class HypergolixCore(loopa.TaskCommander, metaclass=API):
     account = weak_property('_account')
     
     @public_api
-    def __init__(self, cache_dir, ipc_port, *args, **kwargs):
+    def __init__(self, cache_dir, ipc_port, *args, memory_budget=None,
+                 broadcast_pulls=False, **kwargs):
         ''' Create and assemble everything, readying it for a bootstrap
         (etc).
         
         user_id may be explicitly None to create a new account.
+        
+        memory_budget (in bytes) limits how much GAO state the oracle
+        keeps in memory; see Inquisitor.
+        
+        broadcast_pulls sends every pull to every remote at once, instead
+        of the healthiest one first; see Salmonator.
         '''
         super().__init__(*args, **kwargs)
         # We also want to create an event so things can block on us being
@@ -124,14 +133,22 @@ class HypergolixCore(loopa.TaskCommander, metaclass=API):
         self.librarian = DiskLibrarian(cache_dir, self.executor, self._loop)
         self.postman = MrPostman()
         self.undertaker = Ferryman()
-        self.salmonator = Salmonator()
+        # Keep the outbox in a subdirectory, since the librarian will only
+        # restore files from the cache directory itself.
+        outbox_dir = pathlib.Path(cache_dir) / 'outbox'
+        outbox_dir.mkdir(exist_ok=True)
+        self.salmonator = Salmonator(
+            outbox_dir = outbox_dir,
+            broadcast_pulls = broadcast_pulls
+        )
         self.remote_protocol = RemotePersistenceProtocol()
         
         # Golix stuff
         self.golcore = GolixCore(self.executor, self._loop)
         self.ghidproxy = GhidProxier()
         self.oracle = Oracle()
-        self.privateer = Privateer()
+        self.inquisitor = Inquisitor(budget=memory_budget)
+        self.privateer = Privateer(executor=self.executor)
         
         # Application engine stuff
         self.rolodex = Rolodex()
@@ -197,11 +214,16 @@ class HypergolixCore(loopa.TaskCommander, metaclass=API):
             privateer = self.privateer,
             percore = self.percore,
             librarian = self.librarian,
-            salmonator = self.salmonator
+            salmonator = self.salmonator,
+            inquisitor = self.inquisitor
         )
         self.privateer.assemble(self.golcore)
         
         # App engine assembly
+        self.inquisitor.assemble(
+            oracle = self.oracle,
+            dispatch = self.dispatch
+        )
         self.dispatch.assemble(
             oracle = self.oracle,
             ipc_protocol = self.ipc_protocol
@@ -0,0 +1,441 @@
+'''
+LICENSING
+-------------------------------------------------
+
+hypergolix: A python Golix client.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+    
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+    
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+    
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the
+    Free Software Foundation, Inc.,
+    51 Franklin Street,
+    Fifth Floor,
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+Compact binary codec for account GAO state.
+
+The account containers are big, homogeneous collections of ghids,
+secrets, and app tokens. Instead of pickling them, we write a small
+tagged format where every collection is stored as columns: if every
+item in a column is (exactly) a Ghid, Secret, or AppToken, the column
+is a single contiguous array of fixed-width records (65, 53, and 16
+bytes respectively). Anything else in a column is tagged individually.
+
+Frames start with MAGIC and a version byte, so they can never be
+mistaken for pickles (which always start with b'\\x80'). Decoding a
+codec frame never constructs anything other than the builtin types,
+Ghids, Secrets, AppTokens, SetMaps, and explicitly registered
+namedtuples, and every Ghid and Secret goes through its constructor.
+Note that this says nothing about the callers: the GAOs still pickle
+frames the codec can't represent, and still unpickle older frames.
+'''
+
+# Global dependencies
+import logging
+import struct
+import itertools
+
+from golix import Ghid
+from golix import Secret
+
+# Intra-package dependencies
+from .utils import AppToken
+from .utils import SetMap
+
+
+# ###############################################
+# Boilerplate
+# ###############################################
+
+
+logger = logging.getLogger(__name__)
+
+# Control * imports.
+__all__ = [
+    'dumps',
+    'loads',
+    'is_encoded',
+    'register_namedtuple',
+]
+
+
+# ###############################################
+# Library
+# ###############################################
+
+
+MAGIC = b'hgxc'
+VERSION = 1
+
+_GHID_LEN = 65
+_SECRET_LEN = 53
+_TOKEN_LEN = AppToken.TOKEN_LEN
+# Secrets are b'SH' + version (uint16) + cipher (uint8) + key + seed
+_SECRET_KEY_LEN = 32
+_SECRET_SEED_LEN = 16
+
+_length = struct.Struct('>I')
+
+# Namedtuple types that may be stored, by name (and vice versa)
+_namedtuples = {}
+_namedtuple_names = {}
+
+
+def register_namedtuple(cls):
+    ''' Allow instances of the namedtuple cls to be encoded. Decoding
+    requires the same registration, so call this at import time.
+    '''
+    name = cls.__module__ + '.' + cls.__qualname__
+    _namedtuples[name] = cls
+    _namedtuple_names[cls] = name
+    return cls
+
+
+def is_encoded(data):
+    ''' Check if data was (probably) produced by dumps().
+    '''
+    return data[:len(MAGIC)] == MAGIC
+
+
+def dumps(obj):
+    ''' Encode obj. Raises TypeError if obj (or anything inside it)
+    isn't supported; callers should fall back to pickle.
+    '''
+    out = bytearray(MAGIC)
+    out.append(VERSION)
+    _encode(obj, out)
+    return bytes(out)
+
+
+def loads(data):
+    ''' Decode something produced by dumps(). Raises ValueError if it
+    is malformed.
+    '''
+    if not is_encoded(data):
+        raise ValueError('Not an encoded GAO state.')
+    
+    elif data[len(MAGIC)] != VERSION:
+        raise ValueError(
+            'Unsupported GAO state encoding version: ' +
+            str(data[len(MAGIC)])
+        )
+    
+    decoder = _Decoder(data, len(MAGIC) + 1)
+    try:
+        obj = decoder.value()
+    except (IndexError, KeyError, struct.error) as exc:
+        raise ValueError('Malformed GAO state encoding.') from exc
+    
+    if decoder.pos != len(data):
+        raise ValueError('Trailing data in GAO state encoding.')
+    
+    return obj
+
+
+def _pack_secret(secret):
+    ''' Fixed-width secret packing, without going through the (slow)
+    golix parser. Returns None if the secret isn't 53 bytes long.
+    '''
+    if (len(secret.key) != _SECRET_KEY_LEN or
+            len(secret.seed) != _SECRET_SEED_LEN):
+        return None
+    
+    return (
+        b'SH' + secret.version.to_bytes(2, 'big') +
+        bytes((secret.cipher,)) + secret.key + secret.seed
+    )
+
+
+def _unpack_secret(data, offset=0):
+    ''' Inverse of _pack_secret, reading from data at offset.
+    '''
+    if data[offset:offset + 2] != b'SH':
+        raise ValueError('Malformed secret.')
+    
+    version = int.from_bytes(data[offset + 2:offset + 4], 'big')
+    cipher = data[offset + 4]
+    key = data[offset + 5:offset + 5 + _SECRET_KEY_LEN]
+    seed = data[offset + 5 + _SECRET_KEY_LEN:offset + _SECRET_LEN]
+    return Secret(cipher=cipher, key=key, seed=seed, version=version)
+
+
+def _unpack_ghid(data, offset=0):
+    ''' Read a fixed-width ghid from data at offset.
+    '''
+    algo = data[offset]
+    address = data[offset + 1:offset + _GHID_LEN]
+    return Ghid(algo, address)
+
+
+def _write_length(n, out):
+    out += _length.pack(n)
+
+
+def _write_blob(data, out):
+    _write_length(len(data), out)
+    out += data
+
+
+def _encode(obj, out):
+    ''' Append the tagged encoding of obj to out.
+    '''
+    # Note: exact type checks, since (for example) ApiID subclasses Ghid,
+    # and AppToken subclasses bytes.
+    objtype = type(obj)
+    
+    if obj is None:
+        out += b'N'
+    elif obj is True:
+        out += b'T'
+    elif obj is False:
+        out += b'F'
+    
+    elif objtype is Ghid:
+        out += b'g'
+        out += bytes(obj)
+    
+    elif objtype is Secret:
+        packed = _pack_secret(obj)
+        if packed is None:
+            out += b'K'
+            _write_blob(bytes(obj), out)
+        else:
+            out += b'k'
+            out += packed
+    
+    elif objtype is AppToken:
+        out += b'a'
+        out += obj
+    
+    elif objtype is bytes:
+        out += b'b'
+        _write_blob(obj, out)
+    
+    elif objtype is str:
+        out += b'u'
+        _write_blob(obj.encode('utf-8'), out)
+    
+    elif objtype is int:
+        out += b'i'
+        _write_blob(
+            obj.to_bytes((obj.bit_length() + 8) // 8, 'big', signed=True),
+            out
+        )
+    
+    elif objtype is tuple:
+        out += b't'
+        _write_length(len(obj), out)
+        _encode_column(obj, out)
+    
+    elif objtype is list:
+        out += b'l'
+        _write_length(len(obj), out)
+        _encode_column(obj, out)
+    
+    elif objtype is set or objtype is frozenset:
+        out += b's' if objtype is set else b'f'
+        _write_length(len(obj), out)
+        _encode_column(obj, out)
+    
+    elif objtype is dict:
+        out += b'd'
+        _write_length(len(obj), out)
+        _encode_column(obj.keys(), out)
+        _encode_column(obj.values(), out)
+    
+    # SetMaps are stored as a column of keys, a column of set sizes, and a
+    # single flattened column of all of the values.
+    elif objtype is SetMap:
+        with obj._lock:
+            items = [(key, list(values)) for key, values in
+                     obj._mapping.items()]
+        out += b'm'
+        _write_length(len(items), out)
+        _encode_column([key for key, __ in items], out)
+        out += struct.pack(
+            '>' + str(len(items)) + 'I',
+            *(len(values) for __, values in items)
+        )
+        values = [value for __, values in items for value in values]
+        _write_length(len(values), out)
+        _encode_column(values, out)
+    
+    elif objtype in _namedtuple_names:
+        out += b'n'
+        _write_blob(_namedtuple_names[objtype].encode('utf-8'), out)
+        _write_length(len(obj), out)
+        _encode_column(obj, out)
+    
+    else:
+        raise TypeError('Cannot encode ' + objtype.__name__ + ' objects.')
+
+
+def _encode_column(items, out):
+    ''' Append a column of (already counted) items to out, as a single
+    fixed-width array if they're homogeneous.
+    '''
+    items = list(items)
+    types = {type(item) for item in items}
+    
+    if len(types) != 1:
+        kind = None
+    else:
+        kind, = types
+    
+    if kind is Ghid:
+        out += b'G'
+        out += b''.join(bytes(item) for item in items)
+    
+    elif kind is AppToken:
+        out += b'A'
+        out += b''.join(items)
+    
+    elif kind is Secret:
+        packed = [_pack_secret(item) for item in items]
+        if None in packed:
+            kind = None
+        else:
+            out += b'S'
+            out += b''.join(packed)
+    
+    else:
+        kind = None
+    
+    if kind is None:
+        out += b'V'
+        for item in items:
+            _encode(item, out)
+
+
+class _Decoder:
+    ''' Walks an encoded buffer.
+    '''
+    
+    def __init__(self, data, pos):
+        self.data = bytes(data)
+        self.pos = pos
+    
+    def skip(self, n):
+        ''' Advance by n, returning the old position.
+        '''
+        start = self.pos
+        self.pos += n
+        if self.pos > len(self.data):
+            raise ValueError('Truncated GAO state encoding.')
+        return start
+    
+    def take(self, n):
+        start = self.skip(n)
+        return self.data[start:self.pos]
+    
+    def length(self):
+        return _length.unpack_from(self.data, self.skip(_length.size))[0]
+    
+    def blob(self):
+        return self.take(self.length())
+    
+    def value(self):
+        tag = self.take(1)
+        
+        if tag == b'N':
+            return None
+        elif tag == b'T':
+            return True
+        elif tag == b'F':
+            return False
+        elif tag == b'g':
+            return _unpack_ghid(self.data, self.skip(_GHID_LEN))
+        elif tag == b'k':
+            return _unpack_secret(self.data, self.skip(_SECRET_LEN))
+        elif tag == b'K':
+            return Secret.from_bytes(self.blob())
+        elif tag == b'a':
+            return AppToken(self.take(_TOKEN_LEN))
+        elif tag == b'b':
+            return self.blob()
+        elif tag == b'u':
+            return str(self.blob(), 'utf-8')
+        elif tag == b'i':
+            return int.from_bytes(self.blob(), 'big', signed=True)
+        elif tag == b't':
+            return tuple(self.column(self.length()))
+        elif tag == b'l':
+            return self.column(self.length())
+        elif tag == b's':
+            return set(self.column(self.length()))
+        elif tag == b'f':
+            return frozenset(self.column(self.length()))
+        
+        elif tag == b'd':
+            count = self.length()
+            keys = self.column(count)
+            return dict(zip(keys, self.column(count)))
+        
+        elif tag == b'm':
+            count = self.length()
+            keys = self.column(count)
+            sizes = struct.unpack_from(
+                '>' + str(count) + 'I',
+                self.data,
+                self.skip(count * _length.size)
+            )
+            values = iter(self.column(self.length()))
+            setmap = SetMap()
+            setmap._mapping = {
+                key: set(itertools.islice(values, size))
+                for key, size in zip(keys, sizes)
+            }
+            return setmap
+        
+        elif tag == b'n':
+            cls = _namedtuples[str(self.blob(), 'utf-8')]
+            return cls(*self.column(self.length()))
+        
+        else:
+            raise ValueError('Unknown GAO state encoding tag: ' + repr(tag))
+    
+    def column(self, count):
+        kind = self.take(1)
+        
+        if kind == b'G':
+            return self._fixed(count, _GHID_LEN, _unpack_ghid)
+        elif kind == b'S':
+            return self._fixed(count, _SECRET_LEN, _unpack_secret)
+        elif kind == b'A':
+            data = self.data
+            return [
+                AppToken(data[offset:offset + _TOKEN_LEN])
+                for offset in range(
+                    self.skip(count * _TOKEN_LEN),
+                    self.pos,
+                    _TOKEN_LEN
+                )
+            ]
+        elif kind == b'V':
+            return [self.value() for __ in range(count)]
+        else:
+            raise ValueError('Unknown GAO state column: ' + repr(kind))
+    
+    def _fixed(self, count, width, parse):
+        data = self.data
+        return [
+            parse(data, offset)
+            for offset in range(self.skip(count * width), self.pos, width)
+        ]
@@ -46,6 +46,7 @@ import time
 # 2. fixturing connection recv
 import random
 
+import collections.abc
 from collections import namedtuple
 
 # Internal deps
@@ -826,16 +827,190 @@ class ConnectionManager(loopa.TaskLooper, metaclass=loopa.utils.Triplicate):
         await self._conn_available.wait()
 
 
+class ConnectionPool:
+    ''' Maintains several parallel ConnectionManagers ("lanes") to the
+    same server, so that large transfers don't head-of-line block all
+    of the other traffic behind them.
+    
+    The first lane is the control lane. It carries every request that
+    isn't explicitly declared bulk -- including all subscriptions, so
+    that subscription updates from the server always arrive on a single
+    connection. conn_init and conn_close are only ever called for the
+    control lane, and are passed the pool instead of the lane.
+    
+    Bulk requests are sent on whichever connected bulk lane currently
+    has the fewest requests in flight, falling back to the control lane
+    if no bulk lane is connected. Note that the server sees each lane
+    as a separate connection, so any request whose side effects depend
+    on the connection it arrived on (for example, publishes that the
+    server echoes to every subscriber except the publisher) must stay
+    on the control lane.
+    
+    The pool itself is not a task. Instead, register every one of
+    pool.lanes with the TaskCommander, using the same connection args.
+    '''
+    
+    def __init__(self, connection_cls, msg_handler, conn_init=None,
+                 conn_close=None, *, lanes=3, bulk_requests=frozenset(),
+                 autoretry=True):
+        ''' Create all of the lanes.
+        
+        bulk_requests is either a collection of request names (as
+        defined in msg_handler) to route onto the bulk lanes, or a
+        mapping of request names to predicates. Predicates are called
+        with the request's args and kwargs, and return True if that
+        particular request should be routed onto a bulk lane. A None
+        predicate always routes onto a bulk lane.
+        '''
+        if lanes < 1:
+            raise ValueError('Connection pools need at least one lane.')
+        
+        self.protocol_def = msg_handler
+        self.conn_init = conn_init
+        self.conn_close = conn_close
+        if isinstance(bulk_requests, collections.abc.Mapping):
+            self.bulk_requests = dict(bulk_requests)
+        else:
+            self.bulk_requests = dict.fromkeys(bulk_requests)
+        
+        self.lanes = [
+            ConnectionManager(
+                connection_cls,
+                msg_handler,
+                self._control_init,
+                self._control_close,
+                autoretry = autoretry
+            )
+        ]
+        for __ in range(lanes - 1):
+            self.lanes.append(
+                ConnectionManager(
+                    connection_cls,
+                    msg_handler,
+                    autoretry = autoretry
+                )
+            )
+        
+        # Lookup for <lane>: <number of requests in flight>
+        self._in_flight = {lane: 0 for lane in self.lanes}
+        
+        # Same as ConnectionManager, except we're going through our own
+        # perform_request to pick a lane.
+        for name in msg_handler._RESPONDERS:
+            async def wrap_request(*args, _method=name, **kwargs):
+                ''' Pass all requests to our perform_request method.
+                '''
+                return (await self.perform_request(_method, args, kwargs))
+            
+            setattr(self, name, wrap_request)
+    
+    @property
+    def control_lane(self):
+        ''' The lane used for all non-bulk requests.
+        '''
+        return self.lanes[0]
+    
+    @property
+    def bulk_lanes(self):
+        ''' All of the lanes used for bulk requests. If the pool only
+        has a single lane, this is the control lane.
+        '''
+        return self.lanes[1:] or self.lanes[:1]
+    
+    @property
+    def _conn_desc(self):
+        return self.control_lane._conn_desc
+    
+    def __str__(self):
+        ''' Make a better, compact representation of self.
+        '''
+        return (
+            type(self).__name__ + '(' + self._conn_desc + ', ' +
+            str(len(self.lanes)) + ' lanes)'
+        )
+    
+    async def _control_init(self, lane, connection):
+        ''' Substitute the pool for the lane in conn_init.
+        '''
+        if self.conn_init is not None:
+            await self.conn_init(self, connection)
+    
+    async def _control_close(self, lane, connection):
+        ''' Substitute the pool for the lane in conn_close.
+        '''
+        if self.conn_close is not None:
+            await self.conn_close(self, connection)
+    
+    @staticmethod
+    def _lane_connected(lane):
+        ''' Like lane.has_connection, but safe to call before the lane
+        has started.
+        '''
+        return lane._conn_available is not None and lane.has_connection
+    
+    def _pick_lane(self, request_name, args=(), kwargs=None):
+        ''' Choose which lane to use for the request.
+        '''
+        if request_name not in self.bulk_requests:
+            return self.control_lane
+        
+        predicate = self.bulk_requests[request_name]
+        if predicate is not None and not predicate(*args, **(kwargs or {})):
+            return self.control_lane
+        
+        connected = [
+            lane for lane in self.bulk_lanes if self._lane_connected(lane)
+        ]
+        
+        if connected:
+            return min(connected, key=self._in_flight.__getitem__)
+        
+        # Better head-of-line blocking than waiting for a reconnect
+        elif self._lane_connected(self.control_lane):
+            return self.control_lane
+        
+        else:
+            return min(self.bulk_lanes, key=self._in_flight.__getitem__)
+    
+    async def perform_request(self, request_name, args, kwargs):
+        ''' Make the given request on the appropriate lane, waiting
+        until that lane has a connection.
+        '''
+        lane = self._pick_lane(request_name, args, kwargs)
+        self._in_flight[lane] += 1
+        
+        try:
+            return (await lane.perform_request(request_name, args, kwargs))
+        
+        finally:
+            self._in_flight[lane] -= 1
+    
+    @property
+    def has_connection(self):
+        return self.control_lane.has_connection
+    
+    async def await_connection(self):
+        ''' Wait for the control lane to have a connection.
+        '''
+        await self.control_lane.await_connection()
+
+
 class RequestResponseProtocol(type):
     ''' Metaclass for defining a simple request/response protocol.
     '''
     
     def __new__(mcls, clsname, bases, namespace, *args, success_code=b'AK',
                 failure_code=b'NK', error_codes=tuple(), default_version=b'',
-                **kwargs):
+                zero_copy=False, **kwargs):
         ''' Modify the existing namespace to include success codes,
         failure codes, the responders, etc. Ensure every request code
         has both a requestor and a request handler.
+        
+        If zero_copy is True, message bodies are handed to request and
+        response handlers as memoryviews into the received message,
+        instead of as bytes copies. Only use this for protocols whose
+        handlers are buffer-safe (ie, never leak the body to code that
+        expects actual bytes).
         '''
     
         # Insert the mixin into the base classes, so that the user-defined
@@ -910,6 +1085,9 @@ class RequestResponseProtocol(type):
         cls._SUCCESS_CODE = success_code
         cls._FAILURE_CODE = failure_code
         
+        # Decide whether or not bodies are passed as memoryviews
+        cls._ZERO_COPY = bool(zero_copy)
+        
         # Support bidirectional lookup for request code <--> request attr name
         cls._RESPONDERS = _BijectDict(req_defs)
         
@@ -917,7 +1095,8 @@ class RequestResponseProtocol(type):
         return cls
         
     def __init__(self, *args, success_code=b'AK', failure_code=b'NK',
-                 error_codes=tuple(), default_version=b'', **kwargs):
+                 error_codes=tuple(), default_version=b'', zero_copy=False,
+                 **kwargs):
         # Since we're doing everything in __new__, at least right now, don't
         # even bother with this.
         super().__init__(*args, **kwargs)
@@ -1107,16 +1286,19 @@ class _ReqResMixin:
         # coroutine, so it could be an ACK or a NAK as well as a request.
         if code == self._SUCCESS_CODE:
             logger.debug(
-                msg_id + ' SUCCESS received w/ partial body: ' + str(body[:10])
+                msg_id + ' SUCCESS received w/ partial body: ' +
+                str(bytes(body[:10]))
             )
             response = (body, None)
             
         # For failures, result=None and failure=Exception()
         elif code == self._FAILURE_CODE:
             logger.debug(
-                msg_id + ' FAILURE received w/ partial body: ' + str(body[:10])
+                msg_id + ' FAILURE received w/ partial body: ' +
+                str(bytes(body[:10]))
             )
-            response = (None, self._unpack_failure(body))
+            # Failure bodies are tiny, so there's no harm in copying them.
+            response = (None, self._unpack_failure(bytes(body)))
             
         # Handle a new request then.
         else:
@@ -1135,7 +1317,7 @@ class _ReqResMixin:
         if waiter is None:
             logger.warning(msg_id + ' request token unknown.')
             logger.debug(msg_id + ' code: ' + str(code))
-            logger.debug(msg_id + ' body: ' + str(body[:50]))
+            logger.debug(msg_id + ' body: ' + str(bytes(body[:50])))
         
         else:
             logger.debug(msg_id + ' waking sender...')
@@ -1143,14 +1325,27 @@ class _ReqResMixin:
         
     async def packit(self, code, token, body):
         ''' Serialize a message.
+        
+        The body may be either a single bytes-like object, or a list or
+        tuple of bytes-like segments. Either way, everything is gathered
+        into the outgoing frame with exactly one copy.
         '''
         # Token is an actual int, so bytes()ing it tries to make that many
         # bytes instead of re-casting it (which is very inconvenient)
-        return self._VERSION_STR + code + bytes(token) + body
+        if isinstance(body, (list, tuple)):
+            segments = [self._VERSION_STR, code, bytes(token), *body]
+        else:
+            segments = (self._VERSION_STR, code, bytes(token), body)
+            
+        return b''.join(segments)
         
     async def unpackit(self, msg):
         ''' Deserialize a message.
+        
+        The header fields are (tiny) bytes copies, but for zero-copy
+        protocols, the body is a memoryview into the original message.
         '''
+        msg = memoryview(msg)
         offset = 0
         field_lengths = [
             self._VERSION_LEN,
@@ -1161,13 +1356,15 @@ class _ReqResMixin:
         results = []
         for field_length in field_lengths:
             end = offset + field_length
-            results.append(msg[offset:end])
+            results.append(bytes(msg[offset:end]))
             offset = end
-        # Don't forget the body
-        results.append(msg[offset:])
+        version, code, token = results
         
-        # This method feels very inelegant and inefficient but, for now, meh.
-        version, code, token, body = results
+        # Don't forget the body
+        if self._ZERO_COPY:
+            body = msg[offset:]
+        else:
+            body = bytes(msg[offset:])
         
         # Raise if bad version.
         if version != self._VERSION_STR:
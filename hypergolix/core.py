@@ -54,10 +54,12 @@ from .hypothetical import fixture_noop
 from .utils import NoContext
 from .utils import weak_property
 from .utils import readonly_property
+from .utils import SetMap
 
 from .persistence import _GeocLite
 
 from .exceptions import UnknownParty
+from .exceptions import ProxyDepthExceeded
 
 
 # ###############################################
@@ -101,11 +103,9 @@ class GolixCore(metaclass=API):
         _identity isinstance golix.FirstParty
         '''
         super().__init__(*args, **kwargs)
-        self._mutex_request = threading.Lock()
-        self._mutex_container = threading.Lock()
-        self._mutex_sbinding = threading.Lock()
-        self._mutex_dbinding = threading.Lock()
-        self._mutex_xbinding = threading.Lock()
+        # Per-thread copies of the identity, so that executor workers never
+        # share signing/encryption contexts (and therefore needn't lock).
+        self._contexts = threading.local()
         
         # Added during bootstrap
         self.__identity = None
@@ -153,6 +153,27 @@ class GolixCore(metaclass=API):
         '''
         self.__identity = identity
         
+    def _local_identity(self):
+        ''' Get a copy of our identity private to the current thread,
+        creating it if necessary. All of the executor-side crypto goes
+        through this, so that concurrent pushes don't serialize on a
+        single set of keys.
+        '''
+        identity = self._identity
+        # Before bootstrap, all we have is the (stateless) FirstParty class.
+        if isinstance(identity, type):
+            return identity
+        
+        contexts = self._contexts
+        # Also catch the identity changing out from under us.
+        if getattr(contexts, 'source', None) is not identity:
+            contexts.identity = type(identity)._from_serialized(
+                identity._serialize()
+            )
+            contexts.source = identity
+        
+        return contexts.identity
+    
     @property
     @public_api
     def whoami(self):
@@ -182,9 +203,7 @@ class GolixCore(metaclass=API):
         ''' Just like it says on the label...
         Note that the request is PACKED, not unpacked.
         '''
-        with self._mutex_request:
-            unpacked = self._identity.unpack_request(request)
-        return unpacked
+        return self._local_identity().unpack_request(request)
         
     @public_api
     async def open_request(self, unpacked):
@@ -222,7 +241,7 @@ class GolixCore(metaclass=API):
         ''' Just like it says on the label...
         Note that the request is UNPACKED, not packed.
         '''
-        return self._identity.receive_request(requestor, unpacked)
+        return self._local_identity().receive_request(requestor, unpacked)
     
     @public_api
     async def make_request(self, recipient, payload):
@@ -255,11 +274,43 @@ class GolixCore(metaclass=API):
         
     def _make_request(self, recipient, payload):
         # Just like it says on the label...
-        with self._mutex_request:
-            return self._identity.make_request(
-                recipient = recipient,
-                request = payload,
-            )
+        return self._local_identity().make_request(
+            recipient = recipient,
+            request = payload,
+        )
+    
+    @public_api
+    async def make_share_request(self, recipient, target, secret):
+        ''' Make a handshake request sharing target, whose container
+        secret is secret, with the recipient. Unlike make_request, the
+        recipient must already be a SecondParty.
+        '''
+        # Run the actual function in the executor
+        return (await self._loop.run_in_executor(
+            self._executor,
+            self._make_share_request,
+            recipient,
+            target,
+            secret
+        ))
+    
+    @make_share_request.fixture
+    async def make_share_request(self, recipient, target, secret):
+        ''' Bypass executor for fixture.
+        '''
+        return self._make_share_request(recipient, target, secret)
+    
+    def _make_share_request(self, recipient, target, secret):
+        # Handshake and request in one go, so it's one trip to the executor.
+        identity = self._local_identity()
+        handshake = identity.make_handshake(
+            target = target,
+            secret = secret
+        )
+        return identity.make_request(
+            recipient = recipient,
+            request = handshake
+        )
     
     @public_api
     async def open_container(self, container, secret):
@@ -289,12 +340,11 @@ class GolixCore(metaclass=API):
         
     def _open_container(self, container, secret, author):
         # Wrapper around golix.FirstParty.receive_container.
-        with self._mutex_container:
-            return self._identity.receive_container(
-                author = author,
-                secret = secret,
-                container = container
-            )
+        return self._local_identity().receive_container(
+            author = author,
+            secret = secret,
+            container = container
+        )
     
     @public_api
     async def make_container(self, data, secret):
@@ -315,11 +365,10 @@ class GolixCore(metaclass=API):
         
     def _make_container(self, data, secret):
         # Simple wrapper around golix.FirstParty.make_container
-        with self._mutex_container:
-            return self._identity.make_container(
-                secret = secret,
-                plaintext = data
-            )
+        return self._local_identity().make_container(
+            secret = secret,
+            plaintext = data
+        )
 
     @public_api
     async def make_binding_stat(self, target):
@@ -341,8 +390,7 @@ class GolixCore(metaclass=API):
     def _make_binding_stat(self, target):
         # Note that this requires no open() method, as bindings are verified by
         # the local persister.
-        with self._mutex_sbinding:
-            return self._identity.make_bind_static(target)
+        return self._local_identity().make_bind_static(target)
     
     @public_api
     async def make_binding_dyn(self, target, ghid=None, history=None):
@@ -393,12 +441,11 @@ class GolixCore(metaclass=API):
         else:
             target_vector = [target]
         
-        with self._mutex_dbinding:
-            return self._identity.make_bind_dynamic(
-                counter = counter,
-                target_vector = target_vector,
-                ghid_dynamic = ghid
-            )
+        return self._local_identity().make_bind_dynamic(
+            counter = counter,
+            target_vector = target_vector,
+            ghid_dynamic = ghid
+        )
     
     @public_api
     async def make_debinding(self, target):
@@ -418,22 +465,38 @@ class GolixCore(metaclass=API):
         
     def _make_debinding(self, target):
         # Simple wrapper around golix.FirstParty.make_debind
-        with self._mutex_xbinding:
-            return self._identity.make_debind(target)
+        return self._local_identity().make_debind(target)
 
 
 class GhidProxier(metaclass=API):
     ''' Resolve the base container GHID from any associated ghid. Uses
     all weak references, so should not interfere with GCing objects.
+    
+    Resolutions are cached. Every binding ghid along the way is
+    remembered, and the librarian tells us whenever one of them is
+    stored (ie updated) or abandoned, at which point anything that went
+    through it is dropped from the cache.
     '''
-    # Note that we can't really cache aliases, because their proxies will
-    # not update when we change things unless the proxy is also removed
-    # from the cache. Since the objects may (or may not) exist locally in
-    # memory anyways, we should just take advantage of that, and allow our
-    # inquisitor to more easily manage memory consumption as well.
+    # Maximum number of binding hops between a ghid and its container
+    MAX_DEPTH = 32
+    
     _librarian = weak_property('__librarian')
     
-    @fixture_api
+    @public_api
+    def __init__(self, *args, **kwargs):
+        ''' Set up the resolution cache.
+        '''
+        super().__init__(*args, **kwargs)
+        # Lookup <ghid>: <container ghid>. Only ghids that are actually
+        # bindings end up in here, so this is bounded by local objects.
+        self._cache = {}
+        # Lookup <binding ghid>: {<cached ghids that depend on it>}
+        self._dependents = SetMap()
+        # Incremented on every invalidation, so that resolutions that race
+        # an update don't get cached.
+        self._generation = 0
+    
+    @__init__.fixture
     def __init__(self, *args, **kwargs):
         ''' Add in a dict to store resolutions.
         '''
@@ -443,6 +506,14 @@ class GhidProxier(metaclass=API):
     def assemble(self, librarian):
         # Chicken, meet egg.
         self._librarian = librarian
+        librarian.add_binding_listener(self._invalidate)
+    
+    def _invalidate(self, ghid):
+        ''' Called by the librarian whenever a binding changes.
+        '''
+        self._generation += 1
+        for dependent in self._dependents.pop_any(ghid):
+            self._cache.pop(dependent, None)
         
     def __mklink(self, proxy, target):
         ''' Set, or update, a ghid proxy.
@@ -468,41 +539,61 @@ class GhidProxier(metaclass=API):
         
         TODO: make this guarantee, through using the persister's
         librarian, that the resolved ghid IS, in fact, a container.
-        
-        TODO: consider adding a depth limit to resolution.
         '''
         if not isinstance(ghid, Ghid):
             raise TypeError('Can only resolve a ghid.')
-            
-        return (await self._resolve(ghid))
         
-    async def _resolve(self, ghid):
-        ''' Recursively resolves the container ghid for a proxy (or a
-        container).
-        '''
         try:
-            obj = await self._librarian.summarize(ghid)
-        
-        # TODO: make this an error?
+            return self._cache[ghid]
         except KeyError:
-            logger.warning(''.join((
-                'GAO ',
-                str(ghid),
-                ' address resolver failed to verify: missing at librarian.\n',
-                traceback.format_exc()
-            )))
-            
-            result = ghid
+            pass
+        
+        generation = self._generation
+        chain = []
+        result, complete = await self._resolve(ghid, chain)
+        
+        # Don't cache anything with a missing link, or anything that was
+        # updated while we were resolving it. Every binding in the chain is
+        # itself resolved by the rest of the chain, so cache those too.
+        if complete and generation == self._generation:
+            for ii, link in enumerate(chain):
+                self._cache[link] = result
+                for dependency in chain[ii:]:
+                    self._dependents.add(dependency, link)
         
-        else:
-            if isinstance(obj, _GeocLite):
-                result = ghid
-                
-            else:
-                result = await self._resolve(obj.target)
-                
         return result
         
+    async def _resolve(self, ghid, chain):
+        ''' Follows bindings from ghid down to its container, appending
+        each binding ghid to chain along the way. Returns the container
+        ghid, and whether or not every link was available.
+        '''
+        while len(chain) <= self.MAX_DEPTH:
+            try:
+                obj = await self._librarian.summarize(ghid)
+            
+            # TODO: make this an error?
+            except KeyError:
+                logger.warning(''.join((
+                    'GAO ',
+                    str(ghid),
+                    ' address resolver failed to verify: missing at '
+                    'librarian.\n',
+                    traceback.format_exc()
+                )))
+                return ghid, False
+            
+            if isinstance(obj, _GeocLite):
+                return ghid, True
+            
+            chain.append(ghid)
+            ghid = obj.target
+        
+        raise ProxyDepthExceeded(
+            'More than ' + str(self.MAX_DEPTH) + ' bindings between ' +
+            str(chain[0]) + ' and its container.'
+        )
+    
     @resolve.fixture
     async def resolve(self, ghid):
         ''' Ehhhh, okay. So we're going to fixture this, mostly for
@@ -523,6 +614,7 @@ class Oracle(metaclass=API):
     '''
     # These are actually used by the oracle itself
     _salmonator = weak_property('__salmonator')
+    _inquisitor = weak_property('__inquisitor')
     
     # These are only here to pass along to GAOs
     _golcore = weak_property('__golcore')
@@ -536,15 +628,20 @@ class Oracle(metaclass=API):
         '''
         super().__init__(*args, **kwargs)
         self._lookup = {}
+        # Objects evicted from the lookup that are still in memory, either
+        # because something else is using them, or because they're cyclic
+        # garbage that hasn't been collected yet.
+        self._evicted = weakref.WeakValueDictionary()
         
     @fixture_api
     def RESET(self):
         ''' Simply re-call init.
         '''
         self._lookup.clear()
+        self._evicted.clear()
         
     def assemble(self, golcore, ghidproxy, privateer, percore, librarian,
-                 salmonator):
+                 salmonator, inquisitor=None):
         # Chicken, meet egg.
         self._golcore = golcore
         self._ghidproxy = ghidproxy
@@ -553,6 +650,21 @@ class Oracle(metaclass=API):
         self._librarian = librarian
         self._salmonator = salmonator
         
+        # The inquisitor is optional; without it, objects stay in memory
+        # until explicitly forgotten.
+        if inquisitor is not None:
+            self._inquisitor = inquisitor
+    
+    def _touch(self, ghid, obj):
+        ''' Let the inquisitor (if any) know that obj was just used.
+        '''
+        try:
+            inquisitor = self._inquisitor
+        except AttributeError:
+            return
+        
+        inquisitor.touch(ghid, obj)
+    
     @fixture_api
     def add_object(self, ghid, obj):
         ''' Add an object to the fixture.
@@ -563,6 +675,13 @@ class Oracle(metaclass=API):
     async def get_object(self, gaoclass, ghid, *args, **kwargs):
         ''' Get an object.
         '''
+        # If we evicted it, but it's still around, don't make a second copy.
+        revived = self._evicted.pop(ghid, None)
+        if revived is not None:
+            logger.debug('GAO ' + str(ghid) + ' revived after eviction.')
+            self._lookup[ghid] = revived
+            del revived
+        
         if ghid in self._lookup:
             # TODO: this is bad, because we're suppresing any potential argsig
             # problems. We should fix the abstraction so that it doesn't break
@@ -586,6 +705,8 @@ class Oracle(metaclass=API):
             await obj._ctx.wait()
             if ghid not in self._lookup:
                 raise RuntimeError('Contentious delete while getting object.')
+            
+            self._touch(ghid, obj)
         
         else:
             logger.info(
@@ -649,6 +770,8 @@ class Oracle(metaclass=API):
                 # Finally, let future callers unblock
                 obj._ctx.set()
             
+            self._touch(ghid, obj)
+        
         return obj
         
     @get_object.fixture
@@ -708,6 +831,7 @@ class Oracle(metaclass=API):
         finalizer = weakref.finalize(obj, self._salmonator._deregister,
                                      obj.ghid)
         finalizer.atexit = False
+        self._touch(obj.ghid, obj)
         
         return obj
             
@@ -746,7 +870,36 @@ class Oracle(metaclass=API):
             del self._lookup[ghid]
         except KeyError:
             logger.debug(str(ghid) + ' unknown to oracle.')
-            
+        
+        self._evicted.pop(ghid, None)
+        
+        try:
+            inquisitor = self._inquisitor
+        except AttributeError:
+            pass
+        else:
+            inquisitor.discard(ghid)
+    
+    def evict(self, ghid):
+        ''' Drop the oracle's reference to the object, so that it can be
+        garbage collected (GAOs are usually part of reference cycles, so
+        this may not happen right away). Until it is actually gone, we
+        keep a weak reference to it, so that anyone still using it keeps
+        getting updates through get_object, and so that we never end up
+        with two copies of the same object.
+        
+        The object's finalizer takes care of deregistering it from
+        upstream updates, once it's collected.
+        '''
+        self._evicted[ghid] = self._lookup.pop(ghid)
+        
+        try:
+            inquisitor = self._inquisitor
+        except AttributeError:
+            pass
+        else:
+            inquisitor.discard(ghid)
+    
     def __contains__(self, ghid):
         ''' Checks for the ghid in cache (but does not check for global
         availability; that would require checking the persister for its
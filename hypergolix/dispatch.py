@@ -41,6 +41,7 @@ import os
 import abc
 import traceback
 import asyncio
+import time
 import loopa
 
 from loopa.utils import make_background_future
@@ -59,6 +60,7 @@ from .utils import WeakSetMap
 from .utils import NoContext
 from .utils import weak_property
 from .utils import immutable_property
+from .codec import register_namedtuple
 
 from .exceptions import DispatchError
 from .exceptions import UnknownToken
@@ -87,10 +89,36 @@ __all__ = [
             
             
 # Identity here can be either a sender or recipient dependent upon context
-_ShareLog = collections.namedtuple(
+_ShareLog = register_namedtuple(collections.namedtuple(
     typename = '_ShareLog',
     field_names = ('ghid', 'identity'),
-)
+))
+
+
+class _ConnectionLatency:
+    ''' Running stats for how long a single connection takes to accept
+    distributions.
+    '''
+    __slots__ = ('count', 'total', 'worst', 'last')
+    
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.worst = 0.0
+        self.last = 0.0
+    
+    def record(self, elapsed):
+        self.count += 1
+        self.total += elapsed
+        self.worst = max(self.worst, elapsed)
+        self.last = elapsed
+    
+    @property
+    def mean(self):
+        if self.count:
+            return self.total / self.count
+        else:
+            return 0.0
 
 
 class Dispatcher(metaclass=API):
@@ -130,12 +158,18 @@ class Dispatcher(metaclass=API):
     _ipc_protocol = weak_property('__ipc_protocol')
     _oracle = weak_property('__oracle')
     
+    # Any single distribution slower than this (in seconds) gets logged.
+    SLOW_DISTRIBUTION = 1.0
+    
     @public_api
     def __init__(self, *args, **kwargs):
         ''' Yup yup yup yup yup yup yup
         '''
         super().__init__(*args, **kwargs)
         
+        # Lookup <connection/session/conn>: _ConnectionLatency
+        self._latency = weakref.WeakKeyDictionary()
+        
         # Temporarily set distributed state to None.
         # Lookup for all known tokens: set(<tokens>)
         self._all_known_tokens = None
@@ -178,6 +212,9 @@ class Dispatcher(metaclass=API):
         '''
         super(Dispatcher.__fixture__, self).__init__(*args, **kwargs)
         
+        # Lookup <connection/session/conn>: _ConnectionLatency
+        self._latency = weakref.WeakKeyDictionary()
+        
         self._all_known_tokens = set()
         # Lookup (dict-like) for <app token>: <startup ghid>
         self._startup_by_token = {}
@@ -210,6 +247,8 @@ class Dispatcher(metaclass=API):
         self._conn_from_token.clear()
         # Reverse lookup <connection/session/conn>: <app token>
         self._token_from_conn.clear()
+        # Lookup <connection/session/conn>: _ConnectionLatency
+        self._latency.clear()
         
     def assemble(self, oracle, ipc_protocol):
         self._oracle = oracle
@@ -250,6 +289,25 @@ class Dispatcher(metaclass=API):
         if AppToken.null() not in self._all_known_tokens:
             self._all_known_tokens.add(AppToken.null())
             
+    @property
+    def latency_stats(self):
+        ''' Distribution latency for every connection we've distributed
+        to, slowest (on average) first, as a list of (connection, stats)
+        tuples.
+        '''
+        stats = [
+            (connection, {
+                'token': self._token_from_conn.get(connection),
+                'count': latency.count,
+                'mean': latency.mean,
+                'worst': latency.worst,
+                'last': latency.last,
+            })
+            for connection, latency in list(self._latency.items())
+        ]
+        stats.sort(key=lambda pair: pair[1]['mean'], reverse=True)
+        return stats
+    
     @public_api
     def token_lookup(self, connection):
         ''' Return the token associated with the connection, or None if
@@ -386,6 +444,19 @@ class Dispatcher(metaclass=API):
         
         return token
     
+    @public_api
+    def has_listeners(self, ghid):
+        ''' Return True if any connection is currently tracking the
+        object.
+        '''
+        return bool(self._update_listeners.get_any(ghid))
+    
+    @has_listeners.fixture
+    def has_listeners(self, ghid):
+        ''' Nobody tracks anything in the fixture.
+        '''
+        return False
+    
     @fixture_noop
     @public_api
     async def track_object(self, connection, ghid):
@@ -630,11 +701,27 @@ class Dispatcher(metaclass=API):
                 ghid
             )
             
-        else:
+        elif callsheet:
+            # Everyone gets the exact same update, so only build it once.
+            try:
+                packed = await self._ipc_protocol.pack_update(ghid)
+            
+            except asyncio.CancelledError:
+                raise
+            
+            except Exception:
+                logger.error(
+                    'Failed to build update for ' + str(ghid) + '; not ' +
+                    'distributing it. Traceback:\n' +
+                    ''.join(traceback.format_exc())
+                )
+                return
+            
             await self._distribute(
                 self._ipc_protocol.update_obj,   # distr_coro
                 callsheet,
-                ghid
+                ghid,
+                packed
             )
             
     @fixture_noop
@@ -695,7 +782,14 @@ class Dispatcher(metaclass=API):
             distributions.add(
                 # ...in parallel, schedule a single execution of the
                 # distribution coroutine.
-                make_background_future(distr_coro(connection, *args, **kwargs))
+                make_background_future(
+                    self._timed_distribution(
+                        distr_coro,
+                        connection,
+                        *args,
+                        **kwargs
+                    )
+                )
             )
             
         # And gather the results, logging (but not raising) any exceptions.
@@ -712,6 +806,32 @@ class Dispatcher(metaclass=API):
                 for distr in distributions:
                     distr.cancel()
                 raise
+    
+    async def _timed_distribution(self, distr_coro, connection, *args,
+                                  **kwargs):
+        ''' Run a single distribution, recording how long it took the
+        connection to get back to us.
+        '''
+        start = time.monotonic()
+        try:
+            return (await distr_coro(connection, *args, **kwargs))
+        
+        finally:
+            elapsed = time.monotonic() - start
+            
+            try:
+                latency = self._latency[connection]
+            except KeyError:
+                latency = _ConnectionLatency()
+                self._latency[connection] = latency
+            latency.record(elapsed)
+            
+            if elapsed > self.SLOW_DISTRIBUTION:
+                logger.warning(
+                    'Slow distribution: CONN ' + str(connection) +
+                    ' (token ' + str(self._token_from_conn.get(connection)) +
+                    ') took ' + '{:.3f}'.format(elapsed) + 's.'
+                )
             
             
 class _Dispatchable(GAOCore, metaclass=API):
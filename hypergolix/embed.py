@@ -62,6 +62,7 @@ from .utils import AppToken
 from .utils import _reap_wrapped_task
 
 from .exceptions import HGXLinkError
+from .exceptions import DeltaMismatch
 
 from .comms import ConnectionManager
 from .comms import WSConnection
@@ -376,6 +377,7 @@ class HGXLink(loopa.TaskCommander, metaclass=TriplicateAPI):
         if _legroom is None:
             _legroom = self._legroom
         
+        packed_state = state
         state = await cls.hgx_unpack(state)
         obj = cls(
             hgxlink = self,
@@ -388,6 +390,7 @@ class HGXLink(loopa.TaskCommander, metaclass=TriplicateAPI):
             binder = author,
             _legroom = _legroom,
         )
+        obj._hgx_ack(packed_state)
             
         # Don't forget to add it to local lookup so we can apply updates.
         self._objs_by_ghid[obj._hgx_ghid] = obj
@@ -425,6 +428,56 @@ class HGXLink(loopa.TaskCommander, metaclass=TriplicateAPI):
                 _legroom = _legroom,
             )
             return new_obj
+    
+    @public_api
+    @triplicated
+    async def get_many(self, cls, ghids):
+        ''' Get many objects as class cls at once. Anything we don't
+        already have is requested from the hypergolix service in a
+        single batch. Returns a list in the same order as ghids, with an
+        exception in place of any object that could not be retrieved.
+        '''
+        ghids = list(ghids)
+        results = [None] * len(ghids)
+        # Lookup <ghid>: [<indices into results>]
+        missing = collections.OrderedDict()
+        
+        for index, ghid in enumerate(ghids):
+            obj = self._objs_by_ghid.get(ghid)
+            if obj is None:
+                missing.setdefault(ghid, []).append(index)
+            elif type(obj) != cls:
+                results[index] = HGXLinkError(
+                    'Cannot attempt to get a new copy of an object using a ' +
+                    'new class. Use obj.recast instead.'
+                )
+            else:
+                results[index] = obj
+        
+        if missing:
+            obj_defs = await self._ipc_manager.get_many_ghid(list(missing))
+            
+            for (ghid, indices), obj_def in zip(missing.items(), obj_defs):
+                if not isinstance(obj_def, Exception):
+                    try:
+                        obj_def = await self.get(cls, ghid, obj_def=obj_def)
+                    
+                    except asyncio.CancelledError:
+                        raise
+                    
+                    except Exception as exc:
+                        obj_def = exc
+                
+                for index in indices:
+                    results[index] = obj_def
+        
+        return results
+    
+    @get_many.fixture
+    async def get_many(self, cls, ghids):
+        ''' Fixture get behavior, once per object.
+        '''
+        return [(await self.get(cls, ghid)) for ghid in ghids]
         
     @triplicated
     async def new(self, cls, state, api_id=None, dynamic=True, private=False,
@@ -460,10 +513,116 @@ class HGXLink(loopa.TaskCommander, metaclass=TriplicateAPI):
         )
         
         obj._hgx_ghid = address
+        obj._hgx_ack(packed_state)
         # Don't forget to add it to local lookup so we can apply updates.
         self._objs_by_ghid[obj._hgx_ghid] = obj
         return obj
     
+    @triplicated
+    async def new_many(self, cls, states, api_id=None, dynamic=True,
+                       private=False, _legroom=None, *args, **kwargs):
+        ''' Create a new object w/ class cls for every state in states,
+        with a single request to the hypergolix service. Returns a list
+        in the same order as states, with an exception in place of any
+        object that could not be created.
+        '''
+        if _legroom is None:
+            _legroom = self._legroom
+        
+        if api_id is None:
+            api_id = cls._hgx_DEFAULT_API
+        
+        objs = []
+        obj_defs = []
+        for state in states:
+            obj = cls(
+                hgxlink = self,
+                ipc_manager = self._ipc_manager,
+                _legroom = _legroom,
+                state = state,
+                api_id = api_id,
+                dynamic = dynamic,
+                private = private,
+                binder = self.whoami,
+                *args, **kwargs
+            )
+            objs.append(obj)
+            obj_defs.append((
+                await obj.hgx_pack(state),
+                api_id,
+                dynamic,
+                private,
+                _legroom
+            ))
+        
+        if not objs:
+            return []
+        
+        addresses = await self._ipc_manager.new_many_ghid(obj_defs)
+        
+        results = []
+        for obj, obj_def, address in zip(objs, obj_defs, addresses):
+            if isinstance(address, Exception):
+                results.append(address)
+            else:
+                obj._hgx_ghid = address
+                obj._hgx_ack(obj_def[0])
+                # Don't forget to add it to local lookup so we can apply
+                # updates.
+                self._objs_by_ghid[obj._hgx_ghid] = obj
+                results.append(obj)
+        
+        return results
+    
+    @triplicated
+    async def update_many(self, objs):
+        ''' Push the current state of every object in objs upstream,
+        with a single request to the hypergolix service. Returns a list
+        in the same order as objs, with True for every successful push,
+        and an exception in place of any failures.
+        '''
+        objs = list(objs)
+        results = [None] * len(objs)
+        # Indices into results for everything we actually send
+        pending = []
+        updates = []
+        
+        for index, obj in enumerate(objs):
+            try:
+                updates.append(await obj._hgx_pack_push())
+            
+            except asyncio.CancelledError:
+                raise
+            
+            except Exception as exc:
+                results[index] = exc
+            
+            else:
+                pending.append(index)
+        
+        if updates:
+            pushed = await self._ipc_manager.update_many_ghid(updates)
+            
+            # Anything that hypergolix couldn't apply as a delta gets resent
+            # in full (without the base).
+            stale = [
+                position for position, result in enumerate(pushed)
+                if isinstance(result, DeltaMismatch)
+            ]
+            if stale:
+                repushed = await self._ipc_manager.update_many_ghid(
+                    [updates[position][:4] for position in stale]
+                )
+                for position, result in zip(stale, repushed):
+                    pushed[position] = result
+            
+            for index, update, result in zip(pending, updates, pushed):
+                if result is True:
+                    objs[index]._hgx_ack(update[1])
+                results[index] = result
+        
+        return results
+    
     @triplicated
     async def register_nonlocal_handler(self, api_id, handler):
         ''' Call this to register a handler for any private objects
@@ -630,8 +789,9 @@ class HGXLink(loopa.TaskCommander, metaclass=TriplicateAPI):
             return wrapped_handler
         
     @public_api
-    async def _pull_state(self, ghid, state):
-        ''' Applies an incoming state update.
+    async def _pull_state(self, ghid, state, delta=False):
+        ''' Applies an incoming state update. If delta is True, state
+        is a delta against the last version of the object we had.
         '''
         if isinstance(state, Ghid):
             raise NotImplementedError('Linked objects not yet supported.')
@@ -653,10 +813,10 @@ class HGXLink(loopa.TaskCommander, metaclass=TriplicateAPI):
             logger.debug(
                 'Received update for ' + str(ghid) + '; forcing pull.'
             )
-            await obj._hgx_force_pull(state)
+            await obj._hgx_force_pull(state, delta=delta)
             
     @_pull_state.fixture
-    async def _pull_state(self, ghid, state):
+    async def _pull_state(self, ghid, state, delta=False):
         ''' Fixture for applying incoming state update.
         '''
         self.state_lookup[ghid] = state
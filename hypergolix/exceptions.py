@@ -56,6 +56,7 @@ __all__ = [
     'Inaccessible',
     'UnknownParty',
     'UnrecoverableState',
+    'ProxyDepthExceeded',
     # These are dispatch errors
     'DispatchError',
     'ExistantAppError',
@@ -226,6 +227,13 @@ class UnrecoverableState(HypergolixException, RuntimeError):
     pass
 
 
+class ProxyDepthExceeded(HypergolixException, RuntimeError):
+    ''' Raised when resolving a ghid takes too many binding hops to get
+    to its container (for example, because the bindings form a loop).
+    '''
+    pass
+
+
 class HandshakeWarning(HypergolixException, RuntimeWarning):
     ''' Raised when handshakes use an unknown app_id, but are otherwise
     legit.
@@ -293,6 +301,13 @@ class Unsharable(IPCError, TypeError):
     pass
     
     
+class DeltaMismatch(IPCError, ValueError):
+    ''' Raised when a state delta was made against a different version
+    of the object than the one we have. Resend the whole state instead.
+    '''
+    pass
+
+
 class CommsError(HypergolixException, RuntimeError):
     ''' Raised when something goes wrong with IPC (bad commands, etc).
     '''
@@ -39,6 +39,8 @@ import collections
 import functools
 import weakref
 import pickle
+import hashlib
+import itertools
 # Used to make random ghids for fixturing gao
 import random
 
@@ -63,6 +65,8 @@ from .utils import readonly_property
 from .utils import immortal_property
 from .utils import immutable_property
 
+from . import codec
+
 from .exceptions import HGXLinkError
 from .exceptions import DeadObject
 from .exceptions import RatchetError
@@ -124,8 +128,9 @@ class Accountable(API):
         every pull (like a rebase)
     +   That last one is probably the smartest way to do it
     
-    TODO: support this. Currently, it's just one big race condition
-    waiting for contention problems.
+    That last one is what we do. Mutating proxies record a replayable
+    op for every call (see _resolve_op in the mixins), which the delta
+    GAOs then push as a delta frame and rebase on top of every pull.
     '''
     
     def __new__(mcls, clsname, bases, namespace, *args, **kwargs):
@@ -154,7 +159,9 @@ class Accountable(API):
                 async def prox(self, *args, __proxname=name, **kwargs):
                     self._mutated = True
                     proxied = getattr(self.state, __proxname)
-                    return (await proxied(*args, **kwargs))
+                    result = await proxied(*args, **kwargs)
+                    self._record_op(__proxname, args, result)
+                    return result
                 
                 prox.__name__ = name
                 new_namespace[name] = prox
@@ -163,7 +170,9 @@ class Accountable(API):
                 def prox(self, *args, __proxname=name, **kwargs):
                     self._mutated = True
                     proxied = getattr(self.state, __proxname)
-                    return proxied(*args, **kwargs)
+                    result = proxied(*args, **kwargs)
+                    self._record_op(__proxname, args, result)
+                    return result
                         
                 prox.__name__ = name
                 new_namespace[name] = prox
@@ -190,8 +199,21 @@ class Accountable(API):
             else:
                 return
                 
+        _push.__accountable__ = True
         cls._mutated = False
-        cls._push = _push
+        
+        # Don't wrap twice when subclassing an accountable GAO, or the outer
+        # wrapper will clear _mutated before the inner one checks it.
+        if not getattr(getattr(cls, '_push', None), '__accountable__', False):
+            cls._push = _push
+        
+        # Let anything that schedules pushes (ex: Account.flush) skip clean
+        # objects, without clobbering a more specific definition.
+        if not hasattr(cls, 'dirty'):
+            cls.dirty = property(
+                lambda self: self._mutated or self.ghid is None,
+                doc = 'True if the next push() would actually push.'
+            )
         
         return cls
 
@@ -275,6 +297,9 @@ class GAOCore(metaclass=API):
     # Default a few things to prevent attributeerrors
     _legroom = None
     _target_history = tuple()
+    # The container ghid of the frame our state was last loaded from (or
+    # pushed as). Used by delta GAOs to find the base for the next frame.
+    _frame_ghid = None
     
     # Make weak properties for the various thingajobbers
     _golcore = weak_property('__golcore')
@@ -609,6 +634,7 @@ class GAOCore(metaclass=API):
         # I mean, for static stuff this isn't (strictly speaking) relevant,
         # but it also doesn't really hurt anything, sooo...
         self.target_history.appendleft(container.ghid)
+        self._frame_ghid = container.ghid
         self._counter = counter
         
         # Do this last!
@@ -700,7 +726,7 @@ class GAOCore(metaclass=API):
         # Okay, if this is calling _pull from oracle._get_object, we may be
         # going for either a dynamic binding or a static object (container).
         if isinstance(binding, _GobdLite):
-            self._recover_target_secret(binding)
+            await self._recover_target_secret(binding)
             
             target_vector = binding.target_vector
             dynamic = True
@@ -769,6 +795,7 @@ class GAOCore(metaclass=API):
             
             # On the first success, stop looking for a failback container.
             else:
+                self._frame_ghid = target_ghid
                 break
                 
         # Hitting this means we failed to find a valid state. We need to raise.
@@ -776,7 +803,7 @@ class GAOCore(metaclass=API):
             raise UnrecoverableState('No valid state found for ' +
                                      str(self.ghid))
         
-    def _recover_target_secret(self, binding):
+    async def _recover_target_secret(self, binding):
         ''' For the passed binding, ratchet the secret chain (if
         possible), staging all intermediate secrets in the process. If
         the ratchet is broken and the secret also missing, raise.
@@ -788,7 +815,7 @@ class GAOCore(metaclass=API):
             # Recover the new secret for the chain.
             logger.debug('Healing ratchet for ' + str(self.ghid) + ' frame ' +
                          str(binding.counter) + '...')
-            self._privateer.heal_chain(
+            await self._privateer.heal(
                 proxy = self.ghid,
                 target_vector = self._maximize_target_vector(binding),
                 master_secret = self._master_secret
@@ -1055,6 +1082,352 @@ class _GAOPickleBase(GAOCore):
     __eq__ = GAO.__eq__
             
             
+class _GAODeltaBase(_GAOPickleBase):
+    ''' GAO that pushes an op log instead of the whole state. Each
+    frame is either a full snapshot of the state or a delta frame
+    holding the ops applied on top of its base frame.
+    
+    Frames are written with the compact binary codec when possible,
+    and pickled otherwise. Plain pickles (as _GAOPickleBase would write
+    them) are still read, since older frames use them.
+    
+    We keep a copy of the upstream state (as of self._frame_ghid) next
+    to the local one, so that pending local ops can be rebased on top
+    of whatever we pull.
+    
+    Since the dynamic binding only binds the head frame, every base
+    frame in the chain is kept alive with a static binding (a "hold"),
+    made before the delta on top of it is pushed. Each delta frame
+    records its hold, and all of them are debound once the next
+    snapshot lands, so that the undertaker can collect the old chain.
+    
+    Mixins must define _copy_state and _resolve_op.
+    '''
+    DELTA_MAGIC = b'hgxdelta'
+    # Maximum number of delta frames between snapshots. This is further
+    # limited by our history; see _max_chain.
+    SNAPSHOT_INTERVAL = 16
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Ops applied locally but not yet pushed
+        self._ops = []
+        # The state as of self._frame_ghid, and how many deltas deep it is
+        self._upstream = None
+        self._chain = 0
+        # (ops, snapshot) for the frame currently being pushed
+        self._inflight = None
+        # Ghids of the static bindings holding our current chain's bases,
+        # and of the one made for the frame currently being pushed
+        self._holds = []
+        self._next_hold = None
+    
+    def _record_op(self, name, args, result):
+        ''' Called by the Accountable proxies after every mutating call.
+        '''
+        op = self._resolve_op(name, args, result)
+        if op is not None:
+            self._ops.append(op)
+    
+    @staticmethod
+    def _apply_ops(state, ops):
+        ''' Replays ops onto state, in place. Ops are resolved into
+        idempotent forms, so this should only fail for garbage ops. If
+        it does, state is left partially updated, and we raise
+        UnrecoverableState so that the caller can discard it.
+        '''
+        for name, args in ops:
+            try:
+                getattr(state, name)(*args)
+            
+            except Exception as exc:
+                raise UnrecoverableState(
+                    'Failed to replay GAO op ' + str(name)
+                ) from exc
+    
+    def _max_chain(self):
+        ''' The longest delta chain we're allowed to build. Every base
+        frame must stay in the target vector, and not as its oldest
+        entry either: heal_chain cannot recover that secret for master
+        secret ratchets.
+        '''
+        return min(self.SNAPSHOT_INTERVAL, len(self.target_history) - 1)
+    
+    def _snapshot_due(self, ops):
+        ''' Decide whether the next frame needs to be a full snapshot.
+        '''
+        return (
+            not self.dynamic or
+            self._upstream is None or
+            self._frame_ghid is None or
+            # If we failed back to a stale frame, the head is not our base
+            not self.target_history or
+            self.target_history[0] != self._frame_ghid or
+            self._chain >= self._max_chain() or
+            # At this point a snapshot is just as small
+            len(ops) >= len(self._state)
+        )
+    
+    async def _push(self):
+        ''' Wrap the push so that the op log is only advanced once the
+        frame has actually been committed.
+        
+        Whether to push a delta is decided here, since the base needs
+        to be held before the binding moves past it; otherwise the
+        undertaker could collect it in between.
+        '''
+        base = self._frame_ghid
+        if self._snapshot_due(self._ops):
+            hold = None
+        else:
+            hold = await self._hold_frame(base)
+        
+        self._next_hold = hold
+        try:
+            await super()._push()
+        
+        finally:
+            self._next_hold = None
+            released = []
+            
+            if self._inflight is not None:
+                ops, snapshot = self._inflight
+                self._inflight = None
+                
+                # The frame was committed, so advance the upstream state.
+                # Note that ghids cannot be compared against None.
+                if self._frame_ghid is not base:
+                    if snapshot is None:
+                        self._holds.append(hold)
+                        hold = None
+                        self._advance_upstream(ops)
+                    
+                    # Nothing depends on the old chain anymore.
+                    else:
+                        self._upstream = snapshot
+                        self._chain = 0
+                        released = self._holds
+                        self._holds = []
+                
+                # The frame never made it, so put the ops back in front of
+                # anything that was mutated in the meantime.
+                else:
+                    self._ops[:0] = ops
+                    self._mutated = True
+            
+            # An unused hold is just as dead as a released one.
+            if hold is not None:
+                released.append(hold)
+            
+            await self._release_holds(released)
+    
+    async def _hold_frame(self, frame_ghid):
+        ''' Statically bind the frame, so that it outlives the dynamic
+        binding moving past it. Returns the ghid of the binding.
+        '''
+        binding = await self._golcore.make_binding_stat(frame_ghid)
+        await self._percore.direct_ingest(
+            obj = _GobsLite.from_golix(binding),
+            packed = binding.packed,
+            remotable = True
+        )
+        return binding.ghid
+    
+    async def _release_holds(self, holds):
+        ''' Debind holds we no longer need. This is just GC, so don't
+        let failures propagate; worst case, the frames stick around.
+        '''
+        for hold in holds:
+            try:
+                debinding = await self._golcore.make_debinding(hold)
+                await self._percore.direct_ingest(
+                    obj = _GdxxLite.from_golix(debinding),
+                    packed = debinding.packed,
+                    remotable = True
+                )
+            
+            except Exception:
+                logger.warning(
+                    'Failed to release hold ' + str(hold) + ' for ' +
+                    str(self.ghid) + ' w/ traceback:\n' +
+                    ''.join(traceback.format_exc())
+                )
+    
+    async def delete(self):
+        ''' Also release the holds on our delta chain.
+        '''
+        await super().delete()
+        holds = self._holds
+        self._holds = []
+        await self._release_holds(holds)
+    
+    def _advance_upstream(self, ops):
+        ''' Apply the ops from a committed delta frame to our copy of
+        the upstream state. If they don't replay, the copy can't be
+        trusted anymore, so drop it: that forces the next push to be a
+        snapshot, and the next pull to rebuild from the frames.
+        '''
+        try:
+            self._apply_ops(self._upstream, ops)
+        
+        except UnrecoverableState:
+            logger.error(
+                'Failed to advance upstream state for ' + str(self.ghid) +
+                '; discarding it w/ traceback:\n' +
+                ''.join(traceback.format_exc())
+            )
+            self._upstream = None
+            self._chain = 0
+        
+        else:
+            self._chain += 1
+    
+    async def pack_gao(self):
+        ''' Pack either a snapshot or a delta frame, depending on
+        whether _push decided to hold our current frame.
+        '''
+        ops = self._ops
+        
+        if self._next_hold is None:
+            packed = self._encode(self._state)
+            self._inflight = (ops, self._copy_state(self._state))
+        
+        else:
+            packed = self._encode((
+                self.DELTA_MAGIC,
+                bytes(self._frame_ghid),
+                ops,
+                bytes(self._next_hold)
+            ))
+            self._inflight = (ops, None)
+        
+        self._ops = []
+        return packed
+    
+    @staticmethod
+    def _encode(frame):
+        ''' Encode the frame with the codec, falling back to pickle if
+        it contains anything the codec doesn't support.
+        '''
+        try:
+            return codec.dumps(frame)
+        
+        except TypeError:
+            logger.debug(
+                'GAO frame unsupported by codec; falling back to pickle.'
+            )
+        
+        try:
+            return pickle.dumps(frame, protocol=4)
+        
+        except Exception:
+            logger.error(
+                'Failed to pickle the GAO w/ traceback: \n' +
+                ''.join(traceback.format_exc())
+            )
+            raise
+    
+    @staticmethod
+    def _decode(packed):
+        ''' Inverse of _encode.
+        '''
+        try:
+            if codec.is_encoded(packed):
+                return codec.loads(packed)
+            else:
+                return pickle.loads(packed)
+        
+        except Exception:
+            logger.error(
+                'Failed to decode the GAO w/ traceback: \n' +
+                ''.join(traceback.format_exc())
+            )
+            raise
+    
+    async def unpack_gao(self, packed):
+        ''' Rebuild the upstream state from the frame, and then rebase
+        any pending local ops on top of it.
+        '''
+        try:
+            upstream, chain, holds = await self._decode_frame(packed)
+        
+        # Our copy of the base frame might be what's broken, so walk the
+        # chain back to its snapshot instead. If that fails too, the frame
+        # is garbage, and the caller needs to fail back to an older one.
+        except UnrecoverableState:
+            if self._upstream is None:
+                raise
+            
+            logger.warning(
+                'Failed to apply delta frame for ' + str(self.ghid) +
+                '; rebuilding from the snapshot w/ traceback:\n' +
+                ''.join(traceback.format_exc())
+            )
+            self._upstream = None
+            upstream, chain, holds = await self._decode_frame(packed)
+        
+        self._upstream = upstream
+        self._chain = chain
+        self._holds = holds
+        
+        rebased = self._copy_state(upstream)
+        try:
+            self._apply_ops(rebased, self._ops)
+        
+        # Upstream is good, but our pending ops aren't, so they're lost.
+        except UnrecoverableState:
+            logger.error(
+                'Failed to rebase local ops for ' + str(self.ghid) +
+                '; discarding them w/ traceback:\n' +
+                ''.join(traceback.format_exc())
+            )
+            self._ops = []
+            rebased = self._copy_state(upstream)
+        
+        self.state = rebased
+    
+    async def _decode_frame(self, packed, depth=0):
+        ''' Returns a fresh copy of the state described by the frame,
+        along with its depth in the delta chain and the holds on its
+        base frames.
+        '''
+        frame = self._decode(packed)
+        
+        if (isinstance(frame, tuple) and len(frame) == 4 and
+                frame[0] == self.DELTA_MAGIC):
+            __, base, ops, hold = frame
+            state, chain, holds = await self._recover_base(
+                Ghid.from_bytes(base),
+                depth
+            )
+            self._apply_ops(state, ops)
+            return state, chain + 1, holds + [Ghid.from_bytes(hold)]
+        
+        # Snapshot frame (which includes every frame from before deltas).
+        else:
+            return frame, 0, []
+    
+    async def _recover_base(self, base, depth):
+        ''' Get a fresh copy of the state at the base frame. Usually we
+        already have it; otherwise, walk down the chain.
+        '''
+        if self._upstream is not None and base == self._frame_ghid:
+            return (
+                self._copy_state(self._upstream),
+                self._chain,
+                list(self._holds)
+            )
+        
+        elif depth >= self.SNAPSHOT_INTERVAL:
+            raise UnrecoverableState(
+                'Delta chain too long for ' + str(self.ghid)
+            )
+        
+        else:
+            packed = await self._recover_container(base)
+            return (await self._decode_frame(packed, depth + 1))
+
+
 class _DictMixin(metaclass=Accountable):
     ''' A golix-aware dictionary.
     '''
@@ -1103,8 +1476,35 @@ class _DictMixin(metaclass=Accountable):
     popitem = MUTATING_PROXY_FUNC
     # Note: this is lazy; what if empty?
     clear = MUTATING_PROXY_FUNC
-    # Note: this is lazy; what if nothing changes?
-    update = MUTATING_PROXY_FUNC
+    
+    def update(self, *args, **kwargs):
+        ''' Not a straight proxy, because we need to record the update
+        before a generator argument gets consumed.
+        '''
+        delta = dict(*args, **kwargs)
+        self._mutated = True
+        self._state.update(delta)
+        self._record_op('update', (delta,), None)
+    
+    @staticmethod
+    def _copy_state(state):
+        ''' Shallow copy of a dict state.
+        '''
+        return dict(state)
+    
+    @staticmethod
+    def _resolve_op(name, args, result):
+        ''' Convert a mutating call into an op that can be replayed
+        onto a different state without raising.
+        '''
+        if name in {'__delitem__', 'pop'}:
+            return ('pop', (args[0], None))
+        
+        elif name == 'popitem':
+            return ('pop', (result[0], None))
+        
+        else:
+            return (name, args)
         
     # def __len__(self):
     #     # Straight pass-through
@@ -1170,7 +1570,7 @@ class _DictMixin(metaclass=Accountable):
     #     return self._state.update(*args, **kwargs)
     
     
-class GAODict(_GAOPickleBase, _DictMixin):
+class GAODict(_GAODeltaBase, _DictMixin):
     ''' Combine GAO dicts with pickle serialization.
     '''
     pass
@@ -1220,8 +1620,35 @@ class _SetMixin(metaclass=Accountable):
     isdisjoint = PROXY_FUNC
     issubset = PROXY_FUNC
     issuperset = PROXY_FUNC
-    # Note: this is lazy; what if nothing changes?
-    update = MUTATING_PROXY_FUNC
+    
+    def update(self, *others):
+        ''' Not a straight proxy, because we need to record the update
+        before a generator argument gets consumed.
+        '''
+        delta = set().union(*others)
+        self._mutated = True
+        self._state.update(delta)
+        self._record_op('update', (delta,), None)
+    
+    @staticmethod
+    def _copy_state(state):
+        ''' Shallow copy of a set state.
+        '''
+        return set(state)
+    
+    @staticmethod
+    def _resolve_op(name, args, result):
+        ''' Convert a mutating call into an op that can be replayed
+        onto a different state without raising.
+        '''
+        if name == 'remove':
+            return ('discard', args)
+        
+        elif name == 'pop':
+            return ('discard', (result,))
+        
+        else:
+            return (name, args)
     
     # @property
     # def state(self):
@@ -1289,7 +1716,7 @@ class _SetMixin(metaclass=Accountable):
     #     return self._state.issuperset(other)
             
             
-class GAOSet(_GAOPickleBase, _SetMixin):
+class GAOSet(_GAODeltaBase, _SetMixin):
     ''' Combine GAO sets with pickle serialization.
     '''
     pass
@@ -1331,10 +1758,6 @@ class _SetMapMixin(metaclass=Accountable):
     contains_within = PROXY_FUNC
     # Note: this is lazy; what if nothing changes?
     add = MUTATING_PROXY_FUNC
-    # Note: this is lazy; what if nothing changes?
-    update = MUTATING_PROXY_FUNC
-    # Note: this is lazy; what if nothing changes?
-    update_all = MUTATING_PROXY_FUNC
     remove = MUTATING_PROXY_FUNC
     # Note: this is lazy; what if nothing changes?
     discard = MUTATING_PROXY_FUNC
@@ -1345,6 +1768,43 @@ class _SetMapMixin(metaclass=Accountable):
     # Note: this is lazy; what if nothing changes?
     clear_all = MUTATING_PROXY_FUNC
     combine = PROXY_FUNC
+    
+    def update(self, key, value):
+        ''' Not a straight proxy, because we need to record the update
+        before a generator argument gets consumed.
+        '''
+        delta = frozenset(value)
+        self._mutated = True
+        self._state.update(key, delta)
+        self._record_op('update', (key, delta), None)
+    
+    def update_all(self, other):
+        ''' Same as update, but for every key in other.
+        '''
+        delta = {key: frozenset(other[key]) for key in other}
+        self._mutated = True
+        self._state.update_all(delta)
+        self._record_op('update_all', (delta,), None)
+    
+    @staticmethod
+    def _copy_state(state):
+        ''' Copy of a setmap state, including its inner sets.
+        '''
+        return state.combine(SetMap())
+    
+    @staticmethod
+    def _resolve_op(name, args, result):
+        ''' Convert a mutating call into an op that can be replayed
+        onto a different state without raising.
+        '''
+        if name == 'remove':
+            return ('discard', args)
+        
+        elif name in {'pop_any', 'clear'}:
+            return ('clear_any', args)
+        
+        else:
+            return (name, args)
             
     # def __contains__(self, key):
     #     with self._statelock:
@@ -1451,7 +1911,557 @@ class _SetMapMixin(metaclass=Accountable):
     #         self.push()
             
             
-class GAOSetMap(_GAOPickleBase, _SetMapMixin):
+class GAOSetMap(_GAODeltaBase, _SetMapMixin):
     ''' Combine GAO setmaps with pickle serialization.
     '''
     pass
+
+
+class _DirectoryMixin(metaclass=Accountable):
+    ''' Dict state for a shard directory. Unlike _DictMixin, this does
+    not expose the dict interface, since the sharded GAOs need to use
+    those names for their own.
+    '''
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._state = {}
+    
+    @property
+    def state(self):
+        ''' Pass through to self._state
+        '''
+        return self._state
+    
+    @state.setter
+    def state(self, value):
+        ''' Preserve the actual dictionary object, instead of just
+        replacing it.
+        '''
+        self._state.clear()
+        self._state.update(value)
+    
+    _copy_state = staticmethod(_DictMixin._copy_state)
+    _resolve_op = staticmethod(_DictMixin._resolve_op)
+
+
+class _ShardedGAOBase(_GAODeltaBase, _DirectoryMixin):
+    ''' A hash trie of child GAOs (leaves), keyed by a prefix of the
+    hash of each key, behind the same interface as the flat GAO. The
+    state of the sharded GAO itself is just the directory, mapping each
+    leaf prefix to the (ghid, master secret) of the leaf.
+    
+    Since leaves are dynamic, updating one doesn't change its ghid, so
+    a mutation only pushes the affected leaf. The directory is only
+    pushed when a leaf is created or split.
+    
+    Subclasses must define LEAF_CLASS, _empty, _CLEAR_OP, _MIGRATE_OP,
+    _keys_of and _substate, and implement the actual container
+    interface.
+    '''
+    # Split any leaf with more entries than this during the next push
+    LEAF_CAPACITY = 2048
+    # Everything else in the directory is a leaf prefix (a hex str)
+    _VERSION_KEY = None
+    DIRECTORY_VERSION = 1
+    _NIBBLES = '0123456789abcdef'
+    # Number of nibbles in a key path.
+    PATH_LEN = 16
+    
+    def __init__(self, *args, inject_leaf=None, **kwargs):
+        ''' inject_leaf, if defined, is awaited with every leaf as it
+        comes into existence (for example, to register it with the
+        salmonator and oracle, so it gets updates).
+        '''
+        super().__init__(*args, **kwargs)
+        self._state[self._VERSION_KEY] = self.DIRECTORY_VERSION
+        # Lookup: <leaf prefix>: <leaf gao>
+        self._leaves = {}
+        # Flat content loaded from before we were sharded, to be migrated.
+        self._legacy = None
+        self._inject_leaf = inject_leaf
+        self._shard_lock = asyncio.Lock()
+    
+    @classmethod
+    def _shard_path(cls, key):
+        ''' Get the hex path for the key within the trie. Ghids (and
+        ApiIDs) are already hashes, so use the address directly.
+        Everything else is hashed from its codec encoding, which is
+        tagged with the type (so an AppToken doesn't land on the same
+        path as the equivalent bytes) and, unlike a pickle, stable
+        across python versions. Frozensets are the only hashable type
+        the codec supports without a canonical order, so refuse them.
+        Like anything else the codec can't encode, they raise TypeError.
+        '''
+        if isinstance(key, Ghid):
+            digest = key.address
+        
+        elif isinstance(key, frozenset):
+            raise TypeError('Frozensets cannot be used as sharded keys.')
+        
+        else:
+            digest = hashlib.sha512(codec.dumps(key)).digest()
+        
+        return digest[:cls.PATH_LEN // 2].hex()
+    
+    def _prefix_for(self, key):
+        ''' Get the prefix of the leaf responsible for the key. Since
+        the leaf prefixes are prefix-free and cover the whole trie,
+        there is exactly one.
+        '''
+        path = self._shard_path(key)
+        for depth in range(len(path) + 1):
+            if path[:depth] in self._leaves:
+                return path[:depth]
+        
+        raise KeyError(key)
+    
+    def _find_leaf(self, key):
+        ''' Get the leaf for the key, for reading or removing. If we
+        don't have any leaves yet, return an empty container instead.
+        '''
+        if self._leaves:
+            return self._leaves[self._prefix_for(key)]
+        else:
+            return self._empty()
+    
+    def _leaf_for(self, key):
+        ''' Get the leaf for the key, for adding. If we don't have any
+        leaves yet, create the root leaf (it will be pushed later).
+        '''
+        if not self._leaves:
+            self._leaves[''] = self._make_leaf()
+        
+        return self._leaves[self._prefix_for(key)]
+    
+    def _grouped(self, keys):
+        ''' Group keys by leaf, creating the root leaf if needed.
+        Returns a list of (leaf, keys) tuples.
+        '''
+        groups = {}
+        for key in keys:
+            self._leaf_for(key)
+            groups.setdefault(self._prefix_for(key), []).append(key)
+        
+        return [
+            (self._leaves[prefix], group) for prefix, group in groups.items()
+        ]
+    
+    def _make_leaf(self, ghid=None, master_secret=None):
+        ''' Create a leaf GAO, either for an existing ghid or a new one.
+        '''
+        if master_secret is None:
+            master_secret = self._privateer.new_secret()
+        
+        return self.LEAF_CLASS(
+            ghid,
+            True,
+            None,
+            self.legroom,
+            golcore = self._golcore,
+            ghidproxy = self._ghidproxy,
+            privateer = self._privateer,
+            percore = self._percore,
+            librarian = self._librarian,
+            master_secret = master_secret
+        )
+    
+    async def _register_leaf(self, leaf):
+        ''' Pass the leaf to inject_leaf, if we have one.
+        '''
+        if self._inject_leaf is not None:
+            await self._inject_leaf(leaf)
+    
+    def _set_entry(self, prefix, leaf):
+        ''' Add the leaf to the directory (as a recorded op, so that
+        the directory itself is pushed as a delta).
+        '''
+        entry = (leaf.ghid, leaf._master_secret)
+        self._mutated = True
+        self._state[prefix] = entry
+        self._record_op('__setitem__', (prefix, entry), None)
+    
+    def _drop_entry(self, prefix):
+        ''' Remove the leaf from the directory.
+        '''
+        self._mutated = True
+        self._state.pop(prefix, None)
+        self._record_op('pop', (prefix,), None)
+    
+    @property
+    def leaves(self):
+        ''' Read-only view of all current leaves.
+        '''
+        return tuple(self._leaves.values())
+    
+    @property
+    def dirty(self):
+        ''' True if the directory or any of the leaves need a push.
+        '''
+        if self._mutated or self.ghid is None or self._legacy is not None:
+            return True
+        
+        return any(
+            leaf.ghid is None or leaf._mutated or
+            len(leaf) > self.LEAF_CAPACITY
+            for leaf in self._leaves.values()
+        )
+    
+    def _split(self, prefix):
+        ''' Replace the leaf at prefix with one child per nibble, moving
+        its content into them. Returns the retired leaf.
+        '''
+        leaf = self._leaves.pop(prefix)
+        groups = {prefix + nibble: [] for nibble in self._NIBBLES}
+        for key in self._keys_of(leaf.state):
+            child = self._shard_path(key)[:len(prefix) + 1]
+            groups[child].append(key)
+        
+        for child, keys in groups.items():
+            new_leaf = self._make_leaf()
+            new_leaf.state = self._substate(leaf.state, keys)
+            self._leaves[child] = new_leaf
+        
+        return leaf
+    
+    async def push(self):
+        ''' Push all leaves that need it (splitting any that have gotten
+        too big), and then the directory (if it changed).
+        
+        Note that the directory push happens outside of the shard lock,
+        since pulling takes the update lock before the shard lock.
+        '''
+        async with self._shard_lock:
+            retired = {}
+            oversized = [
+                prefix for prefix, leaf in self._leaves.items()
+                if len(leaf) > self.LEAF_CAPACITY
+            ]
+            # Keep splitting until everything fits (or we run out of path).
+            while oversized:
+                prefix = oversized.pop()
+                retired[prefix] = self._split(prefix)
+                oversized.extend(
+                    prefix + nibble for nibble in self._NIBBLES
+                    if len(self._leaves[prefix + nibble]) > self.LEAF_CAPACITY
+                    and len(prefix) + 1 < self.PATH_LEN
+                )
+            
+            for prefix, leaf in list(self._leaves.items()):
+                # New leaf. Because of the master secret, these need to be
+                # pushed twice, or the first frame will be unrecoverable.
+                if leaf.ghid is None:
+                    await leaf._push(force=True)
+                    await leaf._push(force=True)
+                    await self._register_leaf(leaf)
+                    self._set_entry(prefix, leaf)
+                
+                elif leaf._mutated:
+                    await leaf.push()
+            
+            for prefix in retired:
+                if prefix in self._state:
+                    self._drop_entry(prefix)
+        
+        await super().push()
+        
+        # Only delete the retired leaves once the directory no longer points
+        # at them.
+        for leaf in retired.values():
+            if leaf.ghid is not None:
+                await leaf.delete()
+    
+    async def _pull(self):
+        ''' Pull the directory, and then bring our leaves into line.
+        '''
+        await super()._pull()
+        async with self._shard_lock:
+            await self._sync_leaves()
+    
+    async def _decode_frame(self, packed, depth=0):
+        ''' Convert anything from before we were sharded into an empty
+        directory, and stash its content for migration.
+        
+        Legacy containers can have delta frames too, so base frames are
+        decoded exactly as the flat GAO would, and only the head of the
+        chain is converted.
+        '''
+        state, chain, holds = await super()._decode_frame(packed, depth)
+        
+        if depth > 0:
+            return state, chain, holds
+        
+        elif isinstance(state, dict) and self._VERSION_KEY in state:
+            return state, chain, holds
+        
+        # Never build a directory delta on top of a legacy frame, since it
+        # couldn't be decoded back into a directory: force a snapshot (which
+        # also releases the legacy chain's holds).
+        else:
+            self._legacy = state
+            return (
+                {self._VERSION_KEY: self.DIRECTORY_VERSION},
+                self.SNAPSHOT_INTERVAL,
+                holds
+            )
+    
+    async def _sync_leaves(self):
+        ''' Load any leaves from the directory we don't have yet, and
+        rebase any pending ops from leaves that have been replaced.
+        '''
+        leaves = {}
+        for prefix, entry in self._state.items():
+            if prefix is self._VERSION_KEY:
+                continue
+            
+            ghid, master_secret = entry
+            leaf = self._leaves.get(prefix)
+            # Ghids cannot be compared against None (unpushed leaves).
+            if leaf is None or leaf.ghid is None or leaf.ghid != ghid:
+                leaf = self._make_leaf(ghid, master_secret)
+                await self._register_leaf(leaf)
+                await leaf._pull()
+            
+            leaves[prefix] = leaf
+        
+        stale = {
+            prefix: leaf for prefix, leaf in self._leaves.items()
+            if leaves.get(prefix) is not leaf
+        }
+        self._leaves = leaves
+        
+        for prefix, leaf in stale.items():
+            self._reroute(prefix, leaf._ops)
+        
+        if self._legacy is not None:
+            legacy = self._legacy
+            self._legacy = None
+            self._migrate(legacy)
+    
+    def _reroute(self, prefix, ops):
+        ''' Replay pending ops from a replaced leaf onto the current
+        ones. Clears only apply to the part of the trie the old leaf
+        was responsible for.
+        '''
+        for name, args in ops:
+            if name == self._CLEAR_OP:
+                for child, leaf in self._leaves.items():
+                    if child.startswith(prefix):
+                        getattr(leaf, name)(*args)
+            
+            else:
+                getattr(self, name)(*args)
+    
+    def _migrate(self, legacy):
+        ''' Load content from an unsharded frame.
+        '''
+        getattr(self, self._MIGRATE_OP)(legacy)
+
+
+class ShardedGAODict(_ShardedGAOBase):
+    ''' GAODict, sharded across GAODict leaves.
+    '''
+    LEAF_CLASS = GAODict
+    _empty = dict
+    _CLEAR_OP = 'clear'
+    _MIGRATE_OP = 'update'
+    
+    @staticmethod
+    def _keys_of(state):
+        return list(state)
+    
+    @staticmethod
+    def _substate(state, keys):
+        return {key: state[key] for key in keys}
+    
+    def __len__(self):
+        return sum(len(leaf) for leaf in self._leaves.values())
+    
+    def __iter__(self):
+        return itertools.chain.from_iterable(self._leaves.values())
+    
+    def __contains__(self, key):
+        return key in self._find_leaf(key)
+    
+    def __getitem__(self, key):
+        return self._find_leaf(key)[key]
+    
+    def __setitem__(self, key, value):
+        self._leaf_for(key)[key] = value
+    
+    def __delitem__(self, key):
+        del self._find_leaf(key)[key]
+    
+    def pop(self, key, *args):
+        return self._find_leaf(key).pop(key, *args)
+    
+    def items(self):
+        return itertools.chain.from_iterable(
+            leaf.items() for leaf in self._leaves.values()
+        )
+    
+    def keys(self):
+        return iter(self)
+    
+    def values(self):
+        return itertools.chain.from_iterable(
+            leaf.values() for leaf in self._leaves.values()
+        )
+    
+    def setdefault(self, key, default=None):
+        return self._leaf_for(key).setdefault(key, default)
+    
+    def get(self, key, default=None):
+        return self._find_leaf(key).get(key, default)
+    
+    def popitem(self):
+        for leaf in self._leaves.values():
+            if len(leaf):
+                return leaf.popitem()
+        
+        raise KeyError('popitem(): dictionary is empty')
+    
+    def clear(self):
+        for leaf in self._leaves.values():
+            if len(leaf):
+                leaf.clear()
+    
+    def update(self, *args, **kwargs):
+        delta = dict(*args, **kwargs)
+        for leaf, keys in self._grouped(delta):
+            leaf.update({key: delta[key] for key in keys})
+
+
+class ShardedGAOSet(_ShardedGAOBase):
+    ''' GAOSet, sharded across GAOSet leaves.
+    '''
+    LEAF_CLASS = GAOSet
+    _empty = set
+    _CLEAR_OP = 'clear'
+    _MIGRATE_OP = 'update'
+    
+    @staticmethod
+    def _keys_of(state):
+        return list(state)
+    
+    @staticmethod
+    def _substate(state, keys):
+        return set(keys)
+    
+    def __len__(self):
+        return sum(len(leaf) for leaf in self._leaves.values())
+    
+    def __iter__(self):
+        return itertools.chain.from_iterable(self._leaves.values())
+    
+    def __contains__(self, elem):
+        return elem in self._find_leaf(elem)
+    
+    def add(self, elem):
+        self._leaf_for(elem).add(elem)
+    
+    def remove(self, elem):
+        self._find_leaf(elem).remove(elem)
+    
+    def discard(self, elem):
+        self._find_leaf(elem).discard(elem)
+    
+    def pop(self):
+        for leaf in self._leaves.values():
+            if len(leaf):
+                return leaf.pop()
+        
+        raise KeyError('pop from an empty set')
+    
+    def clear(self):
+        for leaf in self._leaves.values():
+            if len(leaf):
+                leaf.clear()
+    
+    def isdisjoint(self, other):
+        return all(leaf.isdisjoint(other) for leaf in self._leaves.values())
+    
+    def issubset(self, other):
+        return all(leaf.issubset(other) for leaf in self._leaves.values())
+    
+    def issuperset(self, other):
+        return all(elem in self for elem in other)
+    
+    def update(self, *others):
+        delta = set().union(*others)
+        for leaf, elems in self._grouped(delta):
+            leaf.update(elems)
+
+
+class ShardedGAOSetMap(_ShardedGAOBase):
+    ''' GAOSetMap, sharded across GAOSetMap leaves.
+    '''
+    LEAF_CLASS = GAOSetMap
+    _empty = SetMap
+    _CLEAR_OP = 'clear_all'
+    _MIGRATE_OP = 'update_all'
+    
+    @staticmethod
+    def _keys_of(state):
+        return list(state)
+    
+    @staticmethod
+    def _substate(state, keys):
+        substate = SetMap()
+        for key in keys:
+            substate.update(key, state.get_any(key))
+        return substate
+    
+    def __len__(self):
+        return sum(len(leaf) for leaf in self._leaves.values())
+    
+    def __iter__(self):
+        return itertools.chain.from_iterable(self._leaves.values())
+    
+    def __contains__(self, key):
+        return key in self._find_leaf(key)
+    
+    def __bool__(self):
+        return any(bool(leaf) for leaf in self._leaves.values())
+    
+    def get_any(self, key):
+        return self._find_leaf(key).get_any(key)
+    
+    def pop_any(self, key):
+        return self._find_leaf(key).pop_any(key)
+    
+    def contains_within(self, key, value):
+        return self._find_leaf(key).contains_within(key, value)
+    
+    def add(self, key, value):
+        self._leaf_for(key).add(key, value)
+    
+    def update(self, key, value):
+        self._leaf_for(key).update(key, value)
+    
+    def update_all(self, other):
+        for leaf, keys in self._grouped(other):
+            leaf.update_all({key: other[key] for key in keys})
+    
+    def remove(self, key, value):
+        self._find_leaf(key).remove(key, value)
+    
+    def discard(self, key, value):
+        self._find_leaf(key).discard(key, value)
+    
+    def clear(self, key):
+        self._find_leaf(key).clear(key)
+    
+    def clear_any(self, key):
+        self._find_leaf(key).clear_any(key)
+    
+    def clear_all(self):
+        for leaf in self._leaves.values():
+            if leaf:
+                leaf.clear_all()
+    
+    def combine(self, other):
+        combined = SetMap()
+        for leaf in self._leaves.values():
+            combined = combined.combine(leaf.state)
+        return combined.combine(other)
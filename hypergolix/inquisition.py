@@ -31,6 +31,8 @@ hypergolix: A python Golix client.
 '''
 
 # Global dependencies
+import sys
+import collections
 # import weakref
 # import traceback
 # import threading
@@ -38,6 +40,9 @@ hypergolix: A python Golix client.
 # from golix import SecondParty
 from golix import Ghid
 
+# Intra-package dependencies
+from .utils import weak_property
+
 # Local dependencies
 # from .persistence import _GarqLite
 # from .persistence import _GdxxLite
@@ -66,10 +71,153 @@ class Inquisitor:
     ''' The inquisitor handles resource utilization, locally removing
     GAOs from memory when they are no longer sufficiently used to 
     justify their overhead.
+    
+    The oracle tells us every time it hands out an object (see touch).
+    We keep those objects in least-recently-used order, along with an
+    estimate of their size, and whenever the total goes over budget we
+    evict the coldest ones that aren't currently tracked by any IPC
+    connection. Evicting only drops the oracle's reference; anything
+    still using the object keeps it (and the oracle hands that copy back
+    out instead of reloading it). Objects the oracle never handed out
+    (for example, the account containers) are never considered.
     '''
-    pass
+    # Default memory budget, in bytes
+    MEMORY_BUDGET = 64 * 1024 * 1024
+    # Rough per-object cost on top of its state (history, locks, etc)
+    OBJECT_OVERHEAD = 1024
+    
+    _oracle = weak_property('__oracle')
+    _dispatch = weak_property('__dispatch')
+    
+    def __init__(self, *args, budget=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        
+        if budget is None:
+            budget = self.MEMORY_BUDGET
+        self.budget = budget
+        
+        # <ghid>: <estimated size>, least recently used first
+        self._sizes = collections.OrderedDict()
+        self.resident_bytes = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+    
+    def assemble(self, oracle, dispatch):
+        # Chicken, meet egg.
+        self._oracle = oracle
+        self._dispatch = dispatch
+    
+    @property
+    def stats(self):
+        ''' Current residency and eviction counts, for reporting.
+        '''
+        return {
+            'budget': self.budget,
+            'resident': len(self._sizes),
+            'resident_bytes': self.resident_bytes,
+            'evictions': self.evictions,
+            'evicted_bytes': self.evicted_bytes,
+        }
+    
+    @classmethod
+    def sizeof(cls, obj):
+        ''' Estimate the memory used by a GAO.
+        '''
+        state = getattr(obj, 'state', None)
+        
+        if isinstance(state, (bytes, bytearray, memoryview)):
+            size = len(state)
+        else:
+            size = sys.getsizeof(state)
+        
+        return size + cls.OBJECT_OVERHEAD
+    
+    def touch(self, ghid, obj):
+        ''' Record an access to obj, re-estimating its size, and then
+        evict anything we need to in order to get back under budget.
+        '''
+        size = self.sizeof(obj)
+        self.resident_bytes += size - self._sizes.pop(ghid, 0)
+        self._sizes[ghid] = size
+        
+        if self.resident_bytes > self.budget:
+            self.sweep(keep=ghid)
+    
+    def discard(self, ghid):
+        ''' Stop tracking the ghid (it was removed from the oracle by
+        someone else). Idempotent.
+        '''
+        self.resident_bytes -= self._sizes.pop(ghid, 0)
+    
+    def sweep(self, keep=None):
+        ''' Evict cold objects until we're under budget (or we run out
+        of things we're allowed to evict). Returns the number evicted.
+        '''
+        evicted = 0
+        
+        # Copy, since evicting mutates it. Oldest first.
+        for ghid in list(self._sizes):
+            if self.resident_bytes <= self.budget:
+                break
+            
+            # Note that ghids cannot be compared against None.
+            elif keep is not None and ghid == keep:
+                continue
+            
+            elif self._evictable(ghid):
+                self._evict(ghid)
+                evicted += 1
+        
+        if evicted:
+            logger.info(
+                'Inquisitor evicted ' + str(evicted) + ' GAOs; ' +
+                str(self.resident_bytes) + ' of ' + str(self.budget) +
+                ' bytes resident in ' + str(len(self._sizes)) + ' GAOs.'
+            )
+        
+        return evicted
+    
+    def _evictable(self, ghid):
+        ''' Only evict things that are idle and that no application is
+        currently listening to.
+        '''
+        try:
+            obj = self._oracle._lookup[ghid]
+        
+        # Already gone, so just forget about it.
+        except KeyError:
+            self.discard(ghid)
+            return False
+        
+        if self._dispatch.has_listeners(ghid):
+            return False
+        
+        # Still loading
+        ctx = getattr(obj, '_ctx', None)
+        if ctx is not None and not ctx.is_set():
+            return False
+        
+        # Mid-push or mid-pull
+        update_lock = getattr(obj, '_update_lock', None)
+        if update_lock is not None and update_lock.locked():
+            return False
+        
+        return True
+    
+    def _evict(self, ghid):
+        ''' Remove the object from the oracle. Its finalizer deregisters
+        it from upstream updates once it's actually collected.
+        '''
+        size = self._sizes[ghid]
+        
+        logger.debug('Inquisitor evicting ' + str(ghid))
+        # This calls discard for us.
+        self._oracle.evict(ghid)
+        self.evictions += 1
+        self.evicted_bytes += size
+    
     # Note: you're probably not going to want to use the _GAO to maintain the
     # librarian retention directly, because not all _GAO have a librarian 
     # counterpart. For example, debindings will basically never be associated
     # with a live GAO, so, if you decided to let GAO live-ness dictate the
-    # librarian caching of "lite"weight objects, you would never cache a GDXX.
\ No newline at end of file
+    # librarian caching of "lite"weight objects, you would never cache a GDXX.
@@ -65,6 +65,8 @@ IPC Apps should not have access to objects that are not _Dispatchable.
 import logging
 import collections
 import traceback
+import asyncio
+import weakref
 
 from golix import Ghid
 
@@ -92,12 +94,16 @@ from .exceptions import IllegalDynamicFrame
 from .exceptions import IntegrityError
 from .exceptions import UnavailableUpstream
 from .exceptions import CatOuttaBagError
+from .exceptions import DeltaMismatch
 
 from .utils import WeakSetMap
 from .utils import SetMap
 from .utils import ApiID
 from .utils import AppToken
 from .utils import weak_property
+from .utils import FiniteDict
+from .utils import make_delta
+from .utils import apply_delta
 
 from .comms import RequestResponseAPI
 from .comms import RequestResponseProtocol
@@ -128,6 +134,16 @@ _ShareLog = collections.namedtuple(
 )
 
 
+# The whole update, plus everything needed to build deltas against any
+# base. Deltas are cached as <base state>: <packed delta (or None)>, so that
+# connections with the same base share them.
+_PackedUpdate = collections.namedtuple(
+    typename = '_PackedUpdate',
+    field_names = ('full', 'ghid', 'author', 'state', 'api_id', 'dynamic',
+                   'deltas')
+)
+
+
 # ###############################################
 # Library
 # ###############################################
@@ -145,6 +161,7 @@ ERROR_CODES = {
     b'\x00\x08': DoesNotExist,
     b'\x00\x09': IllegalDynamicFrame,
     b'\x00\x0A': RemoteNak,
+    b'\x00\x0B': DeltaMismatch,
     b'\xFF\xFF': IPCError
 }
 
@@ -154,15 +171,16 @@ class _IPCSerializer:
     '''
         
     def _pack_object_def(self, address, author, state, is_link, api_id,
-                         private, dynamic, _legroom):
-        ''' Serializes an object definition.
+                         private, dynamic, _legroom, delta=False):
+        ''' Serializes an object definition. If delta is True, state is
+        a delta (see utils.make_delta) instead of the whole state.
         
         This is crude, but it's getting the job done for now. Also, for
         the record, I was previously using msgpack, but good lord is it
         slow.
         
         General format:
-        version     1B      int16 unsigned
+        version     1B      int16 unsigned (1 for deltas, otherwise 0)
         address     65B     ghid
         author      65B     ghid
         private     1B      bool
@@ -172,7 +190,10 @@ class _IPCSerializer:
         is_link     1B      bool
         state       ?B      bytes (implicit length)
         '''
-        version = b'\x00'
+        if delta:
+            version = b'\x01'
+        else:
+            version = b'\x00'
             
         if address is None:
             address = bytes(65)
@@ -262,19 +283,99 @@ class _IPCSerializer:
                 private,
                 dynamic,
                 _legroom)
+    
+    def _is_delta(self, data):
+        ''' Checks if the packed object definition contains a delta
+        instead of the whole state.
+        '''
+        return data[0:1] == b'\x01'
+    
+    def _pack_batch(self, items):
+        ''' Serializes a list of variable-length items, for example
+        object definitions, into a single batch body.
+        
+        General format, repeated once per item:
+        length      4B      int32 unsigned
+        item        ?B      bytes
+        '''
+        return b''.join(
+            len(item).to_bytes(length=4, byteorder='big') + item
+            for item in items
+        )
+    
+    def _unpack_batch(self, data):
+        ''' Deserializes a batch body back into a list of items.
+        '''
+        items = []
+        cursor = 0
+        while cursor < len(data):
+            length = int.from_bytes(data[cursor:cursor + 4], 'big')
+            cursor += 4
+            
+            if cursor + length > len(data):
+                raise ValueError('Truncated IPC batch.')
+            
+            items.append(data[cursor:cursor + length])
+            cursor += length
+        
+        return items
+    
+    def _pack_results(self, results):
+        ''' Serializes the per-item results of a batch request. Any
+        exceptions are packed using the same error codes as failed
+        requests.
+        
+        General format, repeated once per item (see _pack_batch):
+        success     1B      bool
+        result      ?B      bytes (error code + message on failure)
+        '''
+        items = []
+        for result in results:
+            if isinstance(result, Exception):
+                items.append(b'\x00' + self._pack_failure(result))
+            else:
+                items.append(b'\x01' + result)
+        
+        return self._pack_batch(items)
+    
+    def _unpack_results(self, data):
+        ''' Deserializes per-item batch results. Failed items are
+        returned as (unraised) exceptions.
+        '''
+        results = []
+        for item in self._unpack_batch(data):
+            if item[0:1] == b'\x01':
+                results.append(item[1:])
+            else:
+                results.append(self._unpack_failure(item[1:]))
+        
+        return results
 
 
 class IPCServerProtocol(_IPCSerializer, metaclass=RequestResponseAPI,
                         error_codes=ERROR_CODES, default_version=b'\x00\x00'):
     ''' Defines the protocol for IPC, with handlers specific to servers.
     '''
+    # How many items of any one batch request to work on at a time.
+    BATCH_CONCURRENCY = 8
+    
     _dispatch = weak_property('__dispatch')
     _oracle = weak_property('__oracle')
     _golcore = weak_property('__golcore')
     _rolodex = weak_property('__rolodex')
     _salmonator = weak_property('__salmonator')
         
-    @fixture_api
+    # How many objects to remember the last state we exchanged with each
+    # connection for, to make deltas against.
+    DELTA_CACHE_SIZE = 256
+    
+    @public_api
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Lookup <connection>: {<ghid>: <state as last exchanged with it>}
+        self._last_states = weakref.WeakKeyDictionary()
+    
+    @__init__.fixture
     def __init__(self, whoami, *args, **kwargs):
         super(IPCServerProtocol.__fixture__, self).__init__(*args, **kwargs)
         self._whoami = whoami
@@ -448,7 +549,28 @@ class IPCServerProtocol(_IPCSerializer, metaclass=RequestResponseAPI,
     async def get_obj(self, connection, body):
         ''' Handles requests for an object. Server only.
         '''
-        ghid = Ghid.from_bytes(body)
+        return (await self._get_one(connection, Ghid.from_bytes(body)))
+    
+    @request(b'>M')
+    async def get_many_obj(self, connection):
+        ''' Get many objects at once. Client only.
+        '''
+        raise NotImplementedError()
+    
+    @get_many_obj.request_handler
+    async def get_many_obj(self, connection, body):
+        ''' Handles requests for many objects at once. Server only.
+        '''
+        ghids = [
+            Ghid.from_bytes(body[start:start + 65])
+            for start in range(0, len(body), 65)
+        ]
+        return (await self._handle_batch(self._get_one, connection, ghids))
+    
+    async def _get_one(self, connection, ghid):
+        ''' Gets an object for the connection, returning its packed
+        definition.
+        '''
         obj = await self._oracle.get_object(
             gaoclass = _Dispatchable,
             ghid = ghid,
@@ -467,6 +589,8 @@ class IPCServerProtocol(_IPCSerializer, metaclass=RequestResponseAPI,
         else:
             is_link = False
             state = obj.state
+            # This is now the version the app has, for future deltas.
+            self._remember_state(connection, obj.ghid, state)
             
         # For now, anyways.
         # Note: need to add some kind of handling for legroom.
@@ -499,6 +623,28 @@ class IPCServerProtocol(_IPCSerializer, metaclass=RequestResponseAPI,
     async def new_obj(self, connection, body):
         ''' Handles requests for new objects.
         '''
+        return (await self._new_one(connection, body))
+    
+    @request(b'+M')
+    async def new_many_obj(self, connection):
+        ''' Create many new objects at once. Client only.
+        '''
+        raise NotImplementedError()
+    
+    @new_many_obj.request_handler
+    async def new_many_obj(self, connection, body):
+        ''' Handles requests for many new objects at once. Server only.
+        '''
+        return (await self._handle_batch(
+            self._new_one,
+            connection,
+            self._unpack_batch(body)
+        ))
+    
+    async def _new_one(self, connection, body):
+        ''' Creates an object from its packed definition, returning its
+        address.
+        '''
         (address,    # Unused and set to None.
          author,     # Unused and set to None.
          state,
@@ -522,6 +668,7 @@ class IPCServerProtocol(_IPCSerializer, metaclass=RequestResponseAPI,
             api_id = api_id,
             account = self._dispatch._account
         )
+        self._remember_state(connection, obj.ghid, state)
             
         # Add the endpoint as a listener.
         await self._dispatch.register_object(connection, obj.ghid, private)
@@ -529,10 +676,111 @@ class IPCServerProtocol(_IPCSerializer, metaclass=RequestResponseAPI,
         
         return bytes(obj.ghid)
     
+    def _remember_state(self, connection, ghid, state):
+        ''' Record the state of the object that the connection now has,
+        to make future deltas against.
+        '''
+        try:
+            states = self._last_states[connection]
+        except KeyError:
+            states = FiniteDict(maxlen=self.DELTA_CACHE_SIZE)
+            self._last_states[connection] = states
+        
+        states[ghid] = state
+    
+    def _forget_state(self, connection, ghid):
+        ''' We no longer know which state of the object the connection
+        has.
+        '''
+        try:
+            del self._last_states[connection][ghid]
+        except KeyError:
+            pass
+    
+    def _pack_delta(self, packed, base):
+        ''' Get the update_obj request body for a delta of the packed
+        update against base, or None if a delta isn't worth it.
+        '''
+        try:
+            return packed.deltas[base]
+        except KeyError:
+            pass
+        
+        delta = make_delta(base, packed.state)
+        if delta is not None:
+            delta = self._pack_object_def(
+                packed.ghid,
+                packed.author,
+                delta,
+                False,      # is_link (currently unsupported)
+                packed.api_id,
+                None,       # private
+                packed.dynamic,
+                None,       # legroom
+                delta = True
+            )
+        
+        packed.deltas[base] = delta
+        return delta
+    
     @public_api
-    @request(b'!O')
-    async def update_obj(self, connection, ghid):
-        ''' Update an object or notify an app of an incoming update.
+    async def update_obj(self, connection, ghid, packed=None):
+        ''' Notify an app of an incoming update. If the update was
+        already built with pack_update, pass it as packed.
+        
+        If we know which version of the object the app has, try sending
+        a delta against it first, falling back to the whole state if the
+        app turns out to have something else.
+        '''
+        if packed is None:
+            packed = await self.pack_update(ghid)
+        
+        base = self._last_states.get(connection, {}).get(ghid)
+        if base is None:
+            delta = None
+        else:
+            delta = self._pack_delta(packed, base)
+        
+        try:
+            if delta is not None:
+                try:
+                    result = await self.send_update(connection, delta)
+                
+                except DeltaMismatch:
+                    logger.debug(
+                        'CONN ' + str(connection) + ' missed an update to ' +
+                        str(ghid) + '; resending it in full.'
+                    )
+                
+                else:
+                    self._remember_state(connection, ghid, packed.state)
+                    return result
+            
+            result = await self.send_update(connection, packed.full)
+        
+        # If anything goes wrong, we can't know what the app has.
+        except BaseException:
+            self._forget_state(connection, ghid)
+            raise
+        
+        else:
+            self._remember_state(connection, ghid, packed.state)
+            return result
+    
+    @update_obj.fixture
+    async def update_obj(self, connection, ghid, packed=None):
+        ''' Manual no-op fixture, courtesy of descriptors not being
+        callable or whatever.
+        '''
+        self.updates.append((connection, ghid))
+    
+    @public_api
+    async def pack_update(self, ghid):
+        ''' Build the update_obj request body for the object with the
+        whole state. This is the same for every connection, so when
+        notifying many of them, build it once and pass it to update_obj
+        for each. Deltas depend upon the state each connection has, so
+        update_obj builds those as needed (once per distinct base).
         '''
         try:
             obj = await self._oracle.get_object(
@@ -556,7 +804,7 @@ class IPCServerProtocol(_IPCSerializer, metaclass=RequestResponseAPI,
             raise
             
         else:
-            return self._pack_object_def(
+            full = self._pack_object_def(
                 obj.ghid,
                 obj.author,
                 obj.state,
@@ -566,19 +814,58 @@ class IPCServerProtocol(_IPCSerializer, metaclass=RequestResponseAPI,
                 obj.dynamic,
                 None        # legroom
             )
+            
+            return _PackedUpdate(
+                full,
+                obj.ghid,
+                obj.author,
+                obj.state,
+                obj.api_id,
+                obj.dynamic,
+                {}          # deltas
+            )
     
-    @update_obj.fixture
-    async def update_obj(self, connection, ghid):
-        ''' Manual no-op fixture, courtesy of descriptors not being
-        callable or whatever.
+    @pack_update.fixture
+    async def pack_update(self, ghid):
+        ''' Nothing to pack.
         '''
-        self.updates.append((connection, ghid))
+        return bytes(ghid)
+    
+    @request(b'!O')
+    async def send_update(self, connection, body):
+        ''' Send an app an update_obj request body, as built by
+        pack_update. Server only.
+        '''
+        return body
     
-    @update_obj.request_handler
-    async def update_obj(self, connection, body):
+    @send_update.request_handler
+    async def send_update(self, connection, body):
         ''' Handles update object requests.
         '''
         logger.debug('Handling update request from ' + str(connection))
+        return (await self._update_one(connection, body))
+    
+    @request(b'!M')
+    async def update_many_obj(self, connection):
+        ''' Update many objects at once. Client only.
+        '''
+        raise NotImplementedError()
+    
+    @update_many_obj.request_handler
+    async def update_many_obj(self, connection, body):
+        ''' Handles requests to update many objects at once. Server
+        only.
+        '''
+        logger.debug('Handling batch update request from ' + str(connection))
+        return (await self._handle_batch(
+            self._update_one,
+            connection,
+            self._unpack_batch(body)
+        ))
+    
+    async def _update_one(self, connection, body):
+        ''' Applies an update from its packed object definition.
+        '''
         (ghid,
          author,    # Unused and set to None.
          state,
@@ -602,7 +889,11 @@ class IPCServerProtocol(_IPCSerializer, metaclass=RequestResponseAPI,
             ipc_protocol = self,
             account = self._dispatch._account
         )
+        
+        if self._is_delta(body):
+            state = apply_delta(obj.state, state)
         obj.state = state
+        self._remember_state(connection, ghid, state)
         
         # Converting a private object to a public one
         if self._dispatch.private_parent_lookup(ghid):
@@ -628,6 +919,38 @@ class IPCServerProtocol(_IPCSerializer, metaclass=RequestResponseAPI,
         
         return b'\x01'
         
+    async def _handle_batch(self, handler, connection, items):
+        ''' Runs handler(connection, item) for every item in a batch,
+        a few at a time, and then flushes the account once for all of
+        them. Failures are reported per item instead of failing the
+        whole batch.
+        '''
+        window = asyncio.Semaphore(self.BATCH_CONCURRENCY)
+        
+        async def handle(item):
+            async with window:
+                return (await handler(connection, item))
+        
+        results = await asyncio.gather(
+            *[handle(item) for item in items],
+            return_exceptions = True
+        )
+        
+        for result in results:
+            # Mismatched deltas are routine; the app will resend them.
+            if isinstance(result, DeltaMismatch):
+                pass
+            elif isinstance(result, Exception):
+                logger.warning(
+                    'CONN ' + str(connection) + ' batch item failed w/ ' +
+                    'traceback:\n' + ''.join(traceback.format_exception(
+                        type(result), result, result.__traceback__
+                    ))
+                )
+        
+        await self._dispatch._account.flush()
+        return self._pack_results(results)
+    
     @request(b'~O')
     async def sync_obj(self, connection):
         ''' Manually force Hypergolix to check an object for updates.
@@ -685,6 +1008,36 @@ class IPCServerProtocol(_IPCSerializer, metaclass=RequestResponseAPI,
         await self._rolodex.share_object(ghid, recipient, requesting_token)
         return b'\x01'
     
+    @request(b'@M')
+    async def share_many_obj(self, connection):
+        ''' Share an object with many recipients at once. Client only.
+        '''
+        raise NotImplementedError()
+    
+    @share_many_obj.request_handler
+    async def share_many_obj(self, connection, body):
+        ''' Handles requests to share an object with many recipients.
+        Server only.
+        '''
+        ghid = Ghid.from_bytes(body[0:65])
+        recipients = [
+            Ghid.from_bytes(body[start:start + 65])
+            for start in range(65, len(body), 65)
+        ]
+        
+        # Same deal as share_obj re: tokens.
+        requesting_token = self._dispatch.token_lookup(connection)
+        if requesting_token is None:
+            logger.info(
+                'CONN ' + str(connection) + ' is sharing ' + str(ghid) +
+                ' with ' + str(len(recipients)) + ' recipients without ' +
+                'defining an app token, and therefore cannot be notified ' +
+                'of share success or failure.'
+            )
+        
+        await self._rolodex.share_many(ghid, recipients, requesting_token)
+        return b'\x01'
+    
     @public_api
     @request(b'^S')
     async def notify_share_success(self, connection, ghid, recipient):
@@ -1134,6 +1487,40 @@ class IPCClientProtocol(_IPCSerializer, metaclass=RequestResponseAPI,
         '''
         return self.pending_obj
         
+    @public_api
+    @request(b'>M')
+    async def get_many_ghid(self, connection, ghids):
+        ''' Get many objects at once. Client only.
+        '''
+        return b''.join(bytes(ghid) for ghid in ghids)
+    
+    @get_many_ghid.request_handler
+    async def get_many_ghid(self, connection, body):
+        ''' Handles requests for many objects. Server only.
+        '''
+        raise NotImplementedError()
+    
+    @get_many_ghid.response_handler
+    async def get_many_ghid(self, connection, response, exc):
+        ''' Handles responses to batch get requests. Client only.
+        Returns a list of object definitions, with an exception in
+        place of any that could not be retrieved.
+        '''
+        if exc is not None:
+            raise exc
+        
+        return [
+            result if isinstance(result, Exception)
+            else self._unpack_object_def(result)
+            for result in self._unpack_results(response)
+        ]
+    
+    @get_many_ghid.fixture
+    async def get_many_ghid(self, ghids):
+        ''' Interact with pending_obj.
+        '''
+        return [self.pending_obj for __ in ghids]
+    
     @public_api
     @request(b'+O')
     async def new_ghid(self, connection, state, api_id, dynamic, private,
@@ -1142,6 +1529,11 @@ class IPCClientProtocol(_IPCSerializer, metaclass=RequestResponseAPI,
         created by a concurrent instance of the app on a different
         hypergolix session.
         '''
+        return self._pack_new(state, api_id, dynamic, private, _legroom)
+    
+    def _pack_new(self, state, api_id, dynamic, private, _legroom):
+        ''' Packs the object definition for a new object.
+        '''
         # If state is Ghid, it's a link.
         if isinstance(state, Ghid):
             is_link = True
@@ -1191,10 +1583,55 @@ class IPCClientProtocol(_IPCSerializer, metaclass=RequestResponseAPI,
         
         return self.pending_ghid
         
+    @public_api
+    @request(b'+M')
+    async def new_many_ghid(self, connection, obj_defs):
+        ''' Create many new objects at once. obj_defs is an iterable of
+        (state, api_id, dynamic, private, _legroom) tuples.
+        '''
+        return self._pack_batch([
+            self._pack_new(*obj_def) for obj_def in obj_defs
+        ])
+    
+    @new_many_ghid.request_handler
+    async def new_many_ghid(self, connection, body):
+        ''' Handles requests for many new objects. Server only.
+        '''
+        raise NotImplementedError()
+    
+    @new_many_ghid.response_handler
+    async def new_many_ghid(self, connection, response, exc):
+        ''' Handles responses to batch new object requests. Returns a
+        list of addresses, with an exception in place of any objects
+        that could not be created.
+        '''
+        if exc is not None:
+            raise exc
+        
+        return [
+            result if isinstance(result, Exception)
+            else Ghid.from_bytes(result)
+            for result in self._unpack_results(response)
+        ]
+    
+    @new_many_ghid.fixture
+    async def new_many_ghid(self, obj_defs):
+        ''' Same as new_ghid, once per object.
+        '''
+        return [(await self.new_ghid(*obj_def)) for obj_def in obj_defs]
+    
     @public_api
     @request(b'!O')
-    async def update_ghid(self, connection, ghid, state, private, _legroom):
-        ''' Update an object or notify an app of an incoming update.
+    async def update_ghid(self, connection, ghid, state, private, _legroom,
+                          base=None):
+        ''' Update an object or notify an app of an incoming update. If
+        base is the last version of the state that hypergolix has, only
+        send a delta against it (if it's worthwhile).
+        '''
+        return self._pack_update(ghid, state, private, _legroom, base)
+    
+    def _pack_update(self, ghid, state, private, _legroom, base=None):
+        ''' Packs the object definition for an object update.
         '''
         # If state is Ghid, it's a link.
         if isinstance(state, Ghid):
@@ -1202,6 +1639,14 @@ class IPCClientProtocol(_IPCSerializer, metaclass=RequestResponseAPI,
         else:
             is_link = False
             
+        if base is None or is_link:
+            delta = None
+        else:
+            delta = make_delta(base, state)
+        
+        if delta is not None:
+            state = delta
+        
         return self._pack_object_def(
             ghid,       # ghid
             None,       # Author
@@ -1210,7 +1655,8 @@ class IPCClientProtocol(_IPCSerializer, metaclass=RequestResponseAPI,
             None,       # api_id
             private,    # private
             None,       # dynamic
-            _legroom    # legroom
+            _legroom,   # legroom
+            delta = delta is not None
         )
         
     @update_ghid.request_handler
@@ -1230,7 +1676,11 @@ class IPCClientProtocol(_IPCSerializer, metaclass=RequestResponseAPI,
         if is_link:
             state = Ghid.from_bytes(state)
             
-        await self._hgxlink._pull_state(address, state)
+        await self._hgxlink._pull_state(
+            address,
+            state,
+            delta = self._is_delta(body)
+        )
             
         return b'\x01'
         
@@ -1248,13 +1698,61 @@ class IPCClientProtocol(_IPCSerializer, metaclass=RequestResponseAPI,
             return True
             
     @update_ghid.fixture
-    async def update_ghid(self, ghid, state, private, _legroom):
+    async def update_ghid(self, ghid, state, private, _legroom, base=None):
         ''' Yarp, fixture that.
         '''
         self.updates.append(
             {ghid: (state, private, _legroom)}
         )
         
+    @public_api
+    @request(b'!M')
+    async def update_many_ghid(self, connection, updates):
+        ''' Update many objects at once. updates is an iterable of
+        (ghid, state, private, _legroom[, base]) tuples.
+        '''
+        return self._pack_batch([
+            self._pack_update(*update) for update in updates
+        ])
+    
+    @update_many_ghid.request_handler
+    async def update_many_ghid(self, connection, body):
+        ''' Handles requests to update many objects. Server only.
+        '''
+        raise NotImplementedError()
+    
+    @update_many_ghid.response_handler
+    async def update_many_ghid(self, connection, response, exc):
+        ''' Handles responses to batch update requests. Returns a list
+        of True, with an exception in place of any failed updates.
+        '''
+        if exc is not None:
+            raise exc
+        
+        results = []
+        for result in self._unpack_results(response):
+            if isinstance(result, Exception):
+                results.append(result)
+            elif result != b'\x01':
+                results.append(
+                    HGXLinkError('Unknown error while updating object.')
+                )
+            else:
+                results.append(True)
+        
+        return results
+    
+    @update_many_ghid.fixture
+    async def update_many_ghid(self, updates):
+        ''' Same as update_ghid, once per object.
+        '''
+        results = []
+        for update in updates:
+            await self.update_ghid(*update)
+            results.append(True)
+        
+        return results
+    
     @public_api
     @request(b'~O')
     async def sync_ghid(self, connection, ghid):
@@ -1320,6 +1818,36 @@ class IPCClientProtocol(_IPCSerializer, metaclass=RequestResponseAPI,
         # Blahblah
         self.shares.add(ghid, recipient)
         
+    @public_api
+    @request(b'@M')
+    async def share_many_ghid(self, connection, ghid, recipients):
+        ''' Request an object share with many recipients at once.
+        '''
+        return bytes(ghid) + b''.join(bytes(recipient)
+                                      for recipient in recipients)
+    
+    @share_many_ghid.request_handler
+    async def share_many_ghid(self, connection, body):
+        ''' Apps never get asked to share things. Server only.
+        '''
+        raise NotImplementedError()
+    
+    @share_many_ghid.response_handler
+    async def share_many_ghid(self, connection, response, exc):
+        ''' Handles responses to many-recipient share requests.
+        '''
+        if exc is not None:
+            raise exc
+        elif response == b'\x01':
+            return True
+        else:
+            raise IPCError('Unknown error while sharing object.')
+    
+    @share_many_ghid.fixture
+    async def share_many_ghid(self, ghid, recipients):
+        for recipient in recipients:
+            self.shares.add(ghid, recipient)
+    
     @request(b'^S')
     async def share_success(self, connection):
         ''' Notify app of successful share. Server only.
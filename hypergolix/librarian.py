@@ -70,6 +70,8 @@ from .lawyer import LawyerCore
 
 from .gao import GAO
 
+from .reconciliation import DigestIndex
+
 from .hypothetical import API
 from .hypothetical import public_api
 from .hypothetical import fixture_api
@@ -148,6 +150,18 @@ class LibrarianCore(metaclass=API):
         # This may be GC'd by the python process.
         self._catalog = FiniteDict(maxlen=memory_cache)
         
+        # Set of all stored ghids (frame ghids for dynamic bindings), and a
+        # DigestIndex thereof, for reconciliation with remotes. Changes to the
+        # index are batched up until the next time it's needed, so that (for
+        # example) restoring doesn't update it once per object.
+        self._stored = set()
+        self._digest_index = DigestIndex()
+        self._index_added = set()
+        self._index_removed = set()
+        
+        # Weakrefs to callbacks for binding updates; see add_binding_listener
+        self._binding_listeners = []
+    
     @__init__.fixture
     def __init__(self, *args, **kwargs):
         ''' Construct an in-memory-only version of librarian.
@@ -174,6 +188,10 @@ class LibrarianCore(metaclass=API):
         ''' Reset all of the librarian.
         '''
         self._catalog.clear()
+        self._stored.clear()
+        self._digest_index = DigestIndex()
+        self._index_added.clear()
+        self._index_removed.clear()
         self._shelf.clear()
         self._dyn_resolver.clear()
         self._bound_by_ghid.clear_all()
@@ -252,6 +270,33 @@ class LibrarianCore(metaclass=API):
         del lawyer
         return result
     
+    def add_binding_listener(self, callback):
+        ''' Call callback(ghid) whenever a (static or dynamic) binding is
+        stored or abandoned, so that anything derived from it can be
+        invalidated. Callbacks are weakly referenced, and are called
+        synchronously, so they should be fast.
+        '''
+        if hasattr(callback, '__self__'):
+            ref = weakref.WeakMethod(callback)
+        else:
+            ref = weakref.ref(callback)
+        
+        self._binding_listeners.append(ref)
+    
+    def _notify_binding(self, obj):
+        ''' Let any binding listeners know that obj changed.
+        '''
+        if not isinstance(obj, (_GobsLite, _GobdLite)):
+            return
+        
+        live = []
+        for ref in self._binding_listeners:
+            callback = ref()
+            if callback is not None:
+                live.append(ref)
+                callback(obj.ghid)
+        self._binding_listeners = live
+    
     @public_api
     async def store(self, obj, data):
         ''' Starts tracking an object.
@@ -273,6 +318,8 @@ class LibrarianCore(metaclass=API):
             
         await self.add_to_cache(obj, data)
         self._catalog[reference_ghid] = obj
+        if reference_ghid not in self._stored:
+            self._index_add(reference_ghid)
         
         # If successful (which is any time we get to here), we also need to get
         # rid of any old dynamic frames and pop them from the catalog.
@@ -281,6 +328,10 @@ class LibrarianCore(metaclass=API):
             # We need the None regardless of bugs, in case the old frame is
             # "stale" enough to have been released from memory
             self._catalog.pop(old_ghid, None)
+            if old_ghid in self._stored:
+                self._index_discard(old_ghid)
+        
+        self._notify_binding(obj)
     
     @public_api
     async def retrieve(self, ghid):
@@ -331,6 +382,44 @@ class LibrarianCore(metaclass=API):
         
         # Delete it from the catalog (if it exists there)
         self._catalog.pop(ghid, None)
+        if ghid in self._stored:
+            self._index_discard(ghid)
+        
+        self._notify_binding(obj)
+    
+    def _index_add(self, ghid):
+        ''' Record a newly-stored ghid for the digest index. If it was
+        only just removed, it's still in the index, so cancel that out.
+        '''
+        self._stored.add(ghid)
+        if ghid in self._index_removed:
+            self._index_removed.discard(ghid)
+        else:
+            self._index_added.add(ghid)
+    
+    def _index_discard(self, ghid):
+        ''' Inverse of _index_add.
+        '''
+        self._stored.discard(ghid)
+        if ghid in self._index_added:
+            self._index_added.discard(ghid)
+        else:
+            self._index_removed.add(ghid)
+    
+    @public_api
+    async def digest_index(self):
+        ''' Returns a DigestIndex of every object stored locally, using
+        frame ghids for dynamic bindings. Callers must not modify it.
+        '''
+        if self._index_added or self._index_removed:
+            self._digest_index = self._digest_index.updated(
+                self._index_added,
+                self._index_removed
+            )
+            self._index_added = set()
+            self._index_removed = set()
+        
+        return self._digest_index
     
     # Subclasses MAY define this, but are not required to do so.
     @fixture_api
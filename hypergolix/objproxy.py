@@ -38,6 +38,12 @@ import operator
 import inspect
 import json
 import pickle
+import hashlib
+import struct
+import collections
+import concurrent.futures
+
+from golix import Ghid
 
 from loopa.utils import triplicated
 from loopa.utils import Triplicate
@@ -46,11 +52,14 @@ from loopa.utils import Triplicate
 from .exceptions import DeadObject
 from .exceptions import LocallyImmutable
 from .exceptions import Unsharable
+from .exceptions import IntegrityError
+from .exceptions import DeltaMismatch
 
 from .utils import run_coroutine_loopsafe
 from .utils import call_coroutine_threadsafe
 from .utils import ApiID
 from .utils import _reap_wrapped_task
+from .utils import apply_delta
 
 from .embed import TriplicateAPI
 
@@ -77,6 +86,61 @@ __all__ = [
 # ###############################################
 
 
+def _retrieve_exception(future):
+    ''' Mark any exception on the future as retrieved, so that asyncio
+    doesn't complain if nobody ever awaits it.
+    '''
+    if not future.cancelled():
+        future.exception()
+
+
+def _copy_outcome(source, target):
+    ''' Done callback to copy the outcome of one future onto another.
+    '''
+    if source.cancelled():
+        target.cancel()
+    elif source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
+
+class _UpdateStream:
+    ''' Async iterator over upstream updates to an object. Like a
+    mailbox with a single slot: a slow consumer skips straight to the
+    latest state instead of queueing every intermediate one.
+    '''
+    __slots__ = ('_obj', '_fresh', '_closed', '__weakref__')
+    
+    def __init__(self, obj):
+        self._obj = obj
+        self._fresh = asyncio.Event(loop=obj._loop)
+        self._closed = False
+    
+    def _notify(self):
+        ''' Called by the object whenever an update arrives.
+        '''
+        self._fresh.set()
+    
+    def _close(self):
+        ''' Called by the object when it is deleted or discarded.
+        '''
+        self._closed = True
+        self._fresh.set()
+    
+    def __aiter__(self):
+        return self
+    
+    async def __anext__(self):
+        await self._fresh.wait()
+        
+        if self._closed:
+            raise StopAsyncIteration()
+        
+        self._fresh.clear()
+        return self._obj._hgx_state
+
+
 class ObjCore(metaclass=TriplicateAPI):
     ''' Core object that exposes all Hypergolix internals as
     manually-name-mangled stuff, which can then be re-assigned by
@@ -97,6 +161,23 @@ class ObjCore(metaclass=TriplicateAPI):
     __dynamic = None
     __isalive = None
     __legroom = None
+    # The last packed state that we know hypergolix has, for deltas.
+    __acked = None
+    # Write-behind pushes, which are disabled unless a window is set.
+    __push_window = None
+    __push_max_latency = None
+    # The future for the next coalesced push, and the timer that fires it
+    __pending_push = None
+    __push_timer = None
+    __push_deadline = None
+    # The future for the most recently started coalesced push
+    __inflight_push = None
+    # Coalesced update callbacks, which are disabled unless requested.
+    __coalesce_callbacks = False
+    __callback_task = None
+    __callback_stale = False
+    # Any outstanding _UpdateStreams (weakly referenced)
+    __streams = None
     
     def __init__(self, state, api_id, dynamic, private, ghid=None, binder=None,
                  *, hgxlink, ipc_manager, _legroom, callback=None):
@@ -206,6 +287,43 @@ class ObjCore(metaclass=TriplicateAPI):
         '''
         self.__legroom = int(value)
         
+    @property
+    def _hgx_push_window(self):
+        ''' If not None, pushes are write-behind: all pushes within this
+        many seconds of one another are coalesced into a single push,
+        and push() returns a future for it instead of waiting for it.
+        '''
+        return self.__push_window
+    
+    @_hgx_push_window.setter
+    def _hgx_push_window(self, value):
+        ''' Set (or, with None, disable) the write-behind window.
+        '''
+        if value is not None:
+            value = float(value)
+            if value < 0:
+                raise ValueError('Push window cannot be negative.')
+        
+        self.__push_window = value
+    
+    @property
+    def _hgx_push_max_latency(self):
+        ''' If not None, write-behind pushes are never deferred more
+        than this many seconds after the first push they coalesce.
+        '''
+        return self.__push_max_latency
+    
+    @_hgx_push_max_latency.setter
+    def _hgx_push_max_latency(self, value):
+        ''' Set (or, with None, disable) the latency bound.
+        '''
+        if value is not None:
+            value = float(value)
+            if value < 0:
+                raise ValueError('Max push latency cannot be negative.')
+        
+        self.__push_max_latency = value
+    
     @property
     def _hgx_linked(self):
         ''' Dummy property until linking is supported.
@@ -422,6 +540,74 @@ class ObjCore(metaclass=TriplicateAPI):
         '''
         self.__callback = None
         
+    @property
+    def _hgx_coalesce_callbacks(self):
+        ''' If True, at most one update callback runs at a time. Updates
+        arriving while it runs are collapsed into a single rerun, which
+        sees only the latest state.
+        '''
+        return self.__coalesce_callbacks
+    
+    @_hgx_coalesce_callbacks.setter
+    def _hgx_coalesce_callbacks(self, value):
+        ''' Enable or disable callback coalescing.
+        '''
+        self.__coalesce_callbacks = bool(value)
+    
+    def _hgx_updates(self):
+        ''' Returns an async iterator yielding the object's state after
+        each upstream update, ending when the object is deleted or
+        discarded. Updates arriving faster than they are consumed are
+        skipped, so iteration always resumes at the latest state. Must
+        be iterated from within the hgxlink's event loop.
+        '''
+        if not self.__isalive:
+            raise DeadObject()
+        
+        if self.__streams is None:
+            self.__streams = weakref.WeakSet()
+        
+        stream = _UpdateStream(self)
+        self.__streams.add(stream)
+        return stream
+    
+    def __notify_streams(self):
+        ''' Wake up any update streams.
+        '''
+        if self.__streams is not None:
+            for stream in self.__streams:
+                stream._notify()
+    
+    def __run_callback(self):
+        ''' Run the update callback concurrently, coalescing it with any
+        callback already running if so requested.
+        '''
+        if not self.__coalesce_callbacks:
+            task = asyncio.ensure_future(self.__callback(self))
+            task.add_done_callback(_reap_wrapped_task)
+        
+        elif self.__callback_task is not None:
+            self.__callback_stale = True
+        
+        else:
+            self.__callback_task = asyncio.ensure_future(
+                self.__coalesced_callback()
+            )
+            self.__callback_task.add_done_callback(_reap_wrapped_task)
+    
+    async def __coalesced_callback(self):
+        ''' Run the update callback until it has caught up with the
+        latest state.
+        '''
+        try:
+            self.__callback_stale = True
+            while self.__callback_stale and self.__callback is not None:
+                self.__callback_stale = False
+                await self.__callback(self)
+        
+        finally:
+            self.__callback_task = None
+    
     @triplicated
     async def _hgx_recast(self, cls):
         ''' Takes the passed obj, and attempts to re-cast it as this
@@ -438,6 +624,9 @@ class ObjCore(metaclass=TriplicateAPI):
             +   <ObjBase object>.hgx_recast(PickleProxy) returns the
                 object recast as a PickleProxy
         '''
+        # Don't lose any write-behind pushes when we render ourselves inop.
+        await self._hgx_flush()
+        
         # Re-pack the object for recasting. We always need to do this, in case
         # something got weird with serialization.
         state = await self.hgx_pack(self.__state)
@@ -465,14 +654,170 @@ class ObjCore(metaclass=TriplicateAPI):
         # callback wrapping into reap_anonymous_task. We have to access the
         # mangled attribute, because otherwise we will re-wrap the callback.
         recast._hgx_set_raw_callback(self.__callback)
+        recast._hgx_coalesce_callbacks = self.__coalesce_callbacks
         # Now render self (the old object) inoperable
         self.__render_inop()
         
         return recast
         
-    @triplicated
     async def _hgx_push(self):
-        ''' Pushes object state upstream.
+        ''' Pushes object state upstream. In write-behind mode (see
+        _hgx_push_window), instead returns a future that resolves once
+        the coalesced push lands.
+        '''
+        if self.__push_window is None:
+            await self.__push()
+        
+        elif not self.__isalive:
+            raise DeadObject()
+        
+        else:
+            return self.__schedule_push()
+    
+    def _hgx_push_threadsafe(self):
+        ''' Threadsafe version of _hgx_push. In write-behind mode, the
+        returned future is a concurrent.futures.Future.
+        '''
+        return call_coroutine_threadsafe(
+            coro = self.__push_external(),
+            loop = self._loop
+        )
+    
+    async def _hgx_push_loopsafe(self):
+        ''' Loopsafe version of _hgx_push. In write-behind mode, the
+        returned future belongs to the calling loop.
+        '''
+        pending = await run_coroutine_loopsafe(
+            coro = self.__push_external(),
+            target_loop = self._loop
+        )
+        
+        if pending is not None:
+            pending = asyncio.wrap_future(pending)
+            pending.add_done_callback(_retrieve_exception)
+        
+        return pending
+    
+    async def __push_external(self):
+        ''' Push, converting any write-behind future into one that can
+        be used from outside of the hgxlink's event loop.
+        '''
+        pending = await self._hgx_push()
+        
+        if pending is None:
+            return None
+        
+        else:
+            external = concurrent.futures.Future()
+            pending.add_done_callback(
+                lambda pending: _copy_outcome(pending, external)
+            )
+            return external
+    
+    @triplicated
+    async def _hgx_flush(self):
+        ''' Immediately starts any write-behind push that is waiting out
+        its window, and waits for it to land, raising if it failed.
+        '''
+        if self.__push_timer is not None:
+            self.__push_timer.cancel()
+            self.__fire_push()
+        
+        inflight = self.__inflight_push
+        if inflight is not None:
+            try:
+                await asyncio.shield(inflight)
+            
+            finally:
+                if self.__inflight_push is inflight and inflight.done():
+                    self.__inflight_push = None
+    
+    def __schedule_push(self):
+        ''' Schedules (or reschedules) the next coalesced push, returning
+        its future.
+        '''
+        loop = asyncio.get_event_loop()
+        now = loop.time()
+        
+        if self.__pending_push is None:
+            self.__pending_push = loop.create_future()
+            self.__pending_push.add_done_callback(_retrieve_exception)
+            if self.__push_max_latency is None:
+                self.__push_deadline = None
+            else:
+                self.__push_deadline = now + self.__push_max_latency
+        
+        else:
+            self.__push_timer.cancel()
+        
+        fire_at = now + self.__push_window
+        if self.__push_deadline is not None:
+            fire_at = min(fire_at, self.__push_deadline)
+        self.__push_timer = loop.call_at(fire_at, self.__fire_push)
+        
+        return self.__pending_push
+    
+    def __fire_push(self):
+        ''' Starts the coalesced push.
+        '''
+        pending = self.__pending_push
+        previous = self.__inflight_push
+        self.__pending_push = None
+        self.__push_timer = None
+        self.__push_deadline = None
+        
+        self.__inflight_push = pending
+        asyncio.ensure_future(self.__run_push(pending, previous))
+    
+    async def __run_push(self, pending, previous):
+        ''' Performs a coalesced push, resolving its future when done.
+        '''
+        # Make sure pushes can never overtake one another.
+        if previous is not None:
+            await asyncio.wait([previous])
+        
+        try:
+            await self.__push()
+        
+        except asyncio.CancelledError:
+            pending.cancel()
+            raise
+        
+        # Callers don't have to await the future, so make sure the failure
+        # is recorded somewhere.
+        except Exception as exc:
+            logger.error(
+                'Write-behind push failed for ' + str(self.__ghid) + ' w/ '
+                'traceback:\n' + ''.join(traceback.format_exc())
+            )
+            if not pending.done():
+                pending.set_exception(exc)
+        
+        else:
+            if not pending.done():
+                pending.set_result(None)
+            if self.__inflight_push is pending:
+                self.__inflight_push = None
+    
+    async def __push(self):
+        ''' Actually pushes object state upstream.
+        '''
+        update = await self._hgx_pack_push()
+        
+        try:
+            await self._hgx_ipc.update_ghid(*update)
+        
+        # Hypergolix has moved on since we last heard from it, so the delta
+        # was useless. Send the whole thing.
+        except DeltaMismatch:
+            await self._hgx_ipc.update_ghid(*update[:4])
+        
+        self._hgx_ack(update[1])
+    
+    async def _hgx_pack_push(self):
+        ''' Checks that we can push the object upstream, and then packs
+        its state, returning the (ghid, state, private, _legroom, base)
+        for the update request.
         '''
         # Error traps for dead object
         if not self.__isalive:
@@ -497,15 +842,22 @@ class ObjCore(metaclass=TriplicateAPI):
             elif not self.__dynamic:
                 raise LocallyImmutable('Cannot update a static object.')
             
-            # All traps passed. Make the call.
+            # All traps passed. Pack it up.
             else:
                 packed_state = await self.hgx_pack(self.__state)
-                await self._hgx_ipc.update_ghid(
+                return (
                     self.__ghid,
                     packed_state,
                     self.__private,
-                    self.__legroom
+                    self.__legroom,
+                    self.__acked
                 )
+    
+    def _hgx_ack(self, packed):
+        ''' Records packed as the last version of our state that
+        hypergolix is known to have.
+        '''
+        self.__acked = packed
 
     @triplicated
     async def _hgx_sync(self):
@@ -530,6 +882,20 @@ class ObjCore(metaclass=TriplicateAPI):
         else:
             await self._hgx_ipc.share_ghid(self.__ghid, recipient)
 
+    @triplicated
+    async def _hgx_share_many(self, recipients):
+        ''' Share with many recipients at once. Much cheaper than
+        sharing with each of them individually.
+        '''
+        if not self.__isalive:
+            raise DeadObject()
+        
+        elif self.__private:
+            raise Unsharable('Cannot share a private object.')
+        
+        else:
+            await self._hgx_ipc.share_many_ghid(self.__ghid, list(recipients))
+    
     @triplicated
     async def _hgx_freeze(self):
         ''' Trivial pass-through to the hgxlink make_freeze, with type
@@ -565,6 +931,8 @@ class ObjCore(metaclass=TriplicateAPI):
         if not self.__isalive:
             raise DeadObject()
         else:
+            # Don't silently drop any changes still waiting to be pushed.
+            await self._hgx_flush()
             await self._hgx_ipc.discard_ghid(self.__ghid)
             self.__render_inop()
 
@@ -601,8 +969,7 @@ class ObjCore(metaclass=TriplicateAPI):
         
         # If there is an update callback defined, run it concurrently.
         if self.__callback is not None:
-            update_task = asyncio.ensure_future(self.__callback(self))
-            update_task.add_done_callback(_reap_wrapped_task)
+            self.__run_callback()
             
     @_hgx_force_delete.fixture
     async def _hgx_force_delete(self):
@@ -610,12 +977,18 @@ class ObjCore(metaclass=TriplicateAPI):
         '''
     
     @public_api
-    async def _hgx_force_pull(self, state):
+    async def _hgx_force_pull(self, state, delta=False):
         ''' Does everything needed to apply an upstream update to the
-        object.
+        object. If delta is True, state is a delta against our last
+        acknowledged state.
         '''
+        if delta:
+            state = apply_delta(self.__acked, state)
+        self.__acked = state
+        
         state = await self.hgx_unpack(state)
         self.__state = state
+        self.__notify_streams()
         
         # If there is an update callback defined, run it concurrently.
         if self.__callback is not None:
@@ -623,8 +996,7 @@ class ObjCore(metaclass=TriplicateAPI):
                 'Update pulled for ' + str(self.__ghid) + '. Running '
                 'callback.'
             )
-            pull_task = asyncio.ensure_future(self.__callback(self))
-            pull_task.add_done_callback(_reap_wrapped_task)
+            self.__run_callback()
             
         else:
             logger.debug(
@@ -633,11 +1005,16 @@ class ObjCore(metaclass=TriplicateAPI):
             )
     
     @_hgx_force_pull.fixture
-    async def _hgx_force_pull(self, state):
+    async def _hgx_force_pull(self, state, delta=False):
         ''' Fixturing this actually requires a small degree of effort.
         '''
+        if delta:
+            state = apply_delta(self.__acked, state)
+        self.__acked = state
+        
         state = await self.hgx_unpack(state)
         self._hgx_state = state
+        self.__notify_streams()
         
     def __render_inop(self):
         ''' Renders the object locally inoperable, either through a
@@ -645,6 +1022,20 @@ class ObjCore(metaclass=TriplicateAPI):
         '''
         self.__isalive = False
         
+        # Abandon any write-behind push that hasn't started yet.
+        if self.__push_timer is not None:
+            self.__push_timer.cancel()
+            self.__push_timer = None
+        if self.__pending_push is not None:
+            self.__pending_push.cancel()
+            self.__pending_push = None
+        
+        # End any update streams.
+        if self.__streams is not None:
+            for stream in self.__streams:
+                stream._close()
+            self.__streams = None
+
         
 class Obj(ObjCore, metaclass=Triplicate):
     ''' Rename various internal-only methods to bring them into the
@@ -666,10 +1057,19 @@ class Obj(ObjCore, metaclass=Triplicate):
     
     recast = ObjCore._hgx_recast
     callback = ObjCore._hgx_callback
+    coalesce_callbacks = ObjCore._hgx_coalesce_callbacks
+    updates = ObjCore._hgx_updates
+    
+    push_window = ObjCore._hgx_push_window
+    push_max_latency = ObjCore._hgx_push_max_latency
     
     push = ObjCore._hgx_push
+    push_threadsafe = ObjCore._hgx_push_threadsafe
+    push_loopsafe = ObjCore._hgx_push_loopsafe
+    flush = ObjCore._hgx_flush
     sync = ObjCore._hgx_sync
     share = ObjCore._hgx_share
+    share_many = ObjCore._hgx_share_many
     freeze = ObjCore._hgx_freeze
     hold = ObjCore._hgx_hold
     discard = ObjCore._hgx_discard
@@ -732,10 +1132,19 @@ class Proxy(ObjCore, metaclass=Triplicate):
     
     hgx_recast = ObjCore._hgx_recast
     hgx_callback = ObjCore._hgx_callback
+    hgx_coalesce_callbacks = ObjCore._hgx_coalesce_callbacks
+    hgx_updates = ObjCore._hgx_updates
+    
+    hgx_push_window = ObjCore._hgx_push_window
+    hgx_push_max_latency = ObjCore._hgx_push_max_latency
     
     hgx_push = ObjCore._hgx_push
+    hgx_push_threadsafe = ObjCore._hgx_push_threadsafe
+    hgx_push_loopsafe = ObjCore._hgx_push_loopsafe
+    hgx_flush = ObjCore._hgx_flush
     hgx_sync = ObjCore._hgx_sync
     hgx_share = ObjCore._hgx_share
+    hgx_share_many = ObjCore._hgx_share_many
     hgx_freeze = ObjCore._hgx_freeze
     hgx_hold = ObjCore._hgx_hold
     hgx_discard = ObjCore._hgx_discard
@@ -2114,3 +2523,398 @@ class JsonProxy(JsonSerializer, Proxy):
     ''' Make a proxy object that serializes with json.
     '''
     pass
+
+
+# Chunk manifest entries: the chunk's (static) ghid, its length, and the
+# SHA-512 of its contents.
+_Chunk = collections.namedtuple('_Chunk', ('ghid', 'size', 'digest'))
+
+
+class ChunkedObj(Obj, metaclass=Triplicate):
+    ''' An object for large binary blobs. Its state is a manifest of
+    fixed-size chunks, each of which is a separate static object. That
+    keeps every individual message well below the IPC (and websocket)
+    size cap, and means nothing needs to hold the whole blob in memory
+    at once.
+    
+    Create an empty one with hgxlink.new(ChunkedObj, state=()), and
+    then upload() into it. upload() reuses any chunk whose contents are
+    unchanged from the previous version, so small edits to large blobs
+    only transfer the affected chunks. read() and stream() fetch only
+    the chunks that cover the requested range.
+    
+    Chunks are transferred concurrently, but never more than
+    MAX_CONCURRENCY at a time.
+    '''
+    _hgx_DEFAULT_API = ApiID(bytes(63) + b'\x04')
+    _hgx_CHUNK_API = ApiID(bytes(63) + b'\x05')
+    
+    CHUNK_SIZE = 2 ** 20
+    MAX_CONCURRENCY = 4
+    
+    _MANIFEST_MAGIC = b'hgxm'
+    _MANIFEST_VERSION = 1
+    _MANIFEST_HEADER = struct.Struct('>BI')
+    _MANIFEST_ENTRY = struct.Struct('>BI')
+    _DIGEST_LENGTH = hashlib.sha512().digest_size
+    
+    @property
+    def size(self):
+        ''' The total length of the blob, in bytes.
+        '''
+        return sum(chunk.size for chunk in self._hgx_state)
+    
+    @property
+    def chunks(self):
+        ''' The number of chunks in the blob.
+        '''
+        return len(self._hgx_state)
+    
+    @triplicated
+    async def upload(self, source, chunk_size=None):
+        ''' Replace the object's contents with source, and push the new
+        manifest. Source may be bytes-like, or any binary file-like
+        object with a read(size) method; it's consumed a chunk at a
+        time, in the hgxlink's executor.
+        
+        Chunks no longer referenced by the new manifest are deleted. If
+        the upload fails (or is cancelled), any chunks it created are
+        deleted instead, and the object keeps its previous contents.
+        '''
+        if not self._hgx_isalive:
+            raise DeadObject()
+        elif self._hgxlink.whoami != self._hgx_binder:
+            raise LocallyImmutable('No access rights to mutate object.')
+        elif not self._hgx_dynamic:
+            raise LocallyImmutable('Cannot update a static object.')
+        
+        if chunk_size is None:
+            chunk_size = self.CHUNK_SIZE
+        
+        previous = self._hgx_state
+        # Lookup for dedupe: <digest>: <chunk ghid>. This also catches
+        # duplicate chunks within the new upload.
+        existing = {chunk.digest: chunk.ghid for chunk in previous}
+        # Ghids of every chunk this upload actually created
+        created = set()
+        read_chunk = self._chunk_reader(source, chunk_size)
+        window = asyncio.Semaphore(self.MAX_CONCURRENCY)
+        pending = []
+        
+        try:
+            while True:
+                # Wait for a free slot BEFORE reading any further, so that
+                # we never buffer more than the window.
+                await window.acquire()
+                try:
+                    data = await read_chunk()
+                except BaseException:
+                    window.release()
+                    raise
+                
+                if not data:
+                    window.release()
+                    break
+                
+                pending.append(asyncio.ensure_future(
+                    self._put_chunk(data, existing, window, created)
+                ))
+            
+            manifest = tuple(await asyncio.gather(*pending))
+            
+            self._hgx_state = manifest
+            # Old chunks can only go once the new manifest has actually
+            # landed.
+            pushed = await self._hgx_push()
+            if pushed is not None:
+                await pushed
+        
+        except BaseException:
+            self._hgx_state = previous
+            for task in pending:
+                task.cancel()
+            # Wait for the cancellations, so that nothing gets created after
+            # we clean up.
+            await asyncio.gather(*pending, return_exceptions=True)
+            await self._discard_chunks(created)
+            raise
+        
+        orphans = {chunk.ghid for chunk in previous}
+        orphans.difference_update(chunk.ghid for chunk in manifest)
+        await self._map_window(self._hgx_ipc.delete_ghid, orphans)
+    
+    @triplicated
+    async def download(self, sink, offset=0, length=None):
+        ''' Write the contents (or a range thereof) into sink, which
+        must have a write(data) method. Returns the number of bytes
+        written.
+        '''
+        written = 0
+        async for data in self.stream(offset, length):
+            sink.write(data)
+            written += len(data)
+        return written
+    
+    @triplicated
+    async def read(self, offset=0, length=None):
+        ''' Return the contents (or a range thereof) as bytes.
+        '''
+        return b''.join([data async for data in self.stream(offset, length)])
+    
+    async def stream(self, offset=0, length=None):
+        ''' Asynchronously iterate over the contents (or a range
+        thereof), in order, one chunk (or partial chunk) at a time.
+        Chunks are fetched ahead of the consumer, within the window.
+        '''
+        if not self._hgx_isalive:
+            raise DeadObject()
+        
+        spans = iter(self._spans(offset, length))
+        pending = collections.deque()
+        
+        try:
+            for __, span in zip(range(self.MAX_CONCURRENCY), spans):
+                pending.append(asyncio.ensure_future(self._get_chunk(*span)))
+            
+            while pending:
+                data = await pending.popleft()
+                
+                span = next(spans, None)
+                if span is not None:
+                    pending.append(
+                        asyncio.ensure_future(self._get_chunk(*span))
+                    )
+                
+                yield data
+        
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    @triplicated
+    async def share(self, recipient):
+        ''' Share the object, along with every one of its chunks.
+        '''
+        if not self._hgx_isalive:
+            raise DeadObject()
+        elif self._hgx_private:
+            raise Unsharable('Cannot share a private object.')
+        
+        # Chunks go first, so that the recipient can read the whole thing as
+        # soon as it gets the manifest.
+        await self._map_window(
+            lambda ghid: self._hgx_ipc.share_ghid(ghid, recipient),
+            {chunk.ghid for chunk in self._hgx_state}
+        )
+        await self._hgx_share(recipient)
+    
+    @triplicated
+    async def share_many(self, recipients):
+        ''' Share the object, along with every one of its chunks, with
+        many recipients at once.
+        '''
+        if not self._hgx_isalive:
+            raise DeadObject()
+        elif self._hgx_private:
+            raise Unsharable('Cannot share a private object.')
+        
+        recipients = list(recipients)
+        await self._map_window(
+            lambda ghid: self._hgx_ipc.share_many_ghid(ghid, recipients),
+            {chunk.ghid for chunk in self._hgx_state}
+        )
+        await self._hgx_share_many(recipients)
+    
+    def _spans(self, offset, length):
+        ''' Figure out which parts of which chunks cover the requested
+        range. Returns a list of (chunk, start, stop) with start and
+        stop relative to the chunk.
+        '''
+        if offset < 0:
+            raise ValueError('Offset cannot be negative.')
+        
+        if length is None:
+            end = self.size
+        elif length < 0:
+            raise ValueError('Length cannot be negative.')
+        else:
+            end = offset + length
+        
+        spans = []
+        position = 0
+        for chunk in self._hgx_state:
+            chunk_end = position + chunk.size
+            if chunk_end > offset and position < end:
+                spans.append((
+                    chunk,
+                    max(offset - position, 0),
+                    min(end, chunk_end) - position
+                ))
+            elif position >= end:
+                break
+            position = chunk_end
+        
+        return spans
+    
+    async def _put_chunk(self, data, existing, window, created):
+        ''' Upload a single chunk (unless we already have it), and
+        return its manifest entry. The ghids of any newly-created chunks
+        are added to created.
+        '''
+        try:
+            digest = hashlib.sha512(data).digest()
+            
+            try:
+                ghid = existing[digest]
+            
+            except KeyError:
+                ghid = await self._hgx_ipc.new_ghid(
+                    bytes(data),
+                    self._hgx_CHUNK_API,
+                    False,  # dynamic
+                    self._hgx_private,
+                    self._hgx_legroom
+                )
+                existing[digest] = ghid
+                created.add(ghid)
+                # We don't need updates for it (it's static anyways), and we
+                # don't want the service tracking it on our behalf.
+                await self._hgx_ipc.discard_ghid(ghid)
+            
+            return _Chunk(ghid, len(data), digest)
+        
+        finally:
+            window.release()
+    
+    async def _get_chunk(self, chunk, start, stop):
+        ''' Retrieve a single chunk, verify it against the manifest,
+        and return the requested part of it.
+        '''
+        (address,
+         author,
+         state,
+         is_link,
+         api_id,
+         private,
+         dynamic,
+         _legroom) = await self._hgx_ipc.get_ghid(chunk.ghid)
+        await self._hgx_ipc.discard_ghid(chunk.ghid)
+        
+        if (len(state) != chunk.size or
+                hashlib.sha512(state).digest() != chunk.digest):
+            raise IntegrityError(
+                'Chunk ' + str(chunk.ghid) + ' does not match its manifest.'
+            )
+        
+        if start == 0 and stop == chunk.size:
+            return state
+        else:
+            return state[start:stop]
+    
+    async def _map_window(self, coro_func, items):
+        ''' Run coro_func over every item, at most MAX_CONCURRENCY at
+        a time.
+        '''
+        window = asyncio.Semaphore(self.MAX_CONCURRENCY)
+        
+        async def run(item):
+            async with window:
+                await coro_func(item)
+        
+        await asyncio.gather(*[run(item) for item in items])
+    
+    async def _discard_chunks(self, ghids):
+        ''' Delete the chunks left over from a failed upload. Errors are
+        logged rather than raised, so they don't mask the failure.
+        '''
+        try:
+            await self._map_window(self._hgx_ipc.delete_ghid, ghids)
+        
+        except Exception:
+            logger.error(
+                'Failed to clean up chunks after a failed upload w/ '
+                'traceback:\n' + ''.join(traceback.format_exc())
+            )
+    
+    def _chunk_reader(self, source, chunk_size):
+        ''' Return a coroutine function that reads the next chunk from
+        a bytes-like or file-like source, returning an empty chunk once
+        the source is exhausted. File reads run in the executor.
+        '''
+        if hasattr(source, 'read'):
+            async def read_chunk():
+                return (await self._loop.run_in_executor(
+                    self._hgxlink._executor,
+                    source.read,
+                    chunk_size
+                ))
+        
+        else:
+            source = memoryview(source).cast('B')
+            offsets = iter(range(0, len(source), chunk_size))
+            
+            async def read_chunk():
+                start = next(offsets, None)
+                if start is None:
+                    return b''
+                else:
+                    return source[start:start + chunk_size]
+        
+        return read_chunk
+    
+    @classmethod
+    async def hgx_pack(cls, state):
+        ''' Packs the manifest into bytes.
+        '''
+        parts = [
+            cls._MANIFEST_MAGIC,
+            cls._MANIFEST_HEADER.pack(cls._MANIFEST_VERSION, len(state))
+        ]
+        
+        for ghid, size, digest in state:
+            ghid = bytes(ghid)
+            parts.append(cls._MANIFEST_ENTRY.pack(len(ghid), size))
+            parts.append(ghid)
+            parts.append(digest)
+        
+        return b''.join(parts)
+    
+    @classmethod
+    async def hgx_unpack(cls, packed):
+        ''' Unpacks the manifest from bytes.
+        '''
+        packed = memoryview(packed)
+        magic_len = len(cls._MANIFEST_MAGIC)
+        
+        if bytes(packed[:magic_len]) != cls._MANIFEST_MAGIC:
+            raise ValueError('Not a chunk manifest.')
+        
+        version, count = cls._MANIFEST_HEADER.unpack_from(packed, magic_len)
+        if version != cls._MANIFEST_VERSION:
+            raise ValueError('Unknown manifest version: ' + str(version))
+        
+        offset = magic_len + cls._MANIFEST_HEADER.size
+        manifest = []
+        try:
+            for __ in range(count):
+                ghid_len, size = cls._MANIFEST_ENTRY.unpack_from(
+                    packed,
+                    offset
+                )
+                offset += cls._MANIFEST_ENTRY.size
+                
+                ghid = Ghid.from_bytes(bytes(packed[offset:offset + ghid_len]))
+                offset += ghid_len
+                
+                digest = bytes(packed[offset:offset + cls._DIGEST_LENGTH])
+                offset += cls._DIGEST_LENGTH
+                
+                manifest.append(_Chunk(ghid, size, digest))
+        
+        except struct.error as exc:
+            raise ValueError('Truncated manifest.') from exc
+        
+        if offset != len(packed):
+            raise ValueError('Malformed manifest.')
+        
+        return tuple(manifest)
@@ -528,14 +528,21 @@ class PersistenceCore(metaclass=API):
     
     @fixture_noop
     @public_api
-    async def ingest(self, packed, remotable=True, skip_conn=None):
+    async def ingest(self, packed, remotable=True, skip_conn=None,
+                     loaded=None):
         ''' Called on an untrusted and unknown object. May be bypassed
         by locally-created, trusted objects (by calling the individual
         ingest methods directly). Parses, validates, and stores the
         object, and returns True; or, raises an error.
+        
+        If the caller already needed to attempt_load the object, it may
+        pass the result as loaded, to avoid loading it twice.
         '''
         # This may return None, but that will be caught by the KeyError below.
-        obj = await self.attempt_load(packed)
+        if loaded is None:
+            obj = await self.attempt_load(packed)
+        else:
+            obj = loaded
         if obj is None:
             raise MalformedGolixPrimitive(
                 'Packed bytes do not appear to be a Golix primitive.'
@@ -425,7 +425,7 @@ class PostOffice(PostalCore, metaclass=API):
                 # Make this a background task, or one blocking connection can
                 # hold up the entire subscription queue
                 make_background_future(
-                    self._remote_protocol.subscription_update(
+                    self._remote_protocol.deliver(
                         connection,
                         subscription,
                         notification,
@@ -53,6 +53,7 @@ from cryptography.hazmat.backends import default_backend
 # Intra-package dependencies
 from .utils import weak_property
 from .utils import FiniteDict
+from .utils import KeyedAsyncioLock
 
 from .hypothetical import API
 from .hypothetical import public_api
@@ -97,16 +98,40 @@ class Privateer(metaclass=API):
     ''' Lookup system to get secret from ghid. Loopsafe, but NOT
     threadsafe.
     '''
+    # Bounds for the ratchet checkpoint cache: how many proxies to remember,
+    # and how many frames per proxy.
+    CHECKPOINT_PROXIES = 256
+    CHECKPOINT_DEPTH = 32
+    # Heals needing at most this many ratchets are cheaper to just run on
+    # the loop than to hand off to the executor.
+    HEAL_INLINE_LIMIT = 8
+    
     _account = weak_property('__account')
     _golcore = weak_property('__golcore')
     
     @public_api
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, executor=None, **kwargs):
         ''' Temporarily invalidate (but init) the various secrets
         lookups.
+        
+        Long ratchet heals run in the executor (or the loop's default
+        executor, if None).
         '''
         super().__init__(*args, **kwargs)
         
+        self._executor = executor
+        # Serializes heals for any given proxy. Locks are created lazily,
+        # from within the loop, so the loop needn't exist yet.
+        self._heal_locks = KeyedAsyncioLock(loop=None)
+        # Heals requested within the same loop iteration get batched into a
+        # single executor job: list of (job, future).
+        self._heal_batch = None
+        # Ratchet checkpoints: <proxy ghid>: OrderedDict(<target>: <secret>).
+        # These outlive the secrets themselves (which get deprecated and
+        # eventually dropped as frames are GC'd), so that a heal never needs
+        # to re-derive a frame we've already seen.
+        self._checkpoints = FiniteDict(maxlen=self.CHECKPOINT_PROXIES)
+        
         # These must be bootstrapped.
         self._secrets_persistent = None
         self._secrets_quarantine = None
@@ -125,10 +150,12 @@ class Privateer(metaclass=API):
         self._secrets_persistent = {}
         self._secrets_staging = {}
         self._secrets_local = {}
+        self._secrets_deprecated = FiniteDict(maxlen=100)
         self._secrets_quarantine = {}
         self._secrets = collections.ChainMap(
             self._secrets_persistent,
             self._secrets_local,
+            self._secrets_deprecated,
             self._secrets_staging,
             self._secrets_quarantine,
         )
@@ -143,7 +170,9 @@ class Privateer(metaclass=API):
         self._secrets_persistent.clear()
         self._secrets_staging.clear()
         self._secrets_local.clear()
+        self._secrets_deprecated.clear()
         self._secrets_quarantine.clear()
+        self._checkpoints.clear()
             
     def __contains__(self, ghid):
         ''' Check if we think we know a secret for the ghid.
@@ -398,6 +427,11 @@ class Privateer(metaclass=API):
         self._secrets_staging.pop(ghid, None)
         self._secrets_deprecated.pop(ghid, None)
         
+        # Abandoned secrets are usually bad secrets, so don't let a heal
+        # resurrect them.
+        for checkpoints in self._checkpoints.values():
+            checkpoints.pop(ghid, None)
+    
     @fixture_noop
     @public_api
     def deprecate(self, ghid, quiet=True):
@@ -470,9 +504,113 @@ class Privateer(metaclass=API):
         
         NOTE that the binding is the LITEWEIGHT version from the
         librarian already, so its ghid is already the dynamic one.
+        
+        This does all of the HKDF work on the calling thread. From within
+        the event loop, use heal() instead.
+        '''
+        job = self._plan_heal(proxy, target_vector, master_secret)
+        if job is not None:
+            self._stage_healed(proxy, self._derive_chain(*job))
+    
+    @public_api
+    async def heal(self, proxy, target_vector, master_secret=None):
+        ''' Same as heal_chain, but long chains are derived as a single
+        job in the executor, so that healing doesn't block the event
+        loop. Short chains (HEAL_INLINE_LIMIT ratchets or fewer) are
+        derived inline, since the executor round trip costs more than
+        the HKDF work itself. Heals for the same proxy are serialized;
+        heals for different proxies run concurrently.
         '''
+        async with self._heal_locks(proxy):
+            # Plan from within the lock, so that we see anything staged by
+            # the previous heal.
+            job = self._plan_heal(proxy, target_vector, master_secret)
+            if job is None:
+                return
+            
+            elif self._heal_length(*job) <= self.HEAL_INLINE_LIMIT:
+                self._stage_healed(proxy, self._derive_chain(*job))
+                return
+            
+            loop = asyncio.get_event_loop()
+            result = loop.create_future()
+            
+            if self._heal_batch is None:
+                self._heal_batch = []
+                loop.call_soon(self._dispatch_heals, loop)
+            self._heal_batch.append((job, result))
+            
+            self._stage_healed(proxy, await result)
+    
+    def _dispatch_heals(self, loop):
+        ''' Send off everything that was batched since the last dispatch
+        to the executor as a single job.
+        '''
+        batch = self._heal_batch
+        self._heal_batch = None
+        jobs = [job for job, result in batch]
+        
+        def distribute(fut):
+            if fut.cancelled():
+                outcomes = [asyncio.CancelledError()] * len(batch)
+            elif fut.exception() is not None:
+                outcomes = [fut.exception()] * len(batch)
+            else:
+                outcomes = fut.result()
+            
+            for (job, result), outcome in zip(batch, outcomes):
+                # Whoever was waiting on this might have been cancelled.
+                if result.done():
+                    continue
+                elif isinstance(outcome, BaseException):
+                    result.set_exception(outcome)
+                else:
+                    result.set_result(outcome)
+        
+        loop.run_in_executor(
+            self._executor,
+            self._derive_batch,
+            jobs
+        ).add_done_callback(distribute)
+    
+    @classmethod
+    def _derive_batch(cls, jobs):
+        ''' Run _derive_chain for every job, returning the healed secrets
+        (or the error) for each, in order.
+        '''
+        results = []
+        for job in jobs:
+            try:
+                results.append(cls._derive_chain(*job))
+            except Exception as exc:
+                results.append(exc)
+        return results
+    
+    def _plan_heal(self, proxy, target_vector, master_secret):
+        ''' Figure out where a heal needs to start, and snapshot all of
+        the secrets it will need, so that the actual derivation doesn't
+        need to touch any of our state. Returns None if there's nothing
+        to heal, and otherwise the args for _derive_chain.
+        '''
+        target_vector = list(target_vector)
         if len(target_vector) < 1:
             raise RatchetError('Target vector has no historical references.')
+        
+        # Restore anything we've previously derived (or seen) for the proxy,
+        # and checkpoint anything we know now but haven't seen before. That
+        # way the heal only ever needs to ratchet through the new frames.
+        checkpoints = self._checkpoints.setdefault(
+            proxy,
+            collections.OrderedDict()
+        )
+        
+        restored = []
+        for target in target_vector:
+            if target in self._secrets:
+                self._checkpoint(checkpoints, target, self._secrets[target])
+            elif target in checkpoints:
+                restored.append((target, checkpoints[target]))
+        self._stage_healed(proxy, restored)
             
         # Master secret ratchets never break, and can alway recover from the
         # most recent frame. BUT, to increase failure tolerance, we are going
@@ -494,26 +632,89 @@ class Privateer(metaclass=API):
             # secret for
             aktueller_index = available.index(True)
         
+        known = {
+            target: self._secrets[target]
+            for target in target_vector if target in self._secrets
+        }
+        
+        if all(target in known for target in target_vector[:aktueller_index]):
+            return None
+        
+        return proxy, target_vector, aktueller_index, known, master_secret
+    
+    @staticmethod
+    def _heal_length(proxy, target_vector, aktueller_index, known,
+                     master_secret):
+        ''' Count how many ratchets _derive_chain will need to perform
+        for the job.
+        '''
+        return sum(
+            1 for target in target_vector[:aktueller_index]
+            if target not in known
+        )
+    
+    @classmethod
+    def _derive_chain(cls, proxy, target_vector, aktueller_index, known,
+                      master_secret):
+        ''' Ratchet forwards from target_vector[aktueller_index] to the
+        newest target, returning a list of (target, secret) for every
+        target not already in known. Pure function; safe to run in an
+        executor.
+        '''
+        healed = []
+        current = known.get(target_vector[aktueller_index])
+        
         # Go from the oldest to the newest, but start after the first one,
         # because we verified that above.
-        # We can't use reversed(enumerate(target_vector)) without re-casting
-        # target_vector into a dedicated sequence. We'd like to keep the
-        # original iterator, so do it manually.
         for ii in range(aktueller_index - 1, -1, -1):
             target = target_vector[ii]
-            # Skip the first one (deques don't support slicing)
-            # Skip if we already have a secret
-            if target in self._secrets:
+            
+            # Skip if we already have a secret, but remember it, since the
+            # next ratchet (sans master secret) starts from it.
+            if target in known:
+                current = known[target]
                 continue
             
             # Only do something if we don't know the secret
-            else:
-                secret = self.ratchet_chain(
-                    proxy,
-                    current_target = target_vector[ii + 1],
-                    master_secret = master_secret
+            try:
+                current = cls._ratchet(
+                    secret = master_secret if master_secret else current,
+                    proxy = proxy,
+                    salt_ghid = target_vector[ii + 1]
                 )
-                self.stage(target, secret)
+            
+            except Exception:
+                raise RatchetError(
+                    'Failed ratchet for unknown reasons: ' + str(proxy) +
+                    ' from ' + str(target_vector[ii + 1])
+                ) from None
+            
+            healed.append((target, current))
+        
+        return healed
+    
+    def _stage_healed(self, proxy, healed):
+        ''' Stage the results of _derive_chain, checkpointing them as we
+        go.
+        '''
+        checkpoints = self._checkpoints.setdefault(
+            proxy,
+            collections.OrderedDict()
+        )
+        
+        for target, secret in healed:
+            self.stage(target, secret)
+            self._checkpoint(checkpoints, target, secret)
+    
+    def _checkpoint(self, checkpoints, target, secret):
+        ''' Remember a single ratchet state in the proxy's checkpoints,
+        dropping the oldest once we're past CHECKPOINT_DEPTH.
+        '''
+        checkpoints[target] = secret
+        checkpoints.move_to_end(target)
+        
+        while len(checkpoints) > self.CHECKPOINT_DEPTH:
+            checkpoints.popitem(last=False)
         
     @staticmethod
     def _ratchet(secret, proxy, salt_ghid):
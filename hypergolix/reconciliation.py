@@ -0,0 +1,217 @@
+'''
+LICENSING
+-------------------------------------------------
+
+hypergolix: A python Golix client.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the
+    Free Software Foundation, Inc.,
+    51 Franklin Street,
+    Fifth Floor,
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+Anti-entropy set reconciliation helpers.
+
+Each side summarizes its set of ghids as a sorted array of fixed-width
+(64-bit) digests. Since ghid addresses are already cryptographic hashes,
+the digest is just a truncation of the address. The summary is an
+eighth the size of the equivalent ghidlist, and comparing two summaries
+is a vectorised set operation (if NumPy is available), so the expensive
+part of reconciliation -- actually transferring objects -- only scales
+with how far the two sides have diverged.
+'''
+
+# Global dependencies
+import logging
+import heapq
+import operator
+
+# NumPy is optional, but makes comparing large summaries much faster.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# ###############################################
+# Boilerplate
+# ###############################################
+
+
+logger = logging.getLogger(__name__)
+
+# Control * imports.
+__all__ = [
+    'DigestIndex',
+]
+
+
+# ###############################################
+# Library
+# ###############################################
+
+
+class DigestIndex:
+    ''' A sorted array of fixed-width ghid digests. Indices built from
+    ghids remember them (in digest order) as self.ghids, so that
+    positions reported back by the other party can be mapped back onto
+    the original ghids. Indices loaded from bytes have ghids = None.
+    
+    Indices are never modified in place. Instead, batch up changes and
+    apply them all at once with updated(), which costs a single pass
+    over the index (instead of a whole copy per change).
+    '''
+    DIGEST_LEN = 8
+    # Positions are sent as 32-bit unsigned ints
+    POSITION_LEN = 4
+    
+    def __init__(self, ghids=()):
+        self.ghids = sorted(ghids, key=self.digest)
+        digests = [self.digest(ghid) for ghid in self.ghids]
+        
+        if np is None:
+            self._digests = digests
+        else:
+            self._digests = np.array(digests, dtype='>u8')
+    
+    @classmethod
+    def digest(cls, ghid):
+        ''' Get the (integer) digest of a ghid.
+        '''
+        return int.from_bytes(ghid.address[:cls.DIGEST_LEN], 'big')
+    
+    @classmethod
+    def from_bytes(cls, data):
+        ''' Load a digest index from its packed form.
+        '''
+        if len(data) % cls.DIGEST_LEN:
+            raise ValueError('Packed digest index has an invalid length.')
+        
+        self = cls.__new__(cls)
+        self.ghids = None
+        
+        if np is None:
+            self._digests = [
+                int.from_bytes(data[offset:offset + cls.DIGEST_LEN], 'big')
+                for offset in range(0, len(data), cls.DIGEST_LEN)
+            ]
+        else:
+            self._digests = np.frombuffer(data, dtype='>u8')
+        
+        return self
+    
+    def __bytes__(self):
+        if np is None:
+            return b''.join(
+                digest.to_bytes(self.DIGEST_LEN, 'big')
+                for digest in self._digests
+            )
+        else:
+            return self._digests.tobytes()
+    
+    def __len__(self):
+        return len(self._digests)
+    
+    def chunks(self, size):
+        ''' Split the index into consecutive indices of at most size
+        digests each, for example to keep requests under a message size
+        limit. Positions within each chunk start back at zero.
+        '''
+        for start in range(0, len(self), size):
+            chunk = type(self).__new__(type(self))
+            if self.ghids is None:
+                chunk.ghids = None
+            else:
+                chunk.ghids = self.ghids[start:start + size]
+            chunk._digests = self._digests[start:start + size]
+            yield chunk
+    
+    def updated(self, added=(), removed=()):
+        ''' Return a new index with the ghids added and removed. Only
+        valid for indices built from ghids. Does not check for
+        duplicates; removing missing ghids is a no-op.
+        '''
+        removed = set(removed)
+        # Compare the actual ghids, since digests can (very rarely) collide.
+        kept = (
+            (int(digest), ghid)
+            for digest, ghid in zip(self._digests, self.ghids)
+            if ghid not in removed
+        )
+        new = sorted(
+            ((self.digest(ghid), ghid) for ghid in added),
+            key = operator.itemgetter(0)
+        )
+        merged = list(heapq.merge(kept, new, key=operator.itemgetter(0)))
+        
+        updated = type(self).__new__(type(self))
+        updated.ghids = [ghid for __, ghid in merged]
+        digests = [digest for digest, __ in merged]
+        
+        if np is None:
+            updated._digests = digests
+        else:
+            updated._digests = np.array(digests, dtype='>u8')
+        
+        return updated
+    
+    def missing_from(self, other):
+        ''' Return a list of the positions of any of our digests that
+        are missing from the other index.
+        '''
+        if np is None:
+            theirs = set(other._digests)
+            return [
+                position for position, digest in enumerate(self._digests)
+                if digest not in theirs
+            ]
+        
+        else:
+            present = np.isin(self._digests, other._digests)
+            return np.flatnonzero(~present).tolist()
+    
+    @classmethod
+    def pack_positions(cls, positions):
+        ''' Pack a list of positions for transport.
+        '''
+        if np is None:
+            return b''.join(
+                position.to_bytes(cls.POSITION_LEN, 'big')
+                for position in positions
+            )
+        else:
+            return np.array(positions, dtype='>u4').tobytes()
+    
+    @classmethod
+    def unpack_positions(cls, data):
+        ''' Inverse of pack_positions.
+        '''
+        if len(data) % cls.POSITION_LEN:
+            raise ValueError('Packed positions have an invalid length.')
+        
+        if np is None:
+            return [
+                int.from_bytes(data[offset:offset + cls.POSITION_LEN], 'big')
+                for offset in range(0, len(data), cls.POSITION_LEN)
+            ]
+        else:
+            return np.frombuffer(data, dtype='>u4').tolist()
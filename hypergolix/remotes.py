@@ -52,7 +52,12 @@ import weakref
 import collections
 import traceback
 import asyncio
+import functools
 import loopa
+import pathlib
+import base64
+import time
+import os
 
 from loopa.utils import make_background_future
 
@@ -92,15 +97,17 @@ from .exceptions import UnknownToken
 from .exceptions import DispatchError
 from .exceptions import UnknownSecret
 from .exceptions import CommsError
+from .exceptions import RequestUnknown
 from .exceptions import IPCError
 
 from .utils import weak_property
 from .utils import readonly_property
-from .utils import ListMap
 
 from .comms import RequestResponseAPI
 from .comms import request
-from .comms import ConnectionManager
+from .comms import ConnectionPool
+
+from .reconciliation import DigestIndex
 
 
 # ###############################################
@@ -143,9 +150,23 @@ ERROR_CODES = {
 }
 
 
+def _is_unknown_request(exc):
+    ''' Check if the exception is how the other end of a connection
+    fails a request it doesn't know. Over the wire, RequestUnknown is
+    sent with the error code for CommsError, so that's what arrives
+    here. Peers without that error code send a bare
+    HypergolixException instead.
+    '''
+    return (
+        isinstance(exc, RequestUnknown) or
+        type(exc) in {CommsError, HypergolixException}
+    )
+
+
 class RemotePersistenceProtocol(metaclass=RequestResponseAPI,
                                 error_codes=ERROR_CODES,
-                                default_version=b'\x00\x00'):
+                                default_version=b'\x00\x00',
+                                zero_copy=True):
     ''' Defines the protocol for remote persisters.
     '''
     _percore = weak_property('__percore')
@@ -153,7 +174,25 @@ class RemotePersistenceProtocol(metaclass=RequestResponseAPI,
     _postman = weak_property('__postman')
     _salmonator = weak_property('__salmonator')
     
-    @fixture_api
+    # Default size limit (in bytes) for bundling a binding's target with its
+    # subscription update.
+    BUNDLE_THRESHOLD = 16384
+    # Once a get_many response reaches this many bytes, targets are left out
+    # of it. This keeps responses well under the websocket max_size (10 MiB).
+    GET_MANY_BUDGET = 4 * (2 ** 20)
+    
+    @public_api
+    def __init__(self, *args, bundle_threshold=BUNDLE_THRESHOLD, **kwargs):
+        ''' If bundle_threshold is nonzero, subscription updates for
+        dynamic bindings will include the binding's target, as long as
+        it is smaller than the threshold.
+        '''
+        super().__init__(*args, **kwargs)
+        self.bundle_threshold = bundle_threshold
+        # Connections that don't understand bundled subscription updates
+        self._legacy_connections = weakref.WeakSet()
+    
+    @__init__.fixture
     def __init__(self, percore=None, librarian=None, *args, **kwargs):
         super(RemotePersistenceProtocol.__fixture__, self).__init__(
             *args,
@@ -257,6 +296,109 @@ class RemotePersistenceProtocol(metaclass=RequestResponseAPI,
         ghid = Ghid.from_bytes(body)
         return (await self._librarian.retrieve(ghid))
     
+    @public_api
+    @request(b'GM')
+    async def get_many(self, connection, ghids, with_targets=False):
+        ''' Request several objects from the persistence provider in a
+        single round trip. If with_targets is True, the remote will also
+        include the target(s) of any bindings requested, so that (for
+        example) a dynamic binding and its whole target vector can be
+        fetched at once.
+        
+        Objects missing at the remote are silently omitted, so the
+        result may be shorter than ghids. Order is preserved, with any
+        targets immediately following their binding. Targets are also
+        omitted once the response gets too big (see GET_MANY_BUDGET),
+        in which case they need to be requested separately.
+        '''
+        parser = generate_ghidlist_parser()
+        flags = b'\x01' if with_targets else b'\x00'
+        return flags + parser.pack(list(ghids))
+    
+    @get_many.fixture
+    async def get_many(self, connection, ghids, with_targets=False):
+        ''' Fixture to just pull directly from librarian.
+        '''
+        return [
+            bytes(packed) for packed in
+            (await self._collect_many(ghids, with_targets))
+        ]
+    
+    @get_many.request_handler
+    async def get_many(self, connection, body):
+        ''' Handle get_many requests.
+        '''
+        with_targets = body[0:1] == b'\x01'
+        parser = generate_ghidlist_parser()
+        ghids = parser.unpack(bytes(body[1:]))
+        
+        # Length-prefix each object, and let packit gather them into the
+        # response frame.
+        segments = []
+        for packed in (await self._collect_many(ghids, with_targets)):
+            segments.append(len(packed).to_bytes(4, 'big'))
+            segments.append(packed)
+        return segments
+    
+    @get_many.response_handler
+    async def get_many(self, connection, response, exc):
+        ''' Split the response back into the individual objects.
+        '''
+        if exc is not None:
+            raise exc
+        
+        results = []
+        offset = 0
+        while offset < len(response):
+            length = int.from_bytes(response[offset:offset + 4], 'big')
+            offset += 4
+            results.append(response[offset:offset + length])
+            offset += length
+        return results
+    
+    async def _collect_many(self, ghids, with_targets):
+        ''' Retrieve all available objects for a get_many request.
+        Requested objects are always included, but targets only while
+        the response (including length prefixes) fits in the budget.
+        '''
+        results = []
+        size = 0
+        for ghid in ghids:
+            try:
+                packed = await self._librarian.retrieve(ghid)
+                results.append(packed)
+                size += len(packed) + 4
+                
+                if with_targets:
+                    obj = await self._librarian.summarize(ghid)
+                    if isinstance(obj, _GobdLite):
+                        targets = obj.target_vector
+                    elif isinstance(obj, _GobsLite):
+                        targets = [obj.target]
+                    else:
+                        targets = []
+                    
+                    for target in targets:
+                        # Older targets may well have been GC'd already.
+                        if not (await self._librarian.contains(target)):
+                            continue
+                        
+                        packed = await self._librarian.retrieve(target)
+                        if size + len(packed) + 4 > self.GET_MANY_BUDGET:
+                            logger.debug(
+                                str(target) + ' left out of get_many; ' +
+                                'over budget.'
+                            )
+                            continue
+                        
+                        results.append(packed)
+                        size += len(packed) + 4
+            
+            except KeyError:
+                logger.debug(str(ghid) + ' missing for get_many.')
+        
+        return results
+    
     @public_api
     @request(b'+S')
     async def subscribe(self, connection, ghid):
@@ -315,7 +457,9 @@ class RemotePersistenceProtocol(metaclass=RequestResponseAPI,
         ''' Send a subscription update to the connection.
         '''
         payload = await self._librarian.retrieve(notification_ghid)
-        return bytes(subscription_ghid) + payload
+        # Let packit gather these directly into the frame, instead of copying
+        # the payload once here and then again there.
+        return (bytes(subscription_ghid), payload)
         
     @subscription_update.fixture
     async def subscription_update(self, connection, subscription_ghid,
@@ -331,13 +475,115 @@ class RemotePersistenceProtocol(metaclass=RequestResponseAPI,
         '''
         subscribed_ghid = Ghid.from_bytes(body[0:65])
         notification = body[65:]
+        await self._handle_update(connection, subscribed_ghid, notification)
+        return b'\x01'
+    
+    @request(b'!T')
+    async def subscription_bundle(self, connection, subscription_ghid,
+                                  notification_ghid, target_ghid):
+        ''' Send a subscription update to the connection, along with the
+        (dynamic) notification's target.
+        '''
+        payload = await self._librarian.retrieve(notification_ghid)
+        target = await self._librarian.retrieve(target_ghid)
+        return (
+            bytes(subscription_ghid),
+            len(payload).to_bytes(4, 'big'),
+            payload,
+            target
+        )
+    
+    @subscription_bundle.request_handler
+    async def subscription_bundle(self, connection, body):
+        ''' Handles an incoming subscription update with its target.
+        '''
+        subscribed_ghid = Ghid.from_bytes(body[0:65])
+        length = int.from_bytes(body[65:69], 'big')
+        notification = body[69:69 + length]
+        target = body[69 + length:]
+        await self._handle_update(
+            connection,
+            subscribed_ghid,
+            notification,
+            target
+        )
+        return b'\x01'
+    
+    @fixture_noop
+    @public_api
+    async def deliver(self, connection, subscription_ghid, notification_ghid,
+                      timeout=None):
+        ''' Send a subscription update to the connection, bundling in
+        the notification's target when it's small enough and the
+        connection knows how to handle it.
+        '''
+        if self.bundle_threshold and \
+           connection not in self._legacy_connections:
+            target = await self._bundleable_target(notification_ghid)
+            
+            if target is not None:
+                try:
+                    return (await self.subscription_bundle(
+                        connection,
+                        subscription_ghid,
+                        notification_ghid,
+                        target,
+                        timeout = timeout
+                    ))
+                
+                except HypergolixException as exc:
+                    # Connections that predate bundling fail the request as
+                    # unknown.
+                    if not _is_unknown_request(exc):
+                        raise
+                    
+                    self._legacy_connections.add(connection)
+        
+        return (await self.subscription_update(
+            connection,
+            subscription_ghid,
+            notification_ghid,
+            timeout = timeout
+        ))
+    
+    async def _bundleable_target(self, notification_ghid):
+        ''' If the notification is a dynamic binding whose target we have
+        and is under the bundle threshold, return the target's ghid.
+        Otherwise, return None.
+        '''
+        obj = await self._librarian.summarize(notification_ghid)
+        
+        if isinstance(obj, _GobdLite) and \
+           (await self._librarian.contains(obj.target)):
+            packed = await self._librarian.retrieve(obj.target)
+            if len(packed) <= self.bundle_threshold:
+                return obj.target
+        
+        return None
+    
+    async def _handle_update(self, connection, subscribed_ghid, notification,
+                             target=None):
+        ''' Ingest a subscription update. If it's a dynamic binding, and
+        we don't have its target, either use the bundled target, or
+        start fetching it while we're still ingesting the binding.
+        '''
+        prefetch = None
         
         try:
+            obj = await self._percore.attempt_load(notification)
+            
+            if target is None and isinstance(obj, _GobdLite) and \
+               not (await self._librarian.contains(obj.target)):
+                prefetch = asyncio.ensure_future(
+                    self._salmonator.fetch(obj.target)
+                )
+            
             # Note that this handles postman scheduling as well.
             ingested = await self._percore.ingest(
                 notification,
                 remotable = False,
-                skip_conn = connection
+                skip_conn = connection,
+                loaded = obj
             )
             
         except AlreadyDebound as exc:
@@ -354,14 +600,42 @@ class RemotePersistenceProtocol(metaclass=RequestResponseAPI,
             )
             
         else:
+            # Containers must be bound to be ingested, so only now can we
+            # ingest any bundled target.
+            if ingested and target:
+                try:
+                    await self._percore.ingest(
+                        target,
+                        remotable = False,
+                        skip_conn = connection
+                    )
+                
+                except asyncio.CancelledError:
+                    raise
+                
+                except Exception as exc:
+                    logger.info(
+                        'Failed to ingest bundled target for ' +
+                        str(subscribed_ghid) + ': ' + repr(exc)
+                    )
+            
             # But, if ingested, we need to notify the salmonator, so it can (if
             # needed) also acquire the target
             if ingested:
                 make_background_future(
-                    self._salmonator.notify(subscribed_ghid)
+                    self._salmonator.notify(subscribed_ghid, prefetch)
                 )
-        
-        return b'\x01'
+                # The salmonator owns the prefetch now.
+                prefetch = None
+        
+        finally:
+            if prefetch is not None:
+                if prefetch.done():
+                    # Suppress asyncio complaints about unretrieved errors
+                    if not prefetch.cancelled():
+                        prefetch.exception()
+                else:
+                    prefetch.cancel()
         
     @request(b'?S')
     async def query_subscriptions(self, connection):
@@ -471,6 +745,40 @@ class RemotePersistenceProtocol(metaclass=RequestResponseAPI,
         else:
             return True
         
+    @public_api
+    @request(b'RC')
+    async def reconcile(self, connection, index):
+        ''' Send the remote a DigestIndex of our local objects. Returns a
+        list of positions in the index for any objects that the remote
+        does not have (or, for dynamic bindings, that don't match its
+        current frame).
+        '''
+        return bytes(index)
+    
+    @reconcile.fixture
+    async def reconcile(self, connection, index):
+        ''' Compare directly against the librarian.
+        '''
+        theirs = DigestIndex.from_bytes(bytes(index))
+        return theirs.missing_from(await self._librarian.digest_index())
+    
+    @reconcile.request_handler
+    async def reconcile(self, connection, body):
+        ''' Handle reconciliation requests.
+        '''
+        theirs = DigestIndex.from_bytes(body)
+        ours = await self._librarian.digest_index()
+        return DigestIndex.pack_positions(theirs.missing_from(ours))
+    
+    @reconcile.response_handler
+    async def reconcile(self, connection, response, exc):
+        ''' Unpack the positions of the remote's missing objects.
+        '''
+        if exc is not None:
+            raise exc
+        
+        return DigestIndex.unpack_positions(response)
+    
     @request(b'XX')
     async def disconnect(self, connection):
         ''' Terminates all subscriptions and requests.
@@ -485,6 +793,133 @@ class RemotePersistenceProtocol(metaclass=RequestResponseAPI,
         return b'\x01'
 
 
+class _Outbox:
+    ''' A durable FIFO queue of ghids awaiting upload to a single
+    remote. The objects themselves stay in the librarian; only their
+    ghids (65 bytes each, stored back-to-back) are written to disk.
+    
+    If path is None, the outbox is kept in memory only.
+    '''
+    GHID_LEN = 65
+    
+    def __init__(self, path=None):
+        self._path = path
+        self._queue = collections.deque()
+        
+        # Replay statistics
+        self.replayed = 0
+        self.replay_rate = None
+        
+        if path is not None and path.exists():
+            data = path.read_bytes()
+            for offset in range(0, len(data), self.GHID_LEN):
+                record = data[offset:offset + self.GHID_LEN]
+                # Ignore anything truncated by an ill-timed crash
+                if len(record) == self.GHID_LEN:
+                    self._queue.append(Ghid.from_bytes(record))
+    
+    def __len__(self):
+        return len(self._queue)
+    
+    def __bool__(self):
+        return bool(self._queue)
+    
+    def __contains__(self, ghid):
+        return ghid in self._queue
+    
+    def append(self, ghid):
+        ''' Add a ghid to the end of the queue. No-op if it's already
+        waiting, since dynamic ghids are resolved to their most recent
+        frame at replay time anyways.
+        '''
+        if ghid not in self._queue:
+            self._queue.append(ghid)
+            
+            # Records are tiny, so just append them inline.
+            if self._path is not None:
+                with self._path.open('ab') as f:
+                    f.write(bytes(ghid))
+    
+    def peek(self):
+        ''' Return the next ghid in the queue without removing it.
+        '''
+        return self._queue[0]
+    
+    def popleft(self):
+        ''' Remove the next ghid from the queue. Note that this isn't
+        written to disk until the next snapshot.
+        '''
+        return self._queue.popleft()
+    
+    def restore(self, ghids):
+        ''' Put the ghids (in order) back at the front of the queue.
+        '''
+        self._queue.extendleft(reversed(ghids))
+    
+    def clear(self):
+        self._queue.clear()
+        self.snapshot()
+    
+    def snapshot(self):
+        ''' Rewrite the on-disk queue to match the in-memory one.
+        '''
+        if self._path is not None:
+            tmp = self._path.with_suffix('.tmp')
+            tmp.write_bytes(b''.join(bytes(ghid) for ghid in self._queue))
+            os.replace(str(tmp), str(self._path))
+
+
+class _RemoteHealth:
+    ''' Tracks an exponentially-weighted moving average of the latency
+    and error rate of a single remote, plus a window of recent latency
+    samples for percentile estimates.
+    '''
+    ALPHA = .2
+    WINDOW = 64
+    
+    def __init__(self):
+        self.latency = None
+        self.error_rate = 0.
+        self._samples = collections.deque(maxlen=self.WINDOW)
+    
+    def record(self, latency=None, error=False):
+        ''' Record the outcome of a single request. Latency should be
+        None if the remote never answered (ex: connection dropped).
+        '''
+        if latency is not None:
+            self._samples.append(latency)
+            if self.latency is None:
+                self.latency = latency
+            else:
+                self.latency += self.ALPHA * (latency - self.latency)
+        
+        self.error_rate += self.ALPHA * (float(error) - self.error_rate)
+    
+    @property
+    def score(self):
+        ''' Estimated time to a successful response; lower is better.
+        Remotes we haven't heard from yet score zero, so that they get
+        tried (and measured) early.
+        '''
+        if self.latency is None:
+            return 0.
+        elif self.error_rate >= 1:
+            return float('inf')
+        else:
+            return self.latency / (1 - self.error_rate)
+    
+    def percentile(self, pct):
+        ''' Returns the pct (0 to 1) percentile of recent latencies, or
+        None if we have no samples.
+        '''
+        if not self._samples:
+            return None
+        
+        ordered = sorted(self._samples)
+        index = min(int(pct * len(ordered)), len(ordered) - 1)
+        return ordered[index]
+
+
 class Salmonator(loopa.TaskLooper, metaclass=API):
     ''' Responsible for disseminating Golix objects upstream and
     downstream. Handles all comms with them as well.
@@ -494,14 +929,78 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
     _librarian = weak_property('__librarian')
     _remote_protocol = weak_property('__remote_protocol')
     
+    # Maximum number of deferred objects to have in flight at once while
+    # replaying an outbox
+    REPLAY_WINDOW = 8
+    # When hedging pulls, wait until the remote's latency reaches this
+    # percentile before asking the next remote. Until we have latency
+    # samples for a remote, wait the default delay (in seconds) instead.
+    # Never hedge sooner than the minimum delay, so that jitter on very
+    # fast remotes doesn't double our upstream traffic.
+    HEDGE_PERCENTILE = .95
+    HEDGE_DEFAULT_DELAY = .25
+    HEDGE_MIN_DELAY = .05
+    # Order in which to push objects the remote is missing, as found by
+    # reconciliation. Identities come first, because everything else needs
+    # them; bindings before the containers they bind; debindings last.
+    _RECONCILE_ORDER = {
+        _GidcLite: 0,
+        _GobsLite: 1,
+        _GobdLite: 1,
+        _GeocLite: 2,
+        _GarqLite: 3,
+        _GdxxLite: 4
+    }
+    # Containers at least this big (in bytes) are only uploaded after
+    # checking that the remote doesn't already have them.
+    EXISTENCE_CHECK_SIZE = 65536
+    # Maximum number of digests per reconciliation request. At 8 bytes each,
+    # this is 4 MiB, well under the websocket max_size (10 MiB).
+    RECONCILE_CHUNK = 2 ** 19
+    
     @public_api
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, outbox_dir=None, broadcast_pulls=False,
+                 **kwargs):
         ''' Yarp.
+        
+        If outbox_dir is defined, pushes that are deferred until a remote
+        reconnects are recorded there, so that they survive restarts.
+        
+        By default, pulls go to the healthiest remote first, only hedging
+        to the next one if it's slow to respond. If broadcast_pulls is
+        True, every pull goes to every connected remote at once instead.
         '''
         super().__init__(*args, **kwargs)
         
-        self._deferred = ListMap()
+        if outbox_dir is not None:
+            outbox_dir = pathlib.Path(outbox_dir)
+        self._outbox_dir = outbox_dir
+        self._broadcast_pulls = broadcast_pulls
+        
+        # Lookup for <remote>: <_RemoteHealth>
+        self._remote_health = {}
+        self._pulls_hedged = 0
+        # Set of <remote> that don't support get_many
+        self._legacy_remotes = set()
+        # Counters for pushes skipped because the remote had the object
+        self._pushes_skipped = 0
+        self._push_bytes_saved = 0
+        
+        # Lookup for <remote>: <_Outbox>
+        self._outboxes = {}
+        # Set of <remote> with an outbox replay in progress
+        self._replaying = set()
+        # Lookup for <remote>: <DigestIndex as of the last reconciliation>
+        self._reconciled = {}
+        
+        # Lookup for <ghid>: <pull task>, plus counters for pulls
+        self._pulls_in_flight = {}
+        self._pulls_started = 0
+        self._pulls_collapsed = 0
         self._clear_q = None
+        # Ghids with a deregistration queued that haven't since been
+        # re-registered
+        self._pending_clears = set()
         
         self._upstream_remotes = set()
         self._downstream_remotes = set()
@@ -518,6 +1017,12 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
         self._upstream_remotes.clear()
         self._downstream_remotes.clear()
         self._registered.clear()
+        self._pending_clears.clear()
+        self._outboxes.clear()
+        self._replaying.clear()
+        self._remote_health.clear()
+        self._legacy_remotes.clear()
+        self._reconciled.clear()
         
     def assemble(self, golcore, percore, librarian, remote_protocol):
         self._golcore = golcore
@@ -528,19 +1033,89 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
     @fixture_noop
     @public_api
     def add_upstream_remote(self, task_commander, connection_cls, *args,
-                            **kwargs):
-        ''' Adds an upstream remote persister.
+                            lanes=3, **kwargs):
+        ''' Adds an upstream remote persister, using a pool of <lanes>
+        parallel connections to it. Gets, and publishes of anything that
+        can't trigger a subscription update, are spread across the bulk
+        lanes, so that large objects don't block subscription traffic,
+        which stays on the control lane.
+        
         *args and **kwargs will be passed to the task_commander task.
         '''
-        remote = ConnectionManager(
+        remote = ConnectionPool(
             connection_cls = connection_cls,
             msg_handler = self._remote_protocol,
             conn_init = self.restore_connection,
+            lanes = lanes,
+            bulk_requests = {
+                'publish': self._bulk_publish,
+                'get': None,
+                'get_many': None,
+                'reconcile': None
+            }
         )
         # We have to insert the remote before us at the commander, or shutdown
         # will kill the connections before we can clean them up.
-        task_commander.register_task(remote, *args, before_task=self, **kwargs)
+        for lane in remote.lanes:
+            task_commander.register_task(
+                lane,
+                *args,
+                before_task = self,
+                **kwargs
+            )
         self._upstream_remotes.add(remote)
+        self._outboxes[remote] = self._make_outbox(
+            connection_cls.desc_str(*args, **kwargs)
+        )
+    
+    @staticmethod
+    def _bulk_publish(packed, *args, **kwargs):
+        ''' Decide if a publish can go out on a bulk lane. The server
+        doesn't echo subscription updates back to the connection that
+        published the object, but it has no idea which lanes belong to
+        the same pool, so anything that can trigger a subscription
+        update (bindings, debindings, and requests) must be published
+        on the control lane.
+        '''
+        return bytes(packed[:4]) in {b'GIDC', b'GEOC', b'GOBS'}
+    
+    def _make_outbox(self, remote_desc):
+        ''' Create (or reload) the outbox for the described remote.
+        '''
+        if self._outbox_dir is None:
+            path = None
+        
+        else:
+            fname = str(
+                base64.urlsafe_b64encode(remote_desc.encode('utf-8')),
+                'utf-8'
+            )
+            path = self._outbox_dir / (fname + '.outbox')
+        
+        outbox = _Outbox(path)
+        if outbox:
+            logger.info(
+                'Restored ' + str(len(outbox)) + ' deferred pushes for ' +
+                remote_desc
+            )
+        return outbox
+    
+    @public_api
+    def outbox_stats(self):
+        ''' Returns a dict of <remote description>: (<outbox depth>,
+        <last replay rate>). The replay rate is in objects per second,
+        and is None if the outbox has never been replayed.
+        '''
+        return {
+            remote._conn_desc: (len(outbox), outbox.replay_rate)
+            for remote, outbox in self._outboxes.items()
+        }
+    
+    @outbox_stats.fixture
+    def outbox_stats(self):
+        ''' Fixture remotes don't have connection descriptions.
+        '''
+        return {}
         
     def add_downstream_remote(self, persister):
         ''' Adds a downstream persister.
@@ -593,14 +1168,41 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
         remotes when the objects are removed from memory.
         '''
         to_clear = await self._clear_q.get()
-        await self.deregister(to_clear)
+        
+        # If the object was reloaded (and therefore re-registered) while the
+        # deregistration was queued, we need to keep it.
+        if to_clear in self._pending_clears:
+            self._pending_clears.discard(to_clear)
+            await self.deregister(to_clear)
+        else:
+            logger.debug(
+                'Skipping stale deregistration for ' + str(to_clear)
+            )
         
     @fixture_noop
     @public_api
-    async def notify(self, ghid):
+    async def notify(self, ghid, prefetch=None):
         ''' Notify the salmonator that an upstream subscription
         notification was just successfully completed.
+        
+        If the protocol already started fetching the target, prefetch
+        is the (future) packed target.
         '''
+        if prefetch is not None:
+            try:
+                packed = await prefetch
+                if packed is not None:
+                    await self._percore.ingest(packed, remotable=False)
+            
+            except asyncio.CancelledError:
+                raise
+            
+            # If the prefetch didn't work out, we'll just pull it below.
+            except Exception as exc:
+                logger.info(
+                    'Prefetch failed for ' + str(ghid) + ': ' + repr(exc)
+                )
+        
         # If that was a dynamic object, we also need to pull its target.
         obj = await self._librarian.summarize(ghid)
         if isinstance(obj, _GobdLite):
@@ -616,6 +1218,7 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
         subscription when the object leaves local memory. TODO: fix that
         leaky abstraction.
         '''
+        self._pending_clears.discard(ghid)
         obj = await self._librarian.summarize(ghid)
         
         if isinstance(obj, _GobdLite):
@@ -654,6 +1257,7 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
         '''
         logger.debug('_deregister finalizer called for ' + str(ghid))
         if self._clear_q is not None:
+            self._pending_clears.add(ghid)
             # This needs to be a function, not a coro, so use nowait.
             self._clear_q.put_nowait(ghid)
     
@@ -683,21 +1287,29 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
     @fixture_noop
     @public_api
     async def push(self, ghid):
-        ''' Push a single ghid to all remotes.
-        
-        TODO: smartly defer any pushes to unavailable remotes using
-        "if remote.has_connection()"
+        ''' Push a single ghid to all remotes. Any remotes that are
+        unavailable (or that are still catching up on their outbox) will
+        have the push deferred until they are.
         '''
-        data = await self._librarian.retrieve(ghid)
-        
+        data = None
         tasks = set()
         for remote in self._upstream_remotes:
-            if remote.has_connection:
+            outbox = self._outboxes[remote]
+            
+            # Get in line behind anything already in the outbox, so that we
+            # don't push containers before their bindings.
+            if remote.has_connection and not outbox:
+                if data is None:
+                    obj = await self._librarian.summarize(ghid)
+                    data = await self._librarian.retrieve(ghid)
                 tasks.add(
-                    make_background_future(remote.publish(data))
+                    make_background_future(self._publish(remote, obj, data))
                 )
+            
             else:
-                self._deferred.append(remote, data)
+                outbox.append(ghid)
+                if remote.has_connection and remote not in self._replaying:
+                    make_background_future(self._replay_outbox(remote))
             
         # Need to make sure it's not empty
         if tasks:
@@ -706,6 +1318,163 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
                 return_when = asyncio.ALL_COMPLETED
             )
     
+    async def _replay_outbox(self, remote):
+        ''' Push everything in the remote's outbox, keeping up to
+        REPLAY_WINDOW publishes in flight at once.
+        
+        Bindings, debindings, etc can be depended upon by anything
+        queued after them, so nothing else is sent until they complete.
+        Containers, however, can't be depended upon by anything, so
+        consecutive containers are pipelined.
+        '''
+        if remote in self._replaying:
+            return
+        
+        self._replaying.add(remote)
+        outbox = self._outboxes[remote]
+        # Lookup for <ghid>: <publish task>, in order of sending
+        in_flight = collections.OrderedDict()
+        # Set of <publish task> for anything that isn't a container
+        barrier = set()
+        replayed = 0
+        start = time.monotonic()
+        
+        logger.info(
+            'Replaying ' + str(len(outbox)) + ' deferred pushes to ' +
+            remote._conn_desc
+        )
+        
+        try:
+            while outbox or in_flight:
+                if barrier or not outbox or len(in_flight) >= \
+                   self.REPLAY_WINDOW:
+                    await asyncio.wait(
+                        fs = barrier or set(in_flight.values()),
+                        return_when = asyncio.FIRST_COMPLETED
+                    )
+                    replayed += self._reap_replay(in_flight, barrier)
+                    continue
+                
+                ghid = outbox.peek()
+                try:
+                    obj = await self._librarian.summarize(ghid)
+                    data = await self._librarian.retrieve(ghid)
+                
+                except KeyError:
+                    logger.warning(
+                        'Deferred push for ' + str(ghid) + ' is no longer ' +
+                        'available locally; skipping it.'
+                    )
+                    outbox.popleft()
+                    continue
+                
+                outbox.popleft()
+                task = asyncio.ensure_future(self._publish(remote, obj, data))
+                in_flight[ghid] = task
+                if not isinstance(obj, _GeocLite):
+                    barrier.add(task)
+        
+        # Stop anything still in flight and put it back in the outbox, in
+        # order, for next time.
+        except BaseException:
+            for task in in_flight.values():
+                task.cancel()
+            outbox.restore(list(in_flight))
+            raise
+        
+        finally:
+            self._replaying.discard(remote)
+            outbox.snapshot()
+            
+            elapsed = time.monotonic() - start
+            outbox.replayed += replayed
+            if elapsed > 0:
+                outbox.replay_rate = replayed / elapsed
+            
+            logger.info(
+                'Replayed {} deferred pushes to {} in {:.3f} seconds; {} '
+                'remain.'.format(
+                    replayed, remote._conn_desc, elapsed, len(outbox)
+                )
+            )
+    
+    async def _publish(self, remote, obj, data):
+        ''' Publish the object to the remote. Large containers are only
+        uploaded if the remote doesn't already have them. Bindings are
+        always uploaded, since their ghids don't change between frames.
+        '''
+        if isinstance(obj, _GeocLite) and \
+           len(data) >= self.EXISTENCE_CHECK_SIZE:
+            try:
+                exists = await remote.query_existence(obj.ghid)
+            
+            except asyncio.CancelledError:
+                raise
+            
+            # If the query fails, just upload it anyways.
+            except Exception as exc:
+                logger.info(
+                    'Existence query for ' + str(obj.ghid) + ' failed at ' +
+                    remote._conn_desc + ': ' + repr(exc)
+                )
+                exists = False
+            
+            if exists:
+                logger.debug(
+                    str(obj.ghid) + ' already exists at ' + remote._conn_desc +
+                    '; skipping upload.'
+                )
+                self._pushes_skipped += 1
+                self._push_bytes_saved += len(data)
+                return True
+        
+        return (await remote.publish(data))
+    
+    @public_api
+    def push_stats(self):
+        ''' Returns a dict describing how many pushes were skipped because
+        the remote already had the object, and how many bytes of upload
+        that saved.
+        '''
+        return {
+            'skipped': self._pushes_skipped,
+            'bytes_saved': self._push_bytes_saved
+        }
+    
+    def _reap_replay(self, in_flight, barrier):
+        ''' Remove any finished publishes from in_flight and barrier,
+        returning the number of successes. Remote rejections are logged
+        and dropped, but anything else is raised.
+        '''
+        succeeded = 0
+        failure = None
+        
+        for ghid, task in list(in_flight.items()):
+            if not task.done():
+                continue
+            
+            exc = task.exception()
+            # Leave the failed push in flight, so that it gets restored.
+            if exc is not None and not isinstance(exc, RemoteNak):
+                failure = failure or exc
+                continue
+            
+            del in_flight[ghid]
+            barrier.discard(task)
+            
+            if exc is None:
+                succeeded += 1
+            else:
+                logger.warning(
+                    'Remote rejected deferred push for ' + str(ghid) + ': ' +
+                    repr(exc)
+                )
+        
+        if failure is not None:
+            raise failure
+        
+        return succeeded
+    
     @fixture_noop
     @public_api
     async def pull(self, ghid):
@@ -713,31 +1482,152 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
         that this is not meant to be called on a dynamic address, as a
         subs update from a slower remote would always be overridden by
         the faster one.
+        
+        Concurrent pulls for the same ghid are collapsed into a single
+        upstream fetch, which every caller then awaits.
+        '''
+        try:
+            pull = self._pulls_in_flight[ghid]
+        
+        except KeyError:
+            pull = asyncio.ensure_future(self._pull(ghid))
+            pull.add_done_callback(
+                functools.partial(self._pull_finished, ghid)
+            )
+            self._pulls_in_flight[ghid] = pull
+            self._pulls_started += 1
+        
+        else:
+            logger.debug('Collapsing concurrent pull for ' + str(ghid))
+            self._pulls_collapsed += 1
+        
+        # Shield the pull, so that one caller getting cancelled doesn't cancel
+        # it for everyone else.
+        await asyncio.shield(pull)
+    
+    def _pull_finished(self, ghid, pull):
+        ''' Done callback to clean up after a (possibly shared) pull.
+        '''
+        if self._pulls_in_flight.get(ghid) is pull:
+            del self._pulls_in_flight[ghid]
+        
+        # If every caller was cancelled, nobody else will retrieve the
+        # exception, so do it here to suppress asyncio complaints.
+        if not pull.cancelled():
+            pull.exception()
+    
+    @public_api
+    def pull_stats(self):
+        ''' Returns a dict describing how many upstream pulls have been
+        started, how many concurrent pulls were collapsed into them, and
+        how many times a slow remote caused a pull to be hedged.
+        '''
+        return {
+            'started': self._pulls_started,
+            'collapsed': self._pulls_collapsed,
+            'hedged': self._pulls_hedged
+        }
+    
+    @public_api
+    def remote_health(self):
+        ''' Returns a dict of <remote description>: (<latency EWMA>,
+        <error rate EWMA>). Latency is in seconds, and is None if the
+        remote has never answered a pull.
+        '''
+        return {
+            remote._conn_desc: (health.latency, health.error_rate)
+            for remote, health in self._remote_health.items()
+        }
+    
+    @remote_health.fixture
+    def remote_health(self):
+        ''' Fixture remotes don't have connection descriptions.
+        '''
+        return {}
+    
+    def _health(self, remote):
+        ''' Get (or create) the health tracker for the remote.
+        '''
+        try:
+            return self._remote_health[remote]
+        except KeyError:
+            health = _RemoteHealth()
+            self._remote_health[remote] = health
+            return health
+    
+    def _rank_remotes(self):
+        ''' Returns all connected upstream remotes, healthiest first.
+        '''
+        return sorted(
+            (remote for remote in self._upstream_remotes
+             if remote.has_connection),
+            key = lambda remote: self._health(remote).score
+        )
+    
+    def _hedge_delay(self, remote):
+        ''' How long to wait on the remote before hedging to the next.
+        '''
+        delay = self._health(remote).percentile(self.HEDGE_PERCENTILE)
+        if delay is None:
+            delay = self.HEDGE_DEFAULT_DELAY
+        return max(delay, self.HEDGE_MIN_DELAY)
+    
+    async def _pull(self, ghid):
+        ''' Actually perform a pull from upstream.
+        
+        Remotes are tried in order of health. We only move on to the
+        next one if the current remote fails, or if it's taking longer
+        than its usual (percentile) latency, in which case the request
+        is hedged: both stay in flight, and the first success wins. In
+        broadcast mode, all remotes are asked at once.
         '''
         pull_complete = None
-        tasks_available = set()
+        ranked = collections.deque(self._rank_remotes())
+        pending = set()
         task_to_remote = {}
-        for remote in self._upstream_remotes:
-            if remote.has_connection:
+        launch_next = True
+        last_remote = None
+        
+        # Wait until the first successful task completion
+        # Note that this also shields us against having no tasks
+        while not pull_complete:
+            while launch_next and ranked:
+                last_remote = ranked.popleft()
                 task = asyncio.ensure_future(
-                    self._attempt_pull_single(ghid, remote)
+                    self._attempt_pull_single(ghid, last_remote)
                 )
-                tasks_available.add(task)
-                task_to_remote[task] = remote
+                pending.add(task)
+                task_to_remote[task] = last_remote
+                launch_next = self._broadcast_pulls
+            
+            if not pending:
+                break
+            
+            # If there's anyone left to ask, only wait as long as the most
+            # recently-asked remote usually takes.
+            if ranked:
+                timeout = self._hedge_delay(last_remote)
+            else:
+                timeout = None
             
-        # Wait until the first successful task completion
-        # Note that this also shields us against having no tasks
-        while tasks_available and not pull_complete:
             finished, pending = await asyncio.wait(
-                fs = tasks_available,
+                fs = pending,
+                timeout = timeout,
                 return_when = asyncio.FIRST_COMPLETED
             )
-        
+            
+            # Timed out. Hedge the request to the next remote.
+            if not finished:
+                logger.debug(
+                    'Pull from ' + last_remote._conn_desc + ' is slow. '
+                    'Hedging.'
+                )
+                self._pulls_hedged += 1
+                launch_next = True
+            
             # Despite FIRST_COMPLETED, asyncio may return more than one task
             for task in finished:
-                # The task finished, so discard it from the available and reap
-                # any exception
-                tasks_available.discard(task)
+                # The task finished, so reap any exception
                 exc = task.exception()
                 
                 # If there's been an exception, continue waiting for the rest.
@@ -752,7 +1642,7 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
                         ''.join(traceback.format_tb(exc.__traceback__)) +
                         repr(exc)
                     )
-                    pull_complete = None
+                    launch_next = True
                 
                 # Completed successfully, but it could be a 404 (or other
                 # error), which would present as result() = False.
@@ -762,13 +1652,14 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
                 # task's result.
                 elif not pull_complete:
                     pull_complete = task.result()
-                    
+                    launch_next = True
+                
                 # Multiple tasks completed at once. An earlier one was
                 # successful. We need to grab the result to suppress asyncio
                 # complaints.
                 else:
                     task.result()
-                
+        
         # No dice. Either finished is None (no remotes), None (no successful
         # pulls), or False (exactly one remote had the object, but it was
         # unloadable). Raise.
@@ -777,7 +1668,7 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
                 'Object was unavailable or unacceptable at all '
                 'currently-registered remotes.'
             )
-            
+        
         # Log success.
         else:
             logger.debug(
@@ -789,10 +1680,10 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
         for task in pending:
             logger.debug('Cancelling pending pulls.')
             task.cancel()
-            
+        
         # Now handle the result.
         await self._handle_successful_pull(pull_complete)
-            
+    
     async def _handle_successful_pull(self, maybe_obj):
         ''' Dispatches the object in the successful pull.
         
@@ -842,17 +1733,117 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
         successful, put it into the ingestion pipeline.
         '''
         # This may error, but any errors here will be caught by the parent.
-        data = await remote.get(ghid)
+        data, targets = await self._fetch(ghid, remote)
         
         # Call as remotable=False to avoid infinite loops.
         ingested = await self._percore.ingest(data, remotable=False)
         
+        # Containers must be bound before they can be ingested, so do the
+        # targets after the binding. Older targets may no longer be bound at
+        # all, so these are strictly best-effort.
+        for target in targets:
+            try:
+                await self._percore.ingest(target, remotable=False)
+            
+            except asyncio.CancelledError:
+                raise
+            
+            except Exception as exc:
+                logger.debug(
+                    'Failed to ingest prefetched target for ' + str(ghid) +
+                    ': ' + repr(exc)
+                )
+        
         # Note that ingest can either return None, if we already have
         # the object, or the object itself, if it's new.
         if ingested:
             return ingested
         else:
             return True
+    
+    @fixture_noop
+    @public_api
+    async def fetch(self, ghid):
+        ''' Fetch a packed object from upstream, WITHOUT ingesting it.
+        Remotes are tried one at a time, in order of health.
+        '''
+        for remote in self._rank_remotes():
+            try:
+                data, __ = await self._fetch(ghid, remote)
+            
+            except asyncio.CancelledError:
+                raise
+            
+            except Exception as exc:
+                logger.info(
+                    'Error while fetching ' + str(ghid) + ' from remote at ' +
+                    remote._conn_desc + ': ' + repr(exc)
+                )
+            
+            else:
+                return data
+        
+        raise UnavailableUpstream(
+            'Object was unavailable at all currently-registered remotes.'
+        )
+    
+    async def _fetch(self, ghid, remote):
+        ''' Get the object and (if it's a binding) its targets from the
+        remote, recording how the remote did, so that we can rank remotes
+        by health. Returns a tuple of (<packed object>, <list of packed
+        targets>).
+        '''
+        # Note that in 3.6, CancelledError is an Exception, and losing a
+        # hedged race says nothing about the remote's health.
+        health = self._health(remote)
+        start = time.monotonic()
+        try:
+            result = await self._request_object(ghid, remote)
+        
+        except asyncio.CancelledError:
+            raise
+        
+        # A nak means the remote answered, it just didn't have the object.
+        # That's a perfectly healthy round trip, so don't penalize it.
+        except RemoteNak:
+            health.record(time.monotonic() - start)
+            raise
+        
+        except Exception:
+            health.record(error=True)
+            raise
+        
+        else:
+            health.record(time.monotonic() - start)
+            return result
+    
+    async def _request_object(self, ghid, remote):
+        ''' Request the object and its targets from the remote, in a
+        single round trip where supported.
+        '''
+        if remote not in self._legacy_remotes:
+            try:
+                packeds = await remote.get_many([ghid], with_targets=True)
+            
+            except HypergolixException as exc:
+                # Remotes that predate get_many will fail the request as
+                # unknown.
+                if not _is_unknown_request(exc):
+                    raise
+                
+                logger.info(
+                    remote._conn_desc + ' does not support get_many. '
+                    'Falling back to get.'
+                )
+                self._legacy_remotes.add(remote)
+            
+            else:
+                if not packeds:
+                    raise DoesNotExist(str(ghid))
+                
+                return packeds[0], packeds[1:]
+        
+        return (await remote.get(ghid)), []
             
     async def bootstrap(self, account):
         ''' Bootstrapping publishes our identity upstream.
@@ -872,6 +1863,9 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
     async def restore_connection(self, remote, connection):
         ''' Start or re-start a connection.
         '''
+        # The remote may have been upgraded while we were disconnected.
+        self._legacy_remotes.discard(remote)
+        
         # We need to subscribe to our identity if we're restoring a terminated
         # connection. If we haven't bootstrapped though, that will be handled
         # there.
@@ -902,18 +1896,84 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
                 return_when = asyncio.ALL_COMPLETED
             )
         
-        # Now, we need to destructively iterate over our deferreds until the
-        # remote list is exhausted. We have to do this in order, sequentially,
-        # and serially, because eg. containers require bindings, etc.
-        to_push = collections.deque(self._deferred.pop_key(remote))
-        try:
-            while to_push:
-                data = to_push.popleft()
-                await self._remote_protocol.publish(connection, data)
+        # Now catch up on anything we missed while disconnected.
+        await self._replay_outbox(remote)
+        await self.reconcile(remote)
+    
+    async def reconcile(self, remote):
+        ''' Find out which of our local objects the remote is missing
+        (or has a different frame of), and bring both sides up to date.
+        Missing objects are queued in the remote's outbox, and dynamic
+        objects are also pulled, in case the remote has a newer frame.
+        
+        The first reconciliation with a remote sends our whole index.
+        After that, we only send whatever was stored since the previous
+        one (anything queued back then is in the durable outbox anyways).
+        Either way, the index is sent in chunks, to stay under the
+        remote's message size limit.
+        '''
+        index = await self._librarian.digest_index()
+        previous = self._reconciled.get(remote)
+        if previous is None:
+            pending = index
+        else:
+            pending = DigestIndex(
+                index.ghids[position]
+                for position in index.missing_from(previous)
+            )
         
-        # Restore the last to_push, put it back into the deferred list, and
-        # then re-raise
-        except Exception:
-            to_push.appendleft(data)
-            self._deferred.extend(remote, to_push)
-            raise
+        diverged = []
+        for chunk in pending.chunks(self.RECONCILE_CHUNK):
+            try:
+                positions = await remote.reconcile(chunk)
+            
+            except asyncio.CancelledError:
+                raise
+            
+            # Remotes that predate reconciliation will just have to make do
+            # with subscription updates.
+            except Exception as exc:
+                logger.info(
+                    'Failed to reconcile with ' + remote._conn_desc + ': ' +
+                    repr(exc)
+                )
+                return
+            
+            for position in positions:
+                if position >= len(chunk):
+                    logger.warning(
+                        remote._conn_desc + ' returned an invalid ' +
+                        'reconciliation position.'
+                    )
+                    continue
+                
+                try:
+                    diverged.append(
+                        await self._librarian.summarize(chunk.ghids[position])
+                    )
+                
+                # This may have been GC'd in the meantime.
+                except KeyError:
+                    pass
+        
+        self._reconciled[remote] = index
+        logger.info(
+            'Reconciled ' + str(len(pending)) + ' objects with ' +
+            remote._conn_desc + '; ' + str(len(diverged)) + ' diverged.'
+        )
+        
+        # Queue things up in order of dependency, so that (for example)
+        # bindings get there before their containers.
+        diverged.sort(key=lambda obj: self._RECONCILE_ORDER[type(obj)])
+        outbox = self._outboxes[remote]
+        for obj in diverged:
+            outbox.append(obj.ghid)
+        
+        pulls = [
+            self.attempt_pull(obj.ghid, quiet=True) for obj in diverged
+            if isinstance(obj, _GobdLite)
+        ]
+        if pulls:
+            await asyncio.gather(*pulls)
+        
+        await self._replay_outbox(remote)
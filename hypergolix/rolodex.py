@@ -58,6 +58,8 @@ from .persistence import _GdxxLite
 
 from .utils import weak_property
 from .utils import readonly_property
+from .utils import FiniteDict
+from .codec import register_namedtuple
 
 
 # ###############################################
@@ -79,10 +81,10 @@ __all__ = [
 # ###############################################
             
             
-_SharePair = collections.namedtuple(
+_SharePair = register_namedtuple(collections.namedtuple(
     typename = '_SharePair',
     field_names = ('ghid', 'recipient'),
-)
+))
 
 
 class Rolodex(metaclass=API):
@@ -102,10 +104,20 @@ class Rolodex(metaclass=API):
     _salmonator = weak_property('__salmonator')
     _dispatch = weak_property('__dispatch')
     
+    # How many recipient identities to keep around, already loaded.
+    IDENTITY_CACHE_SIZE = 1024
+    # How many share requests share_many creates at once.
+    SHARE_CONCURRENCY = 4
+    
     @public_api
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         
+        # Lookup for <recipient ghid> -> SecondParty. Identities are
+        # content-addressed and therefore immutable, so this never needs
+        # to be invalidated.
+        self._identities = FiniteDict(maxlen=self.IDENTITY_CACHE_SIZE)
+        
         # Persistent dict-like lookup for
         # request_ghid -> (request_target, request recipient)
         self._pending_requests = None
@@ -129,6 +141,7 @@ class Rolodex(metaclass=API):
         self.shared.clear()
         self._pending_requests.clear()
         self._outstanding_shares.clear()
+        self._identities.clear()
         
     @fixture_noop
     @public_api
@@ -186,28 +199,101 @@ class Rolodex(metaclass=API):
         # testing this.
         self.shared[target] = recipient
         
-    async def _hand_object(self, target, recipient):
-        ''' Initiates a handshake request with the recipient.
+    @public_api
+    async def share_many(self, target, recipients, requesting_token):
+        ''' Share a target ghid with every recipient. The container is
+        resolved only once, all of the requests are created
+        concurrently, and the account is flushed only once.
+        
+        Shares with every recipient are attempted, even if some of them
+        fail; the first failure is then re-raised.
         '''
-        if not (await self._librarian.contains(recipient)):
-            await self._salmonator.attempt_pull(recipient, quiet=True)
+        if not isinstance(target, Ghid):
+            raise TypeError(
+                'target must be Ghid or similar.'
+            )
+        for recipient in recipients:
+            if not isinstance(recipient, Ghid):
+                raise TypeError(
+                    'recipient must be Ghid or similar.'
+                )
+        
+        secret = await self._get_share_secret(target)
+        sharepairs = [_SharePair(target, recipient) for recipient in recipients]
+        # Don't flood the executor; past a handful of workers, they just
+        # fight with the event loop over the GIL.
+        window = asyncio.Semaphore(self.SHARE_CONCURRENCY)
+        
+        async def hand_object(sharepair):
+            async with window:
+                await self._hand_object(*sharepair, secret=secret)
+        
+        results = await asyncio.gather(
+            *[hand_object(sharepair) for sharepair in sharepairs],
+            return_exceptions = True
+        )
         
-        recipient_identity = \
-            (await self._librarian.summarize(recipient)).identity
+        failures = []
+        for sharepair, result in zip(sharepairs, results):
+            if isinstance(result, Exception):
+                logger.error(
+                    'Failed to share ' + str(sharepair.ghid) + ' with ' +
+                    str(sharepair.recipient) + ': ' + repr(result)
+                )
+                failures.append(result)
+            
+            elif requesting_token is not None:
+                self._outstanding_shares.add(sharepair, requesting_token)
         
+        if requesting_token is not None and len(failures) < len(results):
+            await self._account.flush()
+        
+        if failures:
+            raise failures[0]
+    
+    @share_many.fixture
+    async def share_many(self, target, recipients, requesting_token):
+        ''' Same as share_object.
+        '''
+        for recipient in recipients:
+            self.shared[target] = recipient
+        
+    async def _get_identity(self, recipient):
+        ''' Get the SecondParty for the recipient, pulling its identity
+        container if we don't already have it.
+        '''
+        try:
+            return self._identities[recipient]
+        
+        except KeyError:
+            if not (await self._librarian.contains(recipient)):
+                await self._salmonator.attempt_pull(recipient, quiet=True)
+            
+            identity = (await self._librarian.summarize(recipient)).identity
+            self._identities[recipient] = identity
+            return identity
+    
+    async def _get_share_secret(self, target):
+        ''' Get the container secret for the target.
+        '''
         # This is guaranteed to resolve the container fully.
         container_ghid = await self._ghidproxy.resolve(target)
+        return self._privateer.get(container_ghid)
         
-        # TODO: fix Golix library so this isn't such a shitshow re:
-        # breaking abstraction barriers.
-        handshake = self._golcore._identity.make_handshake(
-            target = target,
-            secret = self._privateer.get(container_ghid)
-        )
+    async def _hand_object(self, target, recipient, secret=None):
+        ''' Initiates a handshake request with the recipient. If the
+        target's secret is already known, pass it, to skip resolving
+        the container.
+        '''
+        recipient_identity = await self._get_identity(recipient)
         
-        request = self._golcore._identity.make_request(
+        if secret is None:
+            secret = await self._get_share_secret(target)
+        
+        request = await self._golcore.make_share_request(
             recipient = recipient_identity,
-            request = handshake
+            target = target,
+            secret = secret
         )
         
         # Note that this must be called before publishing to the persister, or
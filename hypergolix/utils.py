@@ -39,6 +39,7 @@ import asyncio
 import signal
 import sys
 import time
+import hashlib
 # Used for random token creation
 import random
 
@@ -49,6 +50,7 @@ from golix import Ghid
 # Utils may only import from .exceptions or .bases (except the latter doesn't
 # yet exist)
 from .exceptions import HandshakeError
+from .exceptions import DeltaMismatch
 
 
 # ###############################################
@@ -1789,6 +1791,84 @@ def ensure_equal_len(iterable, msg=''):
 # ###############################################
             
 
+# States smaller than this (in bytes) aren't worth making deltas for.
+DELTA_MIN_SIZE = 1024
+# Digest, prefix length, and suffix length
+_DELTA_HEADER = hashlib.sha512().digest_size + 8
+_DELTA_BLOCK = 2 ** 16
+
+
+def _common_prefix(a, b):
+    ''' Returns the length of the longest common prefix of a and b.
+    Compares big blocks first, so that we only bisect the block with
+    the first difference.
+    '''
+    limit = min(len(a), len(b))
+    start = 0
+    while start < limit and (a[start:start + _DELTA_BLOCK] ==
+                             b[start:start + _DELTA_BLOCK]):
+        start += _DELTA_BLOCK
+    
+    if start >= limit:
+        return limit
+    
+    low = start
+    high = min(start + _DELTA_BLOCK, limit)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[start:mid] == b[start:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    
+    return low
+
+
+def make_delta(base, state):
+    ''' Describes state as a binary delta against base: everything in
+    state between the longest common prefix and suffix of the two.
+    Returns None if the delta wouldn't be much smaller than state.
+    
+    General format:
+    digest      64B     sha512 of base
+    prefix      4B      int32 unsigned; bytes kept from start of base
+    suffix      4B      int32 unsigned; bytes kept from end of base
+    middle      ?B      bytes (implicit length)
+    '''
+    if len(state) < DELTA_MIN_SIZE:
+        return None
+    
+    prefix = _common_prefix(base, state)
+    suffix = _common_prefix(base[prefix:][::-1], state[prefix:][::-1])
+    middle = state[prefix:len(state) - suffix]
+    
+    if len(middle) + _DELTA_HEADER > len(state) // 2:
+        return None
+    
+    return (hashlib.sha512(base).digest() +
+            prefix.to_bytes(length=4, byteorder='big') +
+            suffix.to_bytes(length=4, byteorder='big') +
+            middle)
+
+
+def apply_delta(base, delta):
+    ''' Inverse of make_delta. Raises DeltaMismatch if the delta was
+    made against anything other than base.
+    '''
+    digest = delta[:_DELTA_HEADER - 8]
+    prefix = int.from_bytes(delta[_DELTA_HEADER - 8:_DELTA_HEADER - 4], 'big')
+    suffix = int.from_bytes(delta[_DELTA_HEADER - 4:_DELTA_HEADER], 'big')
+    
+    if base is None or hashlib.sha512(base).digest() != digest:
+        raise DeltaMismatch('Delta was made against a different version.')
+    elif prefix + suffix > len(base):
+        raise DeltaMismatch('Delta does not fit its base.')
+    
+    return (base[:prefix] +
+            delta[_DELTA_HEADER:] +
+            base[len(base) - suffix:])
+
+
 def _block_on_result(future):
     ''' Wait for the result of an asyncio future from synchronous code.
     Returns it as soon as available.
@@ -117,6 +117,8 @@ setup(
     extras_require={
         'dev': [],
         'test': [],
+        # Vectorised set reconciliation with remotes
+        'numpy': ['numpy>=1.13'],
     },
 
     # If there are data files included in your packages that need to be
@@ -32,6 +32,7 @@ hypergolix: A python Golix client.
 '''
 
 import unittest
+import asyncio
 import logging
 import concurrent.futures
 
@@ -66,6 +67,7 @@ from hypergolix.persistence import _GidcLite
 # ###############################################
 
 
+from _fixtures.ghidutils import make_random_ghid
 from _fixtures.identities import TEST_AGENT1
 from _fixtures.identities import TEST_READER1
 gidc = TEST_READER1.packed
@@ -201,6 +203,16 @@ class AccountTest(unittest.TestCase):
             loop = self.nooploop._loop
         )
         
+        # Put something into the (sharded) account containers
+        incoming = {make_random_ghid() for __ in range(8)}
+        self.account.dispatch_incoming.update(incoming)
+        outstanding = make_random_ghid()
+        self.account.rolodex_outstanding.add(outstanding, 1)
+        await_coroutine_threadsafe(
+            coro = self.account.flush(),
+            loop = self.nooploop._loop
+        )
+        
         golcore2 = GolixCore.__fixture__(
             TEST_AGENT1,
             librarian = self.librarian
@@ -272,6 +284,92 @@ class AccountTest(unittest.TestCase):
             privateer2
         )
         
+        # And make sure the sharded content came along
+        self.assertEqual(set(account2.dispatch_incoming), incoming)
+        self.assertTrue(
+            account2.rolodex_outstanding.contains_within(outstanding, 1)
+        )
+
+    
+    def test_flush_coalescing(self):
+        ''' Make sure bursts of flushes only push dirty components, and
+        only once.
+        '''
+        await_coroutine_threadsafe(
+            coro = self.account.bootstrap(),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = self.account.flush(),
+            loop = self.nooploop._loop
+        )
+        self.assertFalse(
+            any(gao.dirty for gao in self.account._containers)
+        )
+        
+        pushes = []
+        for gao in self.account._containers:
+            def counting_push(gao=gao, push=gao.push):
+                pushes.append(gao)
+                return push()
+            gao.push = counting_push
+        
+        self.account.dispatch_incoming.add(make_random_ghid())
+        self.account.dispatch_tokens.add(make_random_ghid())
+        
+        async def burst():
+            await asyncio.gather(*(self.account.flush() for __ in range(10)))
+        
+        await_coroutine_threadsafe(
+            coro = burst(),
+            loop = self.nooploop._loop
+        )
+        
+        self.assertEqual(len(pushes), 2)
+        self.assertIn(self.account.dispatch_incoming, pushes)
+        self.assertIn(self.account.dispatch_tokens, pushes)
+        self.assertFalse(
+            any(gao.dirty for gao in self.account._containers)
+        )
+        
+        # Nothing dirty means nothing pushed
+        await_coroutine_threadsafe(
+            coro = self.account.flush(),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(len(pushes), 2)
+    
+    def test_flush_failure(self):
+        ''' Make sure failed pushes reach anyone waiting on the flush,
+        and are retried by the next one.
+        '''
+        await_coroutine_threadsafe(
+            coro = self.account.bootstrap(),
+            loop = self.nooploop._loop
+        )
+        gao = self.account.dispatch_tokens
+        push = gao.push
+        
+        async def failing_push():
+            gao._mutated = False
+            raise ValueError()
+        
+        gao.push = failing_push
+        gao.add(make_random_ghid())
+        with self.assertRaises(ValueError):
+            await_coroutine_threadsafe(
+                coro = self.account.flush(),
+                loop = self.nooploop._loop
+            )
+        self.assertTrue(gao.dirty)
+        
+        gao.push = push
+        await_coroutine_threadsafe(
+            coro = self.account.flush(),
+            loop = self.nooploop._loop
+        )
+        self.assertFalse(gao.dirty)
+
 
 if __name__ == "__main__":
     from hypergolix import logutils
@@ -0,0 +1,146 @@
+'''
+Scratchpad for test-based development.
+
+LICENSING
+-------------------------------------------------
+
+hypergolix: A python Golix client.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+    
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+    
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+    
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the
+    Free Software Foundation, Inc.,
+    51 Franklin Street,
+    Fifth Floor,
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+
+import unittest
+import collections
+import pickle
+
+from golix import Ghid
+
+from hypergolix import codec
+from hypergolix.utils import SetMap
+from hypergolix.utils import AppToken
+
+
+# ###############################################
+# Testing fixtures
+# ###############################################
+
+
+from _fixtures.ghidutils import make_random_ghid
+from _fixtures.identities import TEST_AGENT1
+
+
+_Pair = codec.register_namedtuple(collections.namedtuple(
+    typename = '_Pair',
+    field_names = ('ghid', 'recipient'),
+))
+
+
+# ###############################################
+# Testing
+# ###############################################
+
+
+class CodecTest(unittest.TestCase):
+    ''' Test the compact GAO state codec.
+    '''
+    
+    def test_secrets(self):
+        secrets = {
+            make_random_ghid(): TEST_AGENT1.new_secret() for __ in range(100)
+        }
+        packed = codec.dumps(secrets)
+        
+        self.assertTrue(codec.is_encoded(packed))
+        self.assertEqual(codec.loads(packed), secrets)
+        # Fixed-width ghid and secret arrays, plus a little framing.
+        self.assertLess(len(packed), 100 * (65 + 53) + 32)
+        self.assertLess(len(packed), len(pickle.dumps(secrets, protocol=4)))
+    
+    def test_mixed(self):
+        setmap = SetMap()
+        setmap.add(_Pair(make_random_ghid(), make_random_ghid()),
+                   AppToken.pseudorandom())
+        setmap.update(make_random_ghid(), {1, -2 ** 70, 'foo'})
+        
+        state = {
+            None: 1,
+            'abc': (make_random_ghid(), TEST_AGENT1.new_secret()),
+            -300: [True, False, None, b'bar', 'bäz'],
+            make_random_ghid(): {make_random_ghid(), make_random_ghid()},
+            AppToken.pseudorandom(): frozenset(),
+        }
+        self.assertEqual(codec.loads(codec.dumps(state)), state)
+        
+        loaded = codec.loads(codec.dumps(setmap))
+        self.assertIsInstance(loaded, SetMap)
+        self.assertEqual(loaded._mapping, setmap._mapping)
+        pair, = (key for key in loaded._mapping if not isinstance(key, Ghid))
+        self.assertIsInstance(pair, _Pair)
+    
+    def test_rejects(self):
+        with self.assertRaises(TypeError):
+            codec.dumps({make_random_ghid(): 1.5})
+        
+        # Unregistered namedtuples, too
+        with self.assertRaises(TypeError):
+            codec.dumps(collections.namedtuple('Nope', 'foo')(1))
+        
+        packed = codec.dumps({make_random_ghid(): TEST_AGENT1.new_secret()})
+        with self.assertRaises(ValueError):
+            codec.loads(packed[:-1])
+        with self.assertRaises(ValueError):
+            codec.loads(packed + b'\x00')
+        with self.assertRaises(ValueError):
+            codec.loads(pickle.dumps({}))
+    
+    def test_validates(self):
+        ''' Every decoded ghid and secret must be validated, not just the
+        first of each column.
+        '''
+        ghids = [make_random_ghid() for __ in range(3)]
+        packed = codec.dumps(ghids)
+        # Swap the algo of the last ghid for one that doesn't exist.
+        offset = packed.index(bytes(ghids[-1]))
+        corrupt = packed[:offset] + b'\xff' + packed[offset + 1:]
+        with self.assertRaises(ValueError):
+            codec.loads(corrupt)
+        
+        secrets = [TEST_AGENT1.new_secret() for __ in range(3)]
+        packed = codec.dumps(secrets)
+        # Bump the version of the last secret to one that doesn't exist.
+        offset = packed.rindex(b'SH')
+        corrupt = packed[:offset + 2] + b'\xff\xff' + packed[offset + 4:]
+        with self.assertRaises(ValueError):
+            codec.loads(corrupt)
+
+
+if __name__ == "__main__":
+    from hypergolix import logutils
+    logutils.autoconfig(loglevel='debug')
+    
+    unittest.main()
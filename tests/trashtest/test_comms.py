@@ -0,0 +1,307 @@
+'''
+Scratchpad for test-based development.
+
+LICENSING
+-------------------------------------------------
+
+hypergolix: A python Golix client.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the
+    Free Software Foundation, Inc.,
+    51 Franklin Street,
+    Fifth Floor,
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+import unittest
+import asyncio
+
+from loopa import NoopLoop
+from loopa import TaskCommander
+from loopa.utils import await_coroutine_threadsafe
+
+from hypergolix.comms import RequestResponseProtocol
+from hypergolix.comms import request
+from hypergolix.comms import ConnectionPool
+
+
+# ###############################################
+# Testing fixtures
+# ###############################################
+
+
+# Body sizes from 1 KiB through the 10 MiB websocket frame limit
+BODY_SIZES = [2 ** power for power in range(10, 24, 2)] + [10 * 2 ** 20]
+
+
+class CopyingProtocol(metaclass=RequestResponseProtocol,
+                      default_version=b'\x00\x00'):
+    ''' Simple echo protocol that uses bytes bodies.
+    '''
+    
+    @request(b'EC')
+    async def echo(self, connection, msg):
+        return msg
+        
+    @echo.request_handler
+    async def echo(self, connection, body):
+        return body
+        
+        
+class ZeroCopyProtocol(metaclass=RequestResponseProtocol,
+                       default_version=b'\x00\x00', zero_copy=True):
+    ''' Simple echo protocol that uses memoryview bodies.
+    '''
+    
+    @request(b'EC')
+    async def echo(self, connection, msg):
+        return msg
+        
+    @echo.request_handler
+    async def echo(self, connection, body):
+        return body
+
+
+class PoolProtocol(metaclass=RequestResponseProtocol,
+                   default_version=b'\x00\x00'):
+    ''' Records which connection every request arrived on.
+    '''
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.seen = []
+    
+    @request(b'EC')
+    async def echo(self, connection, msg):
+        return msg
+    
+    @echo.request_handler
+    async def echo(self, connection, body):
+        self.seen.append(connection)
+        return body
+    
+    @request(b'PG')
+    async def ping(self, connection):
+        return b''
+    
+    @ping.request_handler
+    async def ping(self, connection, body):
+        self.seen.append(connection)
+        return b''
+
+
+class _LoopbackConnection:
+    ''' Connects straight through to a server protocol in the same
+    event loop, without any actual networking.
+    '''
+    
+    def __init__(self, receiver=None):
+        self.peer = None
+        self.receiver = receiver
+        self._closed = asyncio.Event()
+    
+    @classmethod
+    def desc_str(cls, server):
+        return 'Loopback'
+    
+    @classmethod
+    async def new(cls, server):
+        client = cls()
+        remote = cls(server)
+        client.peer = remote
+        remote.peer = client
+        return client
+    
+    async def send(self, msg):
+        peer = self.peer
+        asyncio.ensure_future(peer.receiver(peer, bytes(msg)))
+    
+    async def listen_forever(self, receiver):
+        self.receiver = receiver
+        await self._closed.wait()
+    
+    async def close(self):
+        self._closed.set()
+
+
+# ###############################################
+# Testing
+# ###############################################
+
+
+class FramingTest(unittest.TestCase):
+    ''' Test message framing (packing and unpacking).
+    '''
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.nooploop = NoopLoop(
+            debug = True,
+            threaded = True
+        )
+        cls.nooploop.start()
+        
+    @classmethod
+    def tearDownClass(cls):
+        # Kill the running loop.
+        cls.nooploop.stop_threadsafe_nowait()
+        
+    def _roundtrip(self, protocol, body):
+        ''' Pack and then unpack the body.
+        '''
+        token = protocol._new_request_token(self)
+        msg = await_coroutine_threadsafe(
+            coro = protocol.packit(b'EC', token, body),
+            loop = self.nooploop._loop
+        )
+        code, token2, body2 = await_coroutine_threadsafe(
+            coro = protocol.unpackit(msg),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(code, b'EC')
+        self.assertEqual(token, token2)
+        return msg, body2
+        
+    def test_copying(self):
+        ''' Non-zero-copy protocols must always return bytes.
+        '''
+        protocol = CopyingProtocol()
+        
+        for size in BODY_SIZES:
+            body = bytes(size)
+            msg, body2 = self._roundtrip(protocol, body)
+            self.assertIsInstance(body2, bytes)
+            self.assertEqual(body, body2)
+        
+    def test_zero_copy(self):
+        ''' Zero-copy protocols must return views into the message.
+        '''
+        protocol = ZeroCopyProtocol()
+        
+        for size in BODY_SIZES:
+            body = bytes(size)
+            msg, body2 = self._roundtrip(protocol, body)
+            self.assertIsInstance(body2, memoryview)
+            self.assertIs(body2.obj, msg)
+            self.assertEqual(len(msg), 6 + size)
+            self.assertEqual(body, body2)
+            
+    def test_gather(self):
+        ''' Segmented bodies must be gathered into a single frame.
+        '''
+        protocol = ZeroCopyProtocol()
+        
+        for size in BODY_SIZES:
+            head = bytes(range(65))
+            tail = memoryview(bytes(size))
+            msg, body2 = self._roundtrip(protocol, (head, tail))
+            self.assertEqual(len(body2), 65 + size)
+            self.assertEqual(body2[:65], head)
+            self.assertEqual(body2[65:], tail)
+
+
+class ConnectionPoolTest(unittest.TestCase):
+    ''' Test lane selection within connection pools.
+    '''
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.commander = TaskCommander(
+            reusable_loop = False,
+            threaded = True,
+            debug = True,
+            thread_kwargs = {'name': 'pool'}
+        )
+        cls.server = PoolProtocol()
+        cls.inits = []
+        
+        async def conn_init(pool, connection):
+            cls.inits.append(pool)
+        
+        cls.pool = ConnectionPool(
+            connection_cls = _LoopbackConnection,
+            msg_handler = PoolProtocol(),
+            conn_init = conn_init,
+            lanes = 3,
+            bulk_requests = {
+                'echo': lambda msg, **kwargs: msg.startswith(b'bulk')
+            }
+        )
+        for lane in cls.pool.lanes:
+            cls.commander.register_task(lane, server=cls.server)
+        
+        cls.commander.start()
+        for lane in cls.pool.lanes:
+            await_coroutine_threadsafe(
+                coro = asyncio.wait_for(lane.await_connection(), timeout=5),
+                loop = cls.commander._loop
+            )
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.commander.stop_threadsafe_nowait()
+    
+    def request(self, name, *args):
+        ''' Make a request through the pool, and return the lane that
+        the server saw it on.
+        '''
+        await_coroutine_threadsafe(
+            coro = getattr(self.pool, name)(*args, timeout=1),
+            loop = self.commander._loop
+        )
+        server_conn = self.server.seen[-1]
+        for lane in self.pool.lanes:
+            if lane._connection is server_conn.peer:
+                return lane
+    
+    def test_routing(self):
+        control = self.pool.control_lane
+        self.assertIs(self.request('ping'), control)
+        self.assertIs(self.request('echo', b'control'), control)
+        self.assertIn(self.request('echo', b'bulk'), self.pool.bulk_lanes)
+        self.assertIsNot(control, self.pool.bulk_lanes[0])
+        self.assertFalse(any(self.pool._in_flight.values()))
+    
+    def test_init(self):
+        # conn_init runs in the background, so give it a moment.
+        async def wait_for_init():
+            while not self.inits:
+                await asyncio.sleep(.01)
+            await asyncio.sleep(.05)
+        
+        await_coroutine_threadsafe(
+            coro = asyncio.wait_for(wait_for_init(), timeout=1),
+            loop = self.commander._loop
+        )
+        # Only the control lane initializes the connection, with the pool.
+        self.assertEqual(self.inits, [self.pool])
+        for lane in self.pool.bulk_lanes:
+            self.assertIsNone(lane.conn_init)
+            self.assertIsNone(lane.conn_close)
+
+
+if __name__ == "__main__":
+    from hypergolix import logutils
+    logutils.autoconfig(loglevel='debug')
+    
+    unittest.main()
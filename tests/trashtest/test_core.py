@@ -0,0 +1,232 @@
+'''
+Scratchpad for test-based development.
+
+LICENSING
+-------------------------------------------------
+
+hypergolix: A python Golix client.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+    
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+    
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+    
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the
+    Free Software Foundation, Inc.,
+    51 Franklin Street,
+    Fifth Floor,
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+
+import unittest
+import types
+import asyncio
+import concurrent.futures
+
+from loopa import NoopLoop
+from loopa.utils import await_coroutine_threadsafe
+
+from hypergolix.core import GolixCore
+from hypergolix.core import GhidProxier
+from hypergolix.librarian import LibrarianCore
+from hypergolix.exceptions import ProxyDepthExceeded
+
+from hypergolix.persistence import _GeocLite
+from hypergolix.persistence import _GobdLite
+
+
+# ###############################################
+# Testing fixtures
+# ###############################################
+
+
+from _fixtures.ghidutils import make_random_ghid
+from _fixtures.identities import TEST_AGENT1
+
+from _fixtures.remote_exchanges import cont1_1  # Container
+from _fixtures.remote_exchanges import cont1_2  # Container
+from _fixtures.remote_exchanges import dyn1_1a  # Dynamic binding frame 1
+from _fixtures.remote_exchanges import dyn1_1b  # Dynamic binding frame 2
+
+geoc1_1 = _GeocLite.from_golix(cont1_1)
+geoc1_2 = _GeocLite.from_golix(cont1_2)
+gobd1_a = _GobdLite.from_golix(dyn1_1a)
+gobd1_b = _GobdLite.from_golix(dyn1_1b)
+
+
+class _LoopyLibrarian:
+    ''' A librarian where every ghid is a binding to itself.
+    '''
+    
+    def add_binding_listener(self, callback):
+        pass
+    
+    async def summarize(self, ghid):
+        return types.SimpleNamespace(ghid=ghid, target=ghid)
+
+
+# ###############################################
+# Testing
+# ###############################################
+
+
+class GhidProxierTest(unittest.TestCase):
+    ''' Test ghid resolution (and its caching).
+    '''
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.nooploop = NoopLoop(
+            debug = True,
+            threaded = True
+        )
+        cls.nooploop.start()
+    
+    @classmethod
+    def tearDownClass(cls):
+        # Kill the running loop.
+        cls.nooploop.stop_threadsafe_nowait()
+    
+    def setUp(self):
+        self.librarian = LibrarianCore.__fixture__()
+        self.ghidproxy = GhidProxier()
+        self.ghidproxy.assemble(self.librarian)
+    
+    def _store(self, obj, data):
+        await_coroutine_threadsafe(
+            coro = self.librarian.store(obj, data),
+            loop = self.nooploop._loop
+        )
+    
+    def _resolve(self, ghid):
+        return await_coroutine_threadsafe(
+            coro = self.ghidproxy.resolve(ghid),
+            loop = self.nooploop._loop
+        )
+    
+    def test_cache(self):
+        self._store(geoc1_1, cont1_1.packed)
+        self._store(geoc1_2, cont1_2.packed)
+        self._store(gobd1_a, dyn1_1a.packed)
+        
+        self.assertEqual(self._resolve(gobd1_a.ghid), geoc1_1.ghid)
+        self.assertEqual(self._resolve(geoc1_1.ghid), geoc1_1.ghid)
+        self.assertIn(gobd1_a.ghid, self.ghidproxy._cache)
+        # Containers are never cached
+        self.assertNotIn(geoc1_1.ghid, self.ghidproxy._cache)
+        
+        # Updating the binding must invalidate the cache
+        self._store(gobd1_b, dyn1_1b.packed)
+        self.assertNotIn(gobd1_a.ghid, self.ghidproxy._cache)
+        self.assertEqual(self._resolve(gobd1_a.ghid), geoc1_2.ghid)
+        
+        # As must abandoning it
+        await_coroutine_threadsafe(
+            coro = self.librarian.abandon(gobd1_b),
+            loop = self.nooploop._loop
+        )
+        self.assertNotIn(gobd1_a.ghid, self.ghidproxy._cache)
+    
+    def test_missing(self):
+        ''' Unknown ghids resolve to themselves, but aren't cached.
+        '''
+        ghid = make_random_ghid()
+        self.assertEqual(self._resolve(ghid), ghid)
+        self.assertNotIn(ghid, self.ghidproxy._cache)
+    
+    def test_depth(self):
+        librarian = _LoopyLibrarian()
+        self.ghidproxy.assemble(librarian)
+        
+        with self.assertRaises(ProxyDepthExceeded):
+            self._resolve(make_random_ghid())
+
+
+class GolixCoreTest(unittest.TestCase):
+    ''' Test the executor side of the golix core.
+    '''
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.nooploop = NoopLoop(
+            debug = True,
+            threaded = True
+        )
+        cls.nooploop.start()
+    
+    @classmethod
+    def tearDownClass(cls):
+        # Kill the running loop.
+        cls.nooploop.stop_threadsafe_nowait()
+    
+    def setUp(self):
+        self.executor = concurrent.futures.ThreadPoolExecutor(4)
+        self.golcore = GolixCore(
+            executor = self.executor,
+            loop = self.nooploop._loop
+        )
+        self.golcore._identity = TEST_AGENT1
+    
+    def tearDown(self):
+        self.executor.shutdown()
+    
+    def test_concurrent(self):
+        ''' Concurrent containers and bindings, made from within many
+        workers at once, must all be valid.
+        '''
+        secrets = [TEST_AGENT1.new_secret() for __ in range(8)]
+        
+        async def make_all():
+            containers = await asyncio.gather(*[
+                self.golcore.make_container(bytes([ii]) * 100, secret)
+                for ii, secret in enumerate(secrets)
+            ])
+            bindings = await asyncio.gather(*[
+                self.golcore.make_binding_stat(container.ghid)
+                for container in containers
+            ])
+            return containers, bindings
+        
+        containers, bindings = await_coroutine_threadsafe(
+            coro = make_all(),
+            loop = self.nooploop._loop
+        )
+        
+        author = TEST_AGENT1.second_party
+        for ii, (container, secret) in enumerate(zip(containers, secrets)):
+            self.assertEqual(
+                self.golcore._open_container(container, secret, author),
+                bytes([ii]) * 100
+            )
+        
+        for container, binding in zip(containers, bindings):
+            self.assertEqual(binding.target, container.ghid)
+            self.assertEqual(binding.binder, TEST_AGENT1.ghid)
+        
+        # Each worker has its own copy of the identity, not the original.
+        local = self.executor.submit(self.golcore._local_identity).result()
+        self.assertIsNot(local, TEST_AGENT1)
+        self.assertEqual(local.ghid, TEST_AGENT1.ghid)
+
+
+if __name__ == "__main__":
+    from hypergolix import logutils
+    logutils.autoconfig(loglevel='debug')
+    
+    unittest.main()
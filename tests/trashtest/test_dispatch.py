@@ -0,0 +1,169 @@
+'''
+Scratchpad for test-based development.
+
+LICENSING
+-------------------------------------------------
+
+hypergolix: A python Golix client.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+    
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+    
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+    
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the
+    Free Software Foundation, Inc.,
+    51 Franklin Street,
+    Fifth Floor,
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+
+
+
+import unittest
+import asyncio
+
+from loopa import NoopLoop
+from loopa.utils import await_coroutine_threadsafe
+
+from hypergolix.dispatch import Dispatcher
+
+
+# ###############################################
+# Testing fixtures
+# ###############################################
+
+
+from _fixtures.ghidutils import make_random_ghid
+
+
+class _Conn:
+    ''' Weakref-able stand-in for an IPC connection.
+    '''
+    
+    def __init__(self, delay=0):
+        self.delay = delay
+
+
+class _RecordingIPC:
+    ''' Just enough of the IPC server to watch update distribution.
+    '''
+    
+    def __init__(self):
+        self.packs = []
+        self.updates = []
+    
+    async def pack_update(self, ghid):
+        self.packs.append(ghid)
+        return bytearray(bytes(ghid))
+    
+    async def update_obj(self, connection, ghid, packed=None):
+        await asyncio.sleep(connection.delay)
+        self.updates.append((connection, ghid, packed))
+    
+    async def delete_obj(self, connection, ghid):
+        self.updates.append((connection, ghid, None))
+
+
+# ###############################################
+# Testing
+# ###############################################
+
+
+class DispatcherDistributionTest(unittest.TestCase):
+    ''' Test update fan-out.
+    '''
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.nooploop = NoopLoop(
+            debug = True,
+            threaded = True
+        )
+        cls.nooploop.start()
+    
+    @classmethod
+    def tearDownClass(cls):
+        # Kill the running loop.
+        cls.nooploop.stop_threadsafe_nowait()
+    
+    def setUp(self):
+        self.ipc = _RecordingIPC()
+        self.dispatch = Dispatcher()
+        self.dispatch._ipc_protocol = self.ipc
+    
+    def distribute_update(self, *args, **kwargs):
+        return await_coroutine_threadsafe(
+            coro = self.dispatch.distribute_update(*args, **kwargs),
+            loop = self.nooploop._loop
+        )
+    
+    def test_fanout(self):
+        ghid = make_random_ghid()
+        slow = _Conn(delay=.05)
+        conns = [_Conn() for __ in range(5)] + [slow]
+        skipped = conns[0]
+        for conn in conns:
+            self.dispatch._update_listeners.add(ghid, conn)
+        
+        self.distribute_update(ghid, skip_conn=skipped)
+        
+        # Built once, and the very same buffer went to everyone else.
+        self.assertEqual(self.ipc.packs, [ghid])
+        self.assertEqual(len(self.ipc.updates), len(conns) - 1)
+        recipients = set()
+        for conn, updated, packed in self.ipc.updates:
+            recipients.add(conn)
+            self.assertEqual(updated, ghid)
+            self.assertIs(packed, self.ipc.updates[0][2])
+        self.assertEqual(recipients, set(conns) - {skipped})
+        
+        stats = self.dispatch.latency_stats
+        self.assertEqual(len(stats), len(conns) - 1)
+        # The slow app is reported first.
+        self.assertIs(stats[0][0], slow)
+        self.assertEqual(stats[0][1]['count'], 1)
+        self.assertGreaterEqual(stats[0][1]['worst'], .05)
+    
+    def test_no_listeners(self):
+        ''' Don't bother building updates nobody will get.
+        '''
+        ghid = make_random_ghid()
+        conn = _Conn()
+        self.dispatch._update_listeners.add(ghid, conn)
+        
+        self.distribute_update(ghid, skip_conn=conn)
+        self.distribute_update(make_random_ghid())
+        
+        self.assertEqual(self.ipc.packs, [])
+        self.assertEqual(self.ipc.updates, [])
+    
+    def test_deleted(self):
+        ghid = make_random_ghid()
+        conn = _Conn()
+        self.dispatch._update_listeners.add(ghid, conn)
+        
+        self.distribute_update(ghid, deleted=True)
+        
+        self.assertEqual(self.ipc.packs, [])
+        self.assertEqual(self.ipc.updates, [(conn, ghid, None)])
+
+
+if __name__ == "__main__":
+    unittest.main()
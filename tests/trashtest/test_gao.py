@@ -39,6 +39,7 @@ import queue
 import random
 import inspect
 import asyncio
+import pickle
 
 from loopa import TaskLooper
 from loopa import NoopLoop
@@ -49,16 +50,26 @@ from hypergolix.gao import GAOCore
 from hypergolix.gao import GAODict
 from hypergolix.gao import GAOSet
 from hypergolix.gao import GAOSetMap
+from hypergolix.gao import ShardedGAODict
+from hypergolix import codec
 from hypergolix.dispatch import _Dispatchable
 
 from hypergolix.utils import ApiID
+from hypergolix.utils import AppToken
 
 from hypergolix.persistence import PersistenceCore
 from hypergolix.persistence import Bookie
+from hypergolix.persistence import Enforcer
+from hypergolix.persistence import Doorman
+from hypergolix.lawyer import LawyerCore
+from hypergolix.undertaker import UndertakerCore
+from hypergolix.postal import PostalCore
+from hypergolix.remotes import Salmonator
 from hypergolix.core import GolixCore
 from hypergolix.core import GhidProxier
 from hypergolix.privateer import Privateer
 from hypergolix.librarian import LibrarianCore
+from hypergolix.exceptions import UnrecoverableState
 
 from hypergolix.accounting import Account
 
@@ -638,6 +649,240 @@ class GAODictTest(GAOTestingCore, unittest.TestCase):
         for it in gao:
             pass
     
+    def test_delta(self):
+        ''' Make sure pushes after the first few are deltas, and that
+        other copies can both pull them and rebase onto them.
+        '''
+        # We need to have our author "on file" for any pulls.
+        await_coroutine_threadsafe(
+            coro = self.librarian.store(gidclite1, gidc1),
+            loop = self.nooploop._loop
+        )
+        
+        gao1 = await_coroutine_threadsafe(
+            coro = self.make_gao(
+                ghid = None,
+                dynamic = True,
+                author = None,
+                legroom = 7
+            ),
+            loop = self.nooploop._loop
+        )
+        gao1.update({
+            ii: bytes([random.randint(0, 255) for i in range(32)])
+            for ii in range(256)
+        })
+        await_coroutine_threadsafe(
+            coro = gao1.push(),
+            loop = self.nooploop._loop
+        )
+        snapshot = await_coroutine_threadsafe(
+            coro = self.librarian.retrieve(gao1.target_history[0]),
+            loop = self.nooploop._loop
+        )
+        
+        gao2 = await_coroutine_threadsafe(
+            coro = self.make_gao(
+                ghid = gao1.ghid,
+                dynamic = None,
+                author = None,
+                legroom = 7
+            ),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = gao2._pull(),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(gao1, gao2)
+        
+        for ii in range(4):
+            gao1[ii] = bytes([random.randint(0, 255) for i in range(32)])
+            del gao1[ii + 32]
+            await_coroutine_threadsafe(
+                coro = gao1.push(),
+                loop = self.nooploop._loop
+            )
+            await_coroutine_threadsafe(
+                coro = gao2.pull(notification=gao1.ghid),
+                loop = self.nooploop._loop
+            )
+            self.assertEqual(gao1, gao2)
+        
+        # The first couple frames need to be snapshots, but not the rest.
+        self.assertGreater(gao1._chain, 0)
+        self.assertEqual(gao1._chain, gao2._chain)
+        delta = await_coroutine_threadsafe(
+            coro = self.librarian.retrieve(gao1.target_history[0]),
+            loop = self.nooploop._loop
+        )
+        self.assertLess(len(delta) * 4, len(snapshot))
+        
+        # Now make a local change on gao2 and pull an upstream one on top.
+        gao2['local'] = b'hello'
+        gao1['remote'] = b'world'
+        await_coroutine_threadsafe(
+            coro = gao1.push(),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = gao2.pull(notification=gao1.ghid),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(gao2['local'], b'hello')
+        self.assertEqual(gao2['remote'], b'world')
+        
+        # And the rebased change should still get pushed.
+        await_coroutine_threadsafe(
+            coro = gao2.push(),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = gao1.pull(notification=gao2.ghid),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(gao1, gao2)
+        self.assertEqual(gao1['local'], b'hello')
+    
+    def test_replay_failure(self):
+        ''' Ops that fail to replay must never leave us with a corrupt
+        state; instead, we need to fall back to a snapshot.
+        '''
+        with self.assertRaises(UnrecoverableState):
+            GAODict._apply_ops({}, [('nope', ())])
+        
+        await_coroutine_threadsafe(
+            coro = self.librarian.store(gidclite1, gidc1),
+            loop = self.nooploop._loop
+        )
+        
+        gao1 = await_coroutine_threadsafe(
+            coro = self.make_gao(
+                ghid = None,
+                dynamic = True,
+                author = None,
+                legroom = 7
+            ),
+            loop = self.nooploop._loop
+        )
+        gao1.update({ii: b'foo' for ii in range(32)})
+        for __ in range(3):
+            gao1[0] = bytes([random.randint(0, 255) for i in range(32)])
+            await_coroutine_threadsafe(
+                coro = gao1.push(),
+                loop = self.nooploop._loop
+            )
+        self.assertGreater(gao1._chain, 0)
+        
+        gao2 = await_coroutine_threadsafe(
+            coro = self.make_gao(
+                ghid = gao1.ghid,
+                dynamic = None,
+                author = None,
+                legroom = 7
+            ),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = gao2._pull(),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(gao1, gao2)
+        good = dict(gao2.state)
+        
+        # Push a delta frame that cannot be replayed. The pusher must stop
+        # trusting its upstream copy.
+        gao1[1] = b'bar'
+        gao1._ops.append(('nope', ()))
+        await_coroutine_threadsafe(
+            coro = gao1.push(),
+            loop = self.nooploop._loop
+        )
+        self.assertIsNone(gao1._upstream)
+        
+        # The puller must fail back to the last good frame.
+        await_coroutine_threadsafe(
+            coro = gao2.pull(notification=gao1.ghid),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(gao2.state, good)
+        
+        # The next push is a snapshot, which gets everyone back in sync.
+        gao1[2] = b'baz'
+        await_coroutine_threadsafe(
+            coro = gao1.push(),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(gao1._chain, 0)
+        await_coroutine_threadsafe(
+            coro = gao2.pull(notification=gao1.ghid),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(gao1, gao2)
+        
+        # Garbage pending ops get dropped instead of rebased.
+        gao2._ops.append(('nope', ()))
+        gao1[3] = b'qux'
+        await_coroutine_threadsafe(
+            coro = gao1.push(),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = gao2.pull(notification=gao1.ghid),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(gao1, gao2)
+        self.assertEqual(gao2._ops, [])
+    
+    def test_codec(self):
+        ''' Make sure frames use the compact codec when they can, fall
+        back to pickle when they can't, and that old pickled frames
+        still load.
+        '''
+        gao = await_coroutine_threadsafe(
+            coro = self.make_gao(
+                ghid = None,
+                dynamic = True,
+                author = None,
+                legroom = 7
+            ),
+            loop = self.nooploop._loop
+        )
+        gao.update({make_random_ghid(): b'foo' for __ in range(8)})
+        
+        packed = await_coroutine_threadsafe(
+            coro = gao.pack_gao(),
+            loop = self.nooploop._loop
+        )
+        self.assertTrue(codec.is_encoded(packed))
+        
+        legacy = pickle.dumps(dict(gao.state), protocol=4)
+        
+        for frame in (packed, legacy):
+            gao2 = await_coroutine_threadsafe(
+                coro = self.make_gao(
+                    ghid = None,
+                    dynamic = True,
+                    author = None,
+                    legroom = 7
+                ),
+                loop = self.nooploop._loop
+            )
+            await_coroutine_threadsafe(
+                coro = gao2.unpack_gao(frame),
+                loop = self.nooploop._loop
+            )
+            self.assertEqual(gao2.state, gao.state)
+        
+        # Floats aren't supported by the codec.
+        gao[make_random_ghid()] = 1.5
+        packed = await_coroutine_threadsafe(
+            coro = gao.pack_gao(),
+            loop = self.nooploop._loop
+        )
+        self.assertFalse(codec.is_encoded(packed))
+        self.assertEqual(pickle.loads(packed), gao.state)
+    
     
 class GAOSetTest(GAOTestingCore, unittest.TestCase):
     ''' Test the standard GAO.
@@ -769,6 +1014,442 @@ class GAOSetMapTest(GAOTestingCore, unittest.TestCase):
             pass
     
     
+class ShardedGAODictTest(GAOTestingCore, unittest.TestCase):
+    ''' Test the sharded GAO dict.
+    '''
+    
+    def setUp(self):
+        # These are directly required by the GAO
+        self.librarian = LibrarianCore.__fixture__()
+        self.golcore = GolixCore.__fixture__(TEST_AGENT1,
+                                             librarian=self.librarian)
+        # Don't fixture this. We need to actually resolve things.
+        self.ghidproxy = GhidProxier()
+        self.privateer = Privateer.__fixture__(TEST_AGENT1)
+        self.percore = PersistenceCore.__fixture__(librarian=self.librarian)
+        # Some assembly required
+        self.ghidproxy.assemble(self.librarian)
+    
+    async def make_gao(self, ghid, dynamic, author, legroom, *args, **kwargs):
+        ''' Make a sharded GAO, with a tiny leaf capacity.
+        '''
+        gao = ShardedGAODict(
+            ghid,
+            dynamic,
+            author,
+            legroom,
+            *args,
+            golcore = self.golcore,
+            ghidproxy = self.ghidproxy,
+            privateer = self.privateer,
+            percore = self.percore,
+            librarian = self.librarian,
+            **kwargs
+        )
+        gao.LEAF_CAPACITY = 8
+        return gao
+    
+    async def modify_gao(self, obj):
+        ''' Update state.
+        '''
+        obj[make_random_ghid()] = bytes(
+            [random.randint(0, 255) for i in range(32)]
+        )
+    
+    def test_sharding(self):
+        ''' Make sure content is split across leaves, and that only the
+        affected leaf gets pushed.
+        '''
+        # We need to have our author "on file" for any pulls.
+        await_coroutine_threadsafe(
+            coro = self.librarian.store(gidclite1, gidc1),
+            loop = self.nooploop._loop
+        )
+        
+        gao1 = await_coroutine_threadsafe(
+            coro = self.make_gao(
+                ghid = None,
+                dynamic = True,
+                author = None,
+                legroom = 7
+            ),
+            loop = self.nooploop._loop
+        )
+        content = {make_random_ghid(): ii for ii in range(64)}
+        gao1.update(content)
+        await_coroutine_threadsafe(
+            coro = gao1.push(),
+            loop = self.nooploop._loop
+        )
+        self.assertGreaterEqual(len(gao1.leaves), 16)
+        for leaf in gao1.leaves:
+            self.assertLessEqual(len(leaf), gao1.LEAF_CAPACITY)
+        self.assertEqual(dict(gao1.items()), content)
+        
+        gao2 = await_coroutine_threadsafe(
+            coro = self.make_gao(
+                ghid = gao1.ghid,
+                dynamic = None,
+                author = None,
+                legroom = 7
+            ),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = gao2._pull(),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(dict(gao2.items()), content)
+        
+        # Now change a single key, and make sure nothing else got pushed.
+        key = next(iter(content))
+        frames = {
+            leaf.ghid: leaf.target_history[0] for leaf in gao1.leaves
+        }
+        directory = gao1.target_history[0]
+        gao1[key] = -1
+        await_coroutine_threadsafe(
+            coro = gao1.push(),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(gao1.target_history[0], directory)
+        changed = [
+            leaf for leaf in gao1.leaves
+            if leaf.target_history[0] != frames[leaf.ghid]
+        ]
+        self.assertEqual(len(changed), 1)
+        self.assertEqual(changed[0][key], -1)
+    
+    def test_shard_path(self):
+        ''' Make sure key paths only depend on the key's type and
+        value.
+        '''
+        ghid = make_random_ghid()
+        self.assertEqual(
+            ShardedGAODict._shard_path(ghid),
+            ghid.address[:ShardedGAODict.PATH_LEN // 2].hex()
+        )
+        
+        token = AppToken(bytes(range(AppToken.TOKEN_LEN)))
+        self.assertEqual(
+            ShardedGAODict._shard_path(token),
+            ShardedGAODict._shard_path(AppToken(bytes(token)))
+        )
+        self.assertNotEqual(
+            ShardedGAODict._shard_path(token),
+            ShardedGAODict._shard_path(bytes(token))
+        )
+        self.assertNotEqual(
+            ShardedGAODict._shard_path(1),
+            ShardedGAODict._shard_path('1')
+        )
+        self.assertEqual(
+            len(ShardedGAODict._shard_path(('foo', 1))),
+            ShardedGAODict.PATH_LEN
+        )
+        
+        with self.assertRaises(TypeError):
+            ShardedGAODict._shard_path(frozenset({1, 2}))
+    
+    def test_migration(self):
+        ''' Make sure flat GAOs are loaded into the trie.
+        '''
+        # We need to have our author "on file" for any pulls.
+        await_coroutine_threadsafe(
+            coro = self.librarian.store(gidclite1, gidc1),
+            loop = self.nooploop._loop
+        )
+        
+        flat = GAODict(
+            None,
+            True,
+            None,
+            7,
+            state = {make_random_ghid(): ii for ii in range(4)},
+            golcore = self.golcore,
+            ghidproxy = self.ghidproxy,
+            privateer = self.privateer,
+            percore = self.percore,
+            librarian = self.librarian
+        )
+        await_coroutine_threadsafe(
+            coro = flat.push(),
+            loop = self.nooploop._loop
+        )
+        
+        gao1 = await_coroutine_threadsafe(
+            coro = self.make_gao(
+                ghid = flat.ghid,
+                dynamic = None,
+                author = None,
+                legroom = 7
+            ),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = gao1._pull(),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(dict(gao1.items()), flat.state)
+        await_coroutine_threadsafe(
+            coro = gao1.push(),
+            loop = self.nooploop._loop
+        )
+        
+        gao2 = await_coroutine_threadsafe(
+            coro = self.make_gao(
+                ghid = flat.ghid,
+                dynamic = None,
+                author = None,
+                legroom = 7
+            ),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = gao2._pull(),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(dict(gao2.items()), flat.state)
+    
+    def test_migration_delta(self):
+        ''' Make sure flat GAOs whose head frame is a delta are loaded
+        into the trie in full.
+        '''
+        # We need to have our author "on file" for any pulls.
+        await_coroutine_threadsafe(
+            coro = self.librarian.store(gidclite1, gidc1),
+            loop = self.nooploop._loop
+        )
+        
+        flat = GAODict(
+            None,
+            True,
+            None,
+            7,
+            state = {make_random_ghid(): ii for ii in range(16)},
+            golcore = self.golcore,
+            ghidproxy = self.ghidproxy,
+            privateer = self.privateer,
+            percore = self.percore,
+            librarian = self.librarian
+        )
+        # Keep making small changes until the flat GAO writes a delta.
+        while not flat._chain:
+            flat[make_random_ghid()] = -1
+            await_coroutine_threadsafe(
+                coro = flat.push(),
+                loop = self.nooploop._loop
+            )
+        
+        gao1 = await_coroutine_threadsafe(
+            coro = self.make_gao(
+                ghid = flat.ghid,
+                dynamic = None,
+                author = None,
+                legroom = 7
+            ),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = gao1._pull(),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(dict(gao1.items()), flat.state)
+        await_coroutine_threadsafe(
+            coro = gao1.push(),
+            loop = self.nooploop._loop
+        )
+        
+        gao2 = await_coroutine_threadsafe(
+            coro = self.make_gao(
+                ghid = flat.ghid,
+                dynamic = None,
+                author = None,
+                legroom = 7
+            ),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = gao2._pull(),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(dict(gao2.items()), flat.state)
+
+
+class GAOCollectionTest(unittest.TestCase):
+    ''' Run delta chains through a real persistence core and undertaker,
+    to make sure nothing they still need gets garbage collected.
+    '''
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.nooploop = NoopLoop(
+            debug = True,
+            threaded = True
+        )
+        cls.nooploop.start()
+    
+    @classmethod
+    def tearDownClass(cls):
+        # Kill the running loop.
+        cls.nooploop.stop_threadsafe_nowait()
+    
+    def setUp(self):
+        self.librarian = LibrarianCore.__fixture__()
+        self.golcore = GolixCore.__fixture__(TEST_AGENT1,
+                                             librarian=self.librarian)
+        self.ghidproxy = GhidProxier()
+        self.ghidproxy.assemble(self.librarian)
+        self.privateer = Privateer.__fixture__(TEST_AGENT1)
+        
+        # The percore only holds weak references, so keep these around.
+        self.doorman = Doorman.__fixture__()
+        self.enforcer = Enforcer.__fixture__(librarian=self.librarian)
+        self.lawyer = LawyerCore.__fixture__(librarian=self.librarian)
+        self.bookie = Bookie()
+        self.bookie.assemble(self.librarian)
+        self.postman = PostalCore.__fixture__()
+        self.salmonator = Salmonator.__fixture__()
+        # We only run GC in between pushes, so don't limit the triage queue
+        # (or pushes would block on it).
+        self.undertaker = UndertakerCore(maxlen=0)
+        self.undertaker.assemble(self.librarian, self.postman)
+        self.percore = PersistenceCore()
+        self.percore.assemble(
+            doorman = self.doorman,
+            enforcer = self.enforcer,
+            lawyer = self.lawyer,
+            bookie = self.bookie,
+            librarian = self.librarian,
+            postman = self.postman,
+            undertaker = self.undertaker,
+            salmonator = self.salmonator
+        )
+        
+        # Manually call loop init to create _triage
+        self.run_coro(self.undertaker.loop_init())
+        # We need to have our author "on file" for any pulls.
+        self.run_coro(self.librarian.store(gidclite1, gidc1))
+    
+    def run_coro(self, coro):
+        return await_coroutine_threadsafe(
+            coro = coro,
+            loop = self.nooploop._loop
+        )
+    
+    async def collect(self):
+        ''' Run the undertaker until it has nothing left to check.
+        '''
+        while not self.undertaker._triage.empty():
+            await self.undertaker.loop_run()
+    
+    def push(self, gao):
+        self.run_coro(gao.push())
+        self.run_coro(self.collect())
+    
+    def contains(self, ghid):
+        return self.run_coro(self.librarian.contains(ghid))
+    
+    def load(self, cls, ghid, **kwargs):
+        ''' Load a fresh copy of the GAO from the librarian.
+        '''
+        gao = cls(
+            ghid,
+            None,
+            None,
+            7,
+            golcore = self.golcore,
+            ghidproxy = self.ghidproxy,
+            privateer = self.privateer,
+            percore = self.percore,
+            librarian = self.librarian,
+            **kwargs
+        )
+        self.run_coro(gao._pull())
+        return gao
+    
+    def test_delta_chain(self):
+        ''' Base frames must survive GC until the next snapshot, and be
+        collected after it.
+        '''
+        gao = GAODict(
+            None,
+            True,
+            None,
+            7,
+            state = {ii: b'foo' for ii in range(32)},
+            golcore = self.golcore,
+            ghidproxy = self.ghidproxy,
+            privateer = self.privateer,
+            percore = self.percore,
+            librarian = self.librarian
+        )
+        frames = []
+        while gao._chain < 4:
+            gao[0] = bytes([random.randint(0, 255) for i in range(32)])
+            self.push(gao)
+            frames.append(gao.target_history[0])
+        
+        self.assertEqual(len(gao._holds), 4)
+        for ghid in frames[-5:]:
+            self.assertTrue(self.contains(ghid))
+        
+        fresh = self.load(GAODict, gao.ghid)
+        self.assertEqual(fresh.state, gao.state)
+        self.assertEqual(fresh._chain, gao._chain)
+        self.assertEqual(fresh._holds, gao._holds)
+        
+        # Now keep pushing from the fresh copy until the chain runs out, and
+        # it pushes a snapshot. That releases the holds from both copies.
+        holds = set(fresh._holds)
+        while fresh._chain:
+            frames.append(fresh.target_history[0])
+            fresh[0] = bytes([random.randint(0, 255) for i in range(32)])
+            self.push(fresh)
+            holds.update(fresh._holds)
+        self.assertEqual(fresh._holds, [])
+        
+        for ghid in frames + list(holds):
+            self.assertFalse(self.contains(ghid))
+        self.assertTrue(self.contains(fresh.target_history[0]))
+        
+        self.assertEqual(self.load(GAODict, gao.ghid).state, fresh.state)
+    
+    def test_sharded(self):
+        ''' Same thing, but for the leaves of a sharded GAO.
+        '''
+        gao = ShardedGAODict(
+            None,
+            True,
+            None,
+            7,
+            golcore = self.golcore,
+            ghidproxy = self.ghidproxy,
+            privateer = self.privateer,
+            percore = self.percore,
+            librarian = self.librarian
+        )
+        gao.LEAF_CAPACITY = 8
+        content = {make_random_ghid(): ii for ii in range(64)}
+        gao.update(content)
+        self.push(gao)
+        
+        # Keep updating a single key until its leaf has a delta chain. Use
+        # the biggest leaf, since a delta is never bigger than the state.
+        leaf = max(gao.leaves, key=len)
+        key = next(iter(leaf))
+        while leaf._chain < 4:
+            content[key] += 1
+            gao[key] = content[key]
+            self.push(gao)
+        
+        self.assertEqual(len(leaf._holds), 4)
+        
+        fresh = self.load(ShardedGAODict, gao.ghid)
+        self.assertEqual(dict(fresh.items()), content)
+        self.assertEqual(fresh._find_leaf(key)._holds, leaf._holds)
+
+
 class DispatchableTest(GAOTestingCore, unittest.TestCase):
     ''' Test the standard GAO.
     '''
@@ -0,0 +1,282 @@
+'''
+Scratchpad for test-based development.
+
+LICENSING
+-------------------------------------------------
+
+hypergolix: A python Golix client.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+    
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+    
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+    
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the
+    Free Software Foundation, Inc.,
+    51 Franklin Street,
+    Fifth Floor,
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+
+import unittest
+import weakref
+import gc
+
+from loopa import NoopLoop
+from loopa.utils import await_coroutine_threadsafe
+
+from hypergolix.inquisition import Inquisitor
+from hypergolix.core import Oracle
+from hypergolix.core import GolixCore
+from hypergolix.core import GhidProxier
+from hypergolix.dispatch import Dispatcher
+from hypergolix.gao import GAODict
+from hypergolix.persistence import PersistenceCore
+from hypergolix.persistence import _GidcLite
+from hypergolix.privateer import Privateer
+from hypergolix.librarian import LibrarianCore
+from hypergolix.remotes import Salmonator
+
+
+# ###############################################
+# Testing fixtures
+# ###############################################
+
+
+from _fixtures.ghidutils import make_random_ghid
+from _fixtures.identities import TEST_AGENT1
+
+from golix._getlow import GIDC
+from _fixtures.remote_exchanges import gidc1
+gidclite1 = _GidcLite.from_golix(GIDC.unpack(gidc1))
+
+
+class _FakeGAO:
+    ''' Just enough of a GAO for the inquisitor to size it up.
+    '''
+    
+    def __init__(self, size):
+        self.ghid = make_random_ghid()
+        self.state = bytes(size)
+
+
+class _FakeConnection:
+    pass
+
+
+# ###############################################
+# Testing
+# ###############################################
+
+
+class InquisitorTest(unittest.TestCase):
+    ''' Test GAO residency management.
+    '''
+    
+    def setUp(self):
+        self.oracle = Oracle()
+        self.dispatch = Dispatcher()
+        
+        objsize = 1000 + Inquisitor.OBJECT_OVERHEAD
+        self.inquisitor = Inquisitor(budget=3 * objsize)
+        self.inquisitor.assemble(oracle=self.oracle, dispatch=self.dispatch)
+        
+        # Don't use assemble, since we don't need any of the rest of it.
+        self.oracle._inquisitor = self.inquisitor
+    
+    def load(self, obj):
+        ''' Stand in for oracle.get_object.
+        '''
+        self.oracle._lookup[obj.ghid] = obj
+        self.oracle._touch(obj.ghid, obj)
+    
+    def make(self, deregistered):
+        ''' Load a new object that only the oracle holds on to, with a
+        stand-in for the salmonator deregistration finalizer. Returns its
+        ghid.
+        '''
+        obj = _FakeGAO(1000)
+        weakref.finalize(obj, deregistered.append, obj.ghid)
+        self.load(obj)
+        return obj.ghid
+    
+    def touch(self, ghid):
+        self.oracle._touch(ghid, self.oracle._lookup[ghid])
+    
+    def test_lru(self):
+        deregistered = []
+        ghids = [self.make(deregistered) for __ in range(3)]
+        self.assertEqual(self.inquisitor.evictions, 0)
+        self.assertEqual(self.inquisitor.stats['resident'], 3)
+        
+        # Going over budget evicts the coldest object
+        ghids.append(self.make(deregistered))
+        self.assertNotIn(ghids[0], self.oracle)
+        self.assertEqual(deregistered, [ghids[0]])
+        
+        # Touching an object makes it hot again
+        self.touch(ghids[1])
+        ghids.append(self.make(deregistered))
+        self.assertNotIn(ghids[2], self.oracle)
+        self.assertIn(ghids[1], self.oracle)
+        
+        # Objects with listeners are off limits
+        conn = _FakeConnection()
+        self.dispatch._update_listeners.add(ghids[3], conn)
+        ghids.append(self.make(deregistered))
+        self.assertIn(ghids[3], self.oracle)
+        self.assertNotIn(ghids[1], self.oracle)
+        
+        # Objects that anything else still holds on to are dropped by the
+        # oracle, but stay registered...
+        held = self.oracle._lookup[ghids[4]]
+        ghids.append(self.make(deregistered))
+        self.assertNotIn(ghids[4], self.oracle)
+        self.assertIn(ghids[5], self.oracle)
+        self.assertIs(self.oracle._evicted[ghids[4]], held)
+        self.assertNotIn(ghids[4], deregistered)
+        
+        # ...until they let go.
+        del held
+        self.assertNotIn(ghids[4], self.oracle._evicted)
+        self.assertIn(ghids[4], deregistered)
+        
+        stats = self.inquisitor.stats
+        self.assertEqual(stats['evictions'], 4)
+        self.assertEqual(stats['resident'], 3)
+        self.assertEqual(
+            stats['resident_bytes'],
+            3 * (1000 + Inquisitor.OBJECT_OVERHEAD)
+        )
+        self.assertEqual(len(deregistered), 4)
+    
+    def test_forget(self):
+        obj = _FakeGAO(1000)
+        deregistered = []
+        weakref.finalize(obj, deregistered.append, obj.ghid)
+        self.load(obj)
+        self.oracle.forget(obj.ghid)
+        self.oracle.forget(obj.ghid)
+        self.assertEqual(self.inquisitor.resident_bytes, 0)
+        self.assertEqual(self.inquisitor.evictions, 0)
+        
+        # Deregistration waits until the object is actually gone.
+        self.assertEqual(deregistered, [])
+        ghid = obj.ghid
+        del obj
+        self.assertEqual(deregistered, [ghid])
+    
+    def test_oversized(self):
+        ''' Objects bigger than the whole budget are still usable.
+        '''
+        obj = _FakeGAO(10 ** 5)
+        self.load(obj)
+        self.assertIn(obj.ghid, self.oracle)
+
+
+class RealGAOTest(unittest.TestCase):
+    ''' Evict actual GAOs, loaded through an actual oracle.
+    '''
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.nooploop = NoopLoop(
+            debug = True,
+            threaded = True
+        )
+        cls.nooploop.start()
+    
+    @classmethod
+    def tearDownClass(cls):
+        # Kill the running loop.
+        cls.nooploop.stop_threadsafe_nowait()
+    
+    def setUp(self):
+        self.librarian = LibrarianCore.__fixture__()
+        self.golcore = GolixCore.__fixture__(TEST_AGENT1,
+                                             librarian=self.librarian)
+        self.ghidproxy = GhidProxier()
+        self.ghidproxy.assemble(self.librarian)
+        self.privateer = Privateer.__fixture__(TEST_AGENT1)
+        self.percore = PersistenceCore.__fixture__(librarian=self.librarian)
+        self.dispatch = Dispatcher()
+        
+        # Record deregistrations instead of going upstream.
+        self.deregistered = []
+        self.salmonator = Salmonator.__fixture__()
+        self.salmonator._deregister = self.deregistered.append
+        
+        self.oracle = Oracle()
+        self.inquisitor = Inquisitor()
+        self.inquisitor.assemble(oracle=self.oracle, dispatch=self.dispatch)
+        self.oracle.assemble(self.golcore, self.ghidproxy, self.privateer,
+                             self.percore, self.librarian, self.salmonator,
+                             self.inquisitor)
+        
+        # We need to have our author "on file" for any pulls.
+        self.run_coro(self.librarian.store(gidclite1, gidc1))
+    
+    def run_coro(self, coro):
+        return await_coroutine_threadsafe(
+            coro = coro,
+            loop = self.nooploop._loop
+        )
+    
+    def evict_all(self):
+        self.inquisitor.budget = 0
+        evicted = self.inquisitor.sweep()
+        self.inquisitor.budget = Inquisitor.MEMORY_BUDGET
+        return evicted
+    
+    def test_evict(self):
+        gao = self.run_coro(
+            self.oracle.new_object(GAODict, True, 7, state={1: b'foo'})
+        )
+        ghid = gao.ghid
+        # Stand-in for the callbacks and proxies that real GAOs end up in
+        # reference cycles with.
+        gao._callback = gao.push
+        
+        # Eviction works even while someone is still using the object, but
+        # they get the same copy back instead of a reload.
+        self.assertEqual(self.evict_all(), 1)
+        self.assertNotIn(ghid, self.oracle)
+        self.assertIs(self.run_coro(self.oracle.get_object(GAODict, ghid)),
+                      gao)
+        self.assertIn(ghid, self.oracle)
+        self.assertEqual(self.deregistered, [])
+        
+        # Once nobody is using it, it's collected despite the cycle.
+        del gao
+        self.assertEqual(self.evict_all(), 1)
+        gc.collect()
+        self.assertEqual(self.deregistered, [ghid])
+        self.assertNotIn(ghid, self.oracle._evicted)
+        
+        # And a fresh copy gets loaded next time.
+        gao = self.run_coro(self.oracle.get_object(GAODict, ghid))
+        self.assertEqual(dict(gao), {1: b'foo'})
+        self.assertIn(ghid, self.oracle)
+
+
+if __name__ == "__main__":
+    from hypergolix import logutils
+    logutils.autoconfig(loglevel='debug')
+    
+    unittest.main()
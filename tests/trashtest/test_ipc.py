@@ -0,0 +1,457 @@
+'''
+Scratchpad for test-based development.
+
+LICENSING
+-------------------------------------------------
+
+hypergolix: A python Golix client.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+    
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+    
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+    
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the
+    Free Software Foundation, Inc.,
+    51 Franklin Street,
+    Fifth Floor,
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+
+
+
+import unittest
+import os
+import loopa
+
+from loopa import NoopLoop
+from loopa.utils import await_coroutine_threadsafe
+
+from hypergolix.ipc import IPCServerProtocol
+from hypergolix.ipc import IPCClientProtocol
+from hypergolix.embed import HGXLink
+from hypergolix.objproxy import Obj
+from hypergolix.exceptions import DoesNotExist
+from hypergolix.exceptions import LocallyImmutable
+from hypergolix.exceptions import DeltaMismatch
+from hypergolix.utils import apply_delta
+
+
+# ###############################################
+# Testing fixtures
+# ###############################################
+
+
+from _fixtures.ghidutils import make_random_ghid
+
+
+class _GAO:
+    ''' Just enough of a dispatchable for the IPC server.
+    '''
+    
+    def __init__(self, ghid, author, state, api_id, dynamic=True):
+        self.ghid = ghid
+        self.author = author
+        self.state = state
+        self.api_id = api_id
+        self.dynamic = dynamic
+        self.pushes = 0
+    
+    async def push(self):
+        self.pushes += 1
+
+
+class _Oracle:
+    ''' Keeps GAOs in memory, refusing to create anything with a
+    state of b'bad'.
+    '''
+    
+    def __init__(self, whoami):
+        self.whoami = whoami
+        self.gaos = {}
+    
+    async def get_object(self, gaoclass, ghid, **kwargs):
+        try:
+            return self.gaos[ghid]
+        except KeyError:
+            raise DoesNotExist(str(ghid)) from None
+    
+    async def new_object(self, gaoclass, state, dynamic, api_id, **kwargs):
+        if state == b'bad':
+            raise ValueError('Bad state.')
+        
+        gao = _GAO(make_random_ghid(), self.whoami, state, api_id, dynamic)
+        self.gaos[gao.ghid] = gao
+        return gao
+
+
+class _Account:
+    def __init__(self):
+        self.flushes = 0
+    
+    async def flush(self):
+        self.flushes += 1
+
+
+class _Dispatch:
+    ''' Just enough of a dispatcher for the IPC server.
+    '''
+    
+    def __init__(self):
+        self._account = _Account()
+        self.tracked = set()
+        self.updated = []
+    
+    async def track_object(self, connection, ghid):
+        self.tracked.add(ghid)
+    
+    async def register_object(self, connection, ghid, private):
+        pass
+    
+    def private_parent_lookup(self, ghid):
+        return None
+    
+    async def distribute_update(self, ghid, skip_conn=None):
+        self.updated.append(ghid)
+
+
+class _Loopback(loopa.ManagedTask):
+    ''' Stands in for the connection manager, handing requests from the
+    client protocol directly to the server protocol.
+    '''
+    
+    def __init__(self, client, server, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.client = client
+        self.server = server
+        self.requests = []
+        # Sizes of all of the request bodies
+        self.sent = []
+    
+    async def task_run(self):
+        pass
+    
+    async def _request(self, client_name, server_name, *args):
+        self.requests.append(client_name)
+        client_req = getattr(self.client, client_name)
+        server_req = getattr(self.server, server_name)
+        
+        body = await client_req.requestor(self.client, self, *args)
+        self.sent.append(len(body))
+        try:
+            response = await server_req.handle(self, body)
+        except Exception as exc:
+            return (await client_req.response_handler(
+                self.client, self, None, exc
+            ))
+        else:
+            return (await client_req.response_handler(
+                self.client, self, response, None
+            ))
+    
+    async def get_many_ghid(self, ghids):
+        return (await self._request('get_many_ghid', 'get_many_obj', ghids))
+    
+    async def new_many_ghid(self, obj_defs):
+        return (await self._request('new_many_ghid', 'new_many_obj',
+                                    obj_defs))
+    
+    async def update_many_ghid(self, updates):
+        return (await self._request('update_many_ghid', 'update_many_obj',
+                                    updates))
+    
+    async def update_ghid(self, *args):
+        return (await self._request('update_ghid', 'send_update', *args))
+
+
+# ###############################################
+# Testing
+# ###############################################
+
+
+class _LoopbackTest(unittest.TestCase):
+    ''' Sets up an HGXLink connected straight through to the server.
+    '''
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.nooploop = NoopLoop(
+            debug = True,
+            threaded = True
+        )
+        cls.nooploop.start()
+    
+    @classmethod
+    def tearDownClass(cls):
+        # Kill the running loop.
+        cls.nooploop.stop_threadsafe_nowait()
+    
+    def setUp(self):
+        self.whoami = make_random_ghid()
+        self.oracle = _Oracle(self.whoami)
+        self.dispatch = _Dispatch()
+        
+        self.server = IPCServerProtocol()
+        self.server._oracle = self.oracle
+        self.server._dispatch = self.dispatch
+        self.client = IPCClientProtocol()
+        
+        self.ipc = _Loopback(self.client, self.server)
+        self.hgxlink = HGXLink(ipc_fixture=self.ipc, autostart=False)
+        self.hgxlink.whoami = self.whoami
+        self.client.assemble(self.hgxlink)
+    
+    def run_coro(self, coro):
+        return await_coroutine_threadsafe(
+            coro = coro,
+            loop = self.nooploop._loop
+        )
+    
+    def add_gao(self, state):
+        gao = _GAO(make_random_ghid(), self.whoami, state,
+                   Obj._hgx_DEFAULT_API)
+        self.oracle.gaos[gao.ghid] = gao
+        return gao
+
+
+class BatchIPCTest(_LoopbackTest):
+    ''' Test batched get/new/update, end to end from the link to the
+    server.
+    '''
+    
+    def test_wire_format(self):
+        results = [b'', b'hello', DoesNotExist('nope')]
+        unpacked = self.client._unpack_results(
+            self.server._pack_results(results)
+        )
+        self.assertEqual(unpacked[:2], results[:2])
+        self.assertIsInstance(unpacked[2], DoesNotExist)
+        
+        with self.assertRaises(ValueError):
+            self.client._unpack_batch(self.client._pack_batch([b'1234'])[:-1])
+    
+    def test_get_many(self):
+        gaos = [self.add_gao(bytes([i]) * 10) for i in range(5)]
+        missing = make_random_ghid()
+        ghids = [gao.ghid for gao in gaos]
+        # Include a duplicate and something that doesn't exist.
+        ghids.insert(2, missing)
+        ghids.append(gaos[0].ghid)
+        
+        results = self.run_coro(self.hgxlink.get_many(Obj, ghids))
+        
+        self.assertEqual(self.ipc.requests, ['get_many_ghid'])
+        self.assertEqual(self.dispatch._account.flushes, 1)
+        self.assertEqual(len(results), len(ghids))
+        self.assertIsInstance(results[2], DoesNotExist)
+        self.assertIs(results[0], results[-1])
+        for gao, obj in zip(gaos, results[:2] + results[3:-1]):
+            self.assertEqual(obj.ghid, gao.ghid)
+            self.assertEqual(obj.state, gao.state)
+        
+        # Everything that worked is now cached.
+        again = self.run_coro(self.hgxlink.get_many(Obj, ghids[:2]))
+        self.assertEqual(again, results[:2])
+        self.assertEqual(len(self.ipc.requests), 1)
+    
+    def test_new_many(self):
+        states = [b'hello', b'bad', b'world']
+        
+        results = self.run_coro(self.hgxlink.new_many(Obj, states))
+        
+        self.assertEqual(self.ipc.requests, ['new_many_ghid'])
+        self.assertEqual(self.dispatch._account.flushes, 1)
+        self.assertIsInstance(results[1], Exception)
+        for state, obj in zip(states[::2], results[::2]):
+            self.assertEqual(obj.state, state)
+            self.assertEqual(self.oracle.gaos[obj.ghid].state, state)
+            self.assertIn(obj.ghid, self.dispatch.tracked)
+        
+        self.assertEqual(self.run_coro(self.hgxlink.new_many(Obj, [])), [])
+        self.assertEqual(len(self.ipc.requests), 1)
+    
+    def test_update_many(self):
+        objs = self.run_coro(
+            self.hgxlink.new_many(Obj, [b'1', b'2', b'3'])
+        )
+        # Somebody else's object, which must never make it to the server.
+        theirs = Obj(
+            state = b'4',
+            api_id = Obj._hgx_DEFAULT_API,
+            dynamic = True,
+            private = False,
+            ghid = make_random_ghid(),
+            binder = make_random_ghid(),
+            hgxlink = self.hgxlink,
+            ipc_manager = self.ipc,
+            _legroom = 7
+        )
+        # And one the server has lost track of.
+        del self.oracle.gaos[objs[2].ghid]
+        for obj in objs:
+            obj.state += b'!'
+        
+        results = self.run_coro(
+            self.hgxlink.update_many(objs + [theirs])
+        )
+        
+        self.assertEqual(self.ipc.requests, ['new_many_ghid',
+                                             'update_many_ghid'])
+        self.assertEqual(self.dispatch._account.flushes, 2)
+        self.assertEqual(results[:2], [True, True])
+        self.assertIsInstance(results[2], DoesNotExist)
+        self.assertIsInstance(results[3], LocallyImmutable)
+        for obj in objs[:2]:
+            gao = self.oracle.gaos[obj.ghid]
+            self.assertEqual(gao.state, obj.state)
+            self.assertEqual(gao.pushes, 1)
+
+
+class DeltaIPCTest(_LoopbackTest):
+    ''' Test sending state deltas instead of whole states.
+    '''
+    
+    def test_push(self):
+        state = os.urandom(50000)
+        obj, = self.run_coro(self.hgxlink.new_many(Obj, [state]))
+        gao = self.oracle.gaos[obj.ghid]
+        
+        obj.state = state[:100] + b'hello' + state[105:]
+        self.run_coro(obj.push())
+        self.assertEqual(gao.state, obj.state)
+        self.assertLess(self.ipc.sent[-1], 1000)
+        
+        # Multiple pushes, including batched ones, keep working.
+        obj.state = obj.state[:-10]
+        self.assertEqual(self.run_coro(self.hgxlink.update_many([obj])),
+                         [True])
+        self.assertEqual(gao.state, obj.state)
+        self.assertLess(self.ipc.sent[-1], 1000)
+        
+        # Now something else changes the object behind our back, so the
+        # delta is useless and we have to resend everything.
+        gao.state = os.urandom(50000)
+        obj.state = obj.state + b'!'
+        self.ipc.sent.clear()
+        self.run_coro(obj.push())
+        self.assertEqual(gao.state, obj.state)
+        self.assertEqual(len(self.ipc.sent), 2)
+        self.assertGreater(self.ipc.sent[-1], 50000)
+        
+        # Same deal for batches.
+        gao.state = os.urandom(50000)
+        obj.state = obj.state + b'!'
+        self.ipc.sent.clear()
+        self.assertEqual(self.run_coro(self.hgxlink.update_many([obj])),
+                         [True])
+        self.assertEqual(gao.state, obj.state)
+        self.assertEqual(len(self.ipc.sent), 2)
+    
+    def test_small(self):
+        ''' Small states aren't worth making deltas for.
+        '''
+        obj, = self.run_coro(self.hgxlink.new_many(Obj, [b'hello']))
+        obj.state = b'world'
+        self.run_coro(obj.push())
+        self.assertEqual(self.oracle.gaos[obj.ghid].state, b'world')
+        self.assertFalse(
+            self.client._is_delta(
+                self.client._pack_update(obj.ghid, b'world', False, 7,
+                                         b'hello')
+            )
+        )
+    
+    def test_distribute(self):
+        sent = []
+        
+        async def send_update(connection, body):
+            sent.append(len(body))
+            return (await self.client.update_ghid.handle(connection, body))
+        
+        self.server.send_update = send_update
+        gao = self.add_gao(os.urandom(50000))
+        obj, = self.run_coro(self.hgxlink.get_many(Obj, [gao.ghid]))
+        
+        # Something changes upstream, and gets distributed to the app.
+        gao.state = b'hello' + gao.state[5:]
+        packed = self.run_coro(self.server.pack_update(gao.ghid))
+        self.run_coro(self.server.update_obj(self.ipc, gao.ghid, packed))
+        self.assertEqual(obj.state, gao.state)
+        self.assertEqual(len(sent), 1)
+        self.assertLess(sent[0], 1000)
+        delta, = packed.deltas.values()
+        
+        # The app locally pushes some change without hypergolix knowing,
+        # so it no longer has the delta's base. It gets the full update.
+        obj._hgx_ack(os.urandom(50000))
+        gao.state = b'world' + gao.state[5:]
+        sent.clear()
+        self.run_coro(self.server.update_obj(self.ipc, gao.ghid))
+        self.assertEqual(obj.state, gao.state)
+        self.assertEqual(len(sent), 2)
+        self.assertGreater(sent[1], 50000)
+        
+        with self.assertRaises(DeltaMismatch):
+            self.run_coro(self.client.update_ghid.handle(self.ipc, delta))
+    
+    def test_distribute_per_connection(self):
+        ''' Deltas must be made against whatever each connection last
+        got, even if other connections have seen newer versions since.
+        '''
+        class _OtherConnection:
+            pass
+        
+        other = _OtherConnection()
+        received = []
+        
+        async def send_update(connection, body):
+            if connection is other:
+                received.append(body)
+                return b'\x01'
+            return (await self.client.update_ghid.handle(connection, body))
+        
+        self.server.send_update = send_update
+        gao = self.add_gao(os.urandom(50000))
+        obj, = self.run_coro(self.hgxlink.get_many(Obj, [gao.ghid]))
+        
+        # The other connection gets the original in full.
+        self.run_coro(self.server.update_obj(other, gao.ghid))
+        self.assertFalse(self.server._is_delta(received[-1]))
+        original = gao.state
+        
+        # Only the app hears about the next update.
+        gao.state = gao.state[:-10] + b'hello' + gao.state[-5:]
+        self.run_coro(self.server.update_obj(self.ipc, gao.ghid))
+        
+        # Both hear about the one after that, as deltas against their own
+        # versions.
+        gao.state = gao.state[:-5] + b'world'
+        packed = self.run_coro(self.server.pack_update(gao.ghid))
+        self.run_coro(self.server.update_obj(self.ipc, gao.ghid, packed))
+        self.run_coro(self.server.update_obj(other, gao.ghid, packed))
+        self.assertEqual(obj.state, gao.state)
+        self.assertEqual(len(packed.deltas), 2)
+        
+        self.assertTrue(self.server._is_delta(received[-1]))
+        delta = self.server._unpack_object_def(received[-1])[2]
+        self.assertEqual(apply_delta(original, delta), gao.state)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -503,6 +503,71 @@ class LibrarianCoreTest(GenericLibrarianTest, unittest.TestCase):
             )
         )
         
+    def test_digest_index(self):
+        ''' Make sure the digest index tracks stores and abandons, and
+        that indices already handed out are left alone.
+        '''
+        await_coroutine_threadsafe(
+            coro = self.librarian.store(geoc1_1, cont1_1.packed),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = self.librarian.store(gobd1_a, dyn1_1a.packed),
+            loop = self.nooploop._loop
+        )
+        index = await_coroutine_threadsafe(
+            coro = self.librarian.digest_index(),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(
+            set(index.ghids),
+            {geoc1_1.ghid, gobd1_a.frame_ghid}
+        )
+        
+        # Replace the binding frame, and then abandon the container.
+        await_coroutine_threadsafe(
+            coro = self.librarian.store(gobd1_b, dyn1_1b.packed),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = self.librarian.abandon(geoc1_1),
+            loop = self.nooploop._loop
+        )
+        updated = await_coroutine_threadsafe(
+            coro = self.librarian.digest_index(),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(updated.ghids, [gobd1_b.frame_ghid])
+        self.assertEqual(
+            set(index.ghids),
+            {geoc1_1.ghid, gobd1_a.frame_ghid}
+        )
+        
+        # Changes in between indices cancel out.
+        await_coroutine_threadsafe(
+            coro = self.librarian.abandon(gobd1_b),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = self.librarian.store(gobd1_b, dyn1_1b.packed),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = self.librarian.store(geoc1_1, cont1_1.packed),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = self.librarian.abandon(geoc1_1),
+            loop = self.nooploop._loop
+        )
+        self.assertIs(
+            await_coroutine_threadsafe(
+                coro = self.librarian.digest_index(),
+                loop = self.nooploop._loop
+            ),
+            updated
+        )
+
         
 class DiskLibrarianTest(GenericLibrarianTest, unittest.TestCase):
     ''' Test the plain (golix state stored in memory) disk librarian.
@@ -0,0 +1,519 @@
+'''
+Scratchpad for test-based development.
+
+LICENSING
+-------------------------------------------------
+
+hypergolix: A python Golix client.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+    
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+    
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+    
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the
+    Free Software Foundation, Inc.,
+    51 Franklin Street,
+    Fifth Floor,
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+
+import unittest
+import io
+import os
+import time
+import asyncio
+import concurrent.futures
+
+from loopa import NoopLoop
+from loopa.utils import await_coroutine_threadsafe
+
+from hypergolix.objproxy import Obj
+from hypergolix.objproxy import ChunkedObj
+from hypergolix.exceptions import DeadObject
+from hypergolix.exceptions import IntegrityError
+from hypergolix.exceptions import LocallyImmutable
+
+
+# ###############################################
+# Testing fixtures
+# ###############################################
+
+
+from _fixtures.ghidutils import make_random_ghid
+
+
+class _MemoryIPC:
+    ''' Just enough of an IPC client to store and retrieve objects.
+    '''
+    
+    def __init__(self, whoami):
+        self.whoami = whoami
+        self.objs = {}
+        self.creates = 0
+        self.gets = 0
+        self.updates = []
+        self.discarded = set()
+        self.deleted = set()
+        self.shared = set()
+    
+    async def new_ghid(self, state, api_id, dynamic, private, _legroom):
+        ghid = make_random_ghid()
+        self.objs[ghid] = bytes(state)
+        self.creates += 1
+        return ghid
+    
+    async def update_ghid(self, ghid, state, private, _legroom, base=None):
+        self.objs[ghid] = state
+        self.updates.append((time.monotonic(), state))
+    
+    async def get_ghid(self, ghid):
+        self.gets += 1
+        return (ghid, self.whoami, self.objs[ghid], False, None, False, False,
+                None)
+    
+    async def discard_ghid(self, ghid):
+        self.discarded.add(ghid)
+    
+    async def delete_ghid(self, ghid):
+        self.deleted.add(ghid)
+        del self.objs[ghid]
+    
+    async def share_ghid(self, ghid, recipient):
+        self.shared.add(ghid)
+
+
+class _Link:
+    ''' Just enough of an hgxlink for objects to hold onto.
+    '''
+    
+    def __init__(self, whoami, loop):
+        self.whoami = whoami
+        self._loop = loop
+        self._executor = None
+
+
+# ###############################################
+# Testing
+# ###############################################
+
+
+class ChunkedObjTest(unittest.TestCase):
+    ''' Test chunked blobs.
+    '''
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.nooploop = NoopLoop(
+            debug = True,
+            threaded = True
+        )
+        cls.nooploop.start()
+    
+    @classmethod
+    def tearDownClass(cls):
+        # Kill the running loop.
+        cls.nooploop.stop_threadsafe_nowait()
+    
+    def setUp(self):
+        whoami = make_random_ghid()
+        self.ipc = _MemoryIPC(whoami)
+        self.hgxlink = _Link(whoami, self.nooploop._loop)
+        self.obj = ChunkedObj(
+            state = (),
+            api_id = ChunkedObj._hgx_DEFAULT_API,
+            dynamic = True,
+            private = False,
+            ghid = make_random_ghid(),
+            binder = whoami,
+            hgxlink = self.hgxlink,
+            ipc_manager = self.ipc,
+            _legroom = 7
+        )
+        self.obj.CHUNK_SIZE = 1000
+    
+    def test_roundtrip(self):
+        data = os.urandom(10500)
+        self.obj.upload_threadsafe(io.BytesIO(data))
+        
+        self.assertEqual(self.obj.size, len(data))
+        self.assertEqual(self.obj.chunks, 11)
+        self.assertEqual(self.obj.read_threadsafe(), data)
+        
+        sink = io.BytesIO()
+        self.assertEqual(self.obj.download_threadsafe(sink), len(data))
+        self.assertEqual(sink.getvalue(), data)
+        
+        # The manifest must survive packing.
+        packed = self.ipc.objs[self.obj.ghid]
+        unpacked = await_coroutine_threadsafe(
+            coro = ChunkedObj.hgx_unpack(packed),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(unpacked, self.obj.state)
+        
+        # Every chunk is tracked only for as long as it takes to transfer.
+        self.assertEqual(
+            self.ipc.discarded,
+            {chunk.ghid for chunk in self.obj.state}
+        )
+    
+    def test_ranges(self):
+        data = os.urandom(5000)
+        self.obj.upload_threadsafe(data)
+        
+        for offset, length in ((0, 10), (990, 20), (1000, 1000), (1500, 2600),
+                               (4999, 1), (4990, 100), (5000, 10)):
+            self.ipc.gets = 0
+            self.assertEqual(
+                self.obj.read_threadsafe(offset, length),
+                data[offset:offset + length]
+            )
+            # Only fetch the chunks we actually need.
+            first = offset // 1000
+            last = min(offset + length, 5000)
+            self.assertEqual(self.ipc.gets, max(0, -(-last // 1000) - first))
+        
+        with self.assertRaises(ValueError):
+            self.obj.read_threadsafe(-1)
+    
+    def test_dedupe(self):
+        data = bytearray(os.urandom(8000))
+        self.obj.upload_threadsafe(data)
+        before = {chunk.ghid for chunk in self.obj.state}
+        self.assertEqual(self.ipc.creates, 8)
+        
+        # Change a single chunk.
+        data[3500] ^= 0xFF
+        self.obj.upload_threadsafe(data)
+        after = {chunk.ghid for chunk in self.obj.state}
+        
+        self.assertEqual(self.ipc.creates, 9)
+        self.assertEqual(len(before - after), 1)
+        self.assertEqual(self.ipc.deleted, before - after)
+        self.assertEqual(self.obj.read_threadsafe(), bytes(data))
+        
+        # Duplicate chunks within a single upload are also only sent once.
+        self.obj.upload_threadsafe(bytes(4000))
+        self.assertEqual(self.ipc.creates, 10)
+        self.assertEqual(self.obj.chunks, 4)
+    
+    def test_share(self):
+        self.obj.upload_threadsafe(os.urandom(3000))
+        self.obj.share_threadsafe(make_random_ghid())
+        
+        self.assertEqual(
+            self.ipc.shared,
+            {chunk.ghid for chunk in self.obj.state} | {self.obj.ghid}
+        )
+    
+    def test_integrity(self):
+        self.obj.upload_threadsafe(os.urandom(3000))
+        chunk = self.obj.state[1]
+        self.ipc.objs[chunk.ghid] = os.urandom(1000)
+        
+        with self.assertRaises(IntegrityError):
+            self.obj.read_threadsafe()
+    
+    def test_write_behind(self):
+        ''' Chunked uploads must still wait for their manifest to land.
+        '''
+        self.obj.push_window = .05
+        self.obj.upload_threadsafe(os.urandom(3000))
+        self.assertEqual(len(self.ipc.updates), 1)
+    
+    def test_window(self):
+        ''' Never read further ahead than the upload window.
+        '''
+        source = io.BytesIO(os.urandom(10000))
+        reads = []
+        read = source.read
+        source.read = lambda size: reads.append(size) or read(size)
+        
+        gate = asyncio.Event(loop=self.nooploop._loop)
+        new_ghid = self.ipc.new_ghid
+        
+        async def gated_new_ghid(*args, **kwargs):
+            await gate.wait()
+            return (await new_ghid(*args, **kwargs))
+        
+        self.ipc.new_ghid = gated_new_ghid
+        upload = asyncio.run_coroutine_threadsafe(
+            self.obj.upload(source),
+            self.nooploop._loop
+        )
+        time.sleep(.1)
+        self.assertEqual(len(reads), ChunkedObj.MAX_CONCURRENCY)
+        
+        self.nooploop._loop.call_soon_threadsafe(gate.set)
+        upload.result(timeout=5)
+        self.assertEqual(self.obj.chunks, 10)
+    
+    def test_cleanup(self):
+        ''' Failed uploads must not leak chunks.
+        '''
+        self.obj.upload_threadsafe(os.urandom(3000))
+        previous = self.obj.state
+        
+        new_ghid = self.ipc.new_ghid
+        created = []
+        
+        async def failing_new_ghid(*args, **kwargs):
+            if len(created) >= 2:
+                raise ValueError()
+            ghid = await new_ghid(*args, **kwargs)
+            created.append(ghid)
+            return ghid
+        
+        self.ipc.new_ghid = failing_new_ghid
+        with self.assertRaises(ValueError):
+            self.obj.upload_threadsafe(os.urandom(5000))
+        
+        self.assertEqual(self.obj.state, previous)
+        self.assertEqual(self.ipc.deleted, set(created))
+        self.assertEqual(len(created), 2)
+
+
+class _ObjLoopTest(unittest.TestCase):
+    ''' Common setup for running Objs against the in-memory IPC.
+    '''
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.nooploop = NoopLoop(
+            debug = True,
+            threaded = True
+        )
+        cls.nooploop.start()
+    
+    @classmethod
+    def tearDownClass(cls):
+        # Kill the running loop.
+        cls.nooploop.stop_threadsafe_nowait()
+    
+    def setUp(self):
+        whoami = make_random_ghid()
+        self.ipc = _MemoryIPC(whoami)
+        self.hgxlink = _Link(whoami, self.nooploop._loop)
+        self.obj = self.make_obj(binder=whoami)
+    
+    def make_obj(self, binder):
+        ghid = make_random_ghid()
+        self.ipc.objs[ghid] = b''
+        return Obj(
+            state = b'',
+            api_id = Obj._hgx_DEFAULT_API,
+            dynamic = True,
+            private = False,
+            ghid = ghid,
+            binder = binder,
+            hgxlink = self.hgxlink,
+            ipc_manager = self.ipc,
+            _legroom = 7
+        )
+    
+    def run_coro(self, coro):
+        return await_coroutine_threadsafe(
+            coro = coro,
+            loop = self.nooploop._loop
+        )
+
+
+class WriteBehindTest(_ObjLoopTest):
+    ''' Test coalescing pushes.
+    '''
+    
+    def test_disabled(self):
+        self.assertIsNone(self.obj.push_threadsafe())
+        self.assertEqual(len(self.ipc.updates), 1)
+    
+    def test_coalesce(self):
+        self.obj.push_window = .05
+        
+        async def mutate():
+            futures = set()
+            for ii in range(10):
+                self.obj.state = bytes([ii])
+                futures.add(await self.obj.push())
+            
+            self.assertEqual(len(futures), 1)
+            self.assertEqual(self.ipc.updates, [])
+            await futures.pop()
+        
+        self.run_coro(mutate())
+        self.assertEqual([state for __, state in self.ipc.updates], [b'\x09'])
+        
+        # Later pushes get their own.
+        self.obj.state = b'hello'
+        self.obj.push_threadsafe()
+        self.obj.flush_threadsafe()
+        self.assertEqual(len(self.ipc.updates), 2)
+        self.assertEqual(self.ipc.objs[self.obj.ghid], b'hello')
+    
+    def test_max_latency(self):
+        self.obj.push_window = .05
+        self.obj.push_max_latency = .1
+        
+        async def mutate():
+            start = time.monotonic()
+            for ii in range(15):
+                self.obj.state = bytes([ii])
+                await self.obj.push()
+                await asyncio.sleep(.02)
+            await self.obj.flush()
+            return start
+        
+        start = self.run_coro(mutate())
+        # Without the latency bound, this would have all been one push.
+        self.assertGreater(len(self.ipc.updates), 1)
+        self.assertLess(self.ipc.updates[0][0] - start, .2)
+        self.assertEqual(self.ipc.objs[self.obj.ghid], bytes([14]))
+    
+    def test_flush(self):
+        self.obj.push_window = 10
+        self.obj.state = b'hello'
+        self.obj.push_threadsafe()
+        self.assertEqual(self.ipc.updates, [])
+        
+        self.obj.flush_threadsafe()
+        self.assertEqual(self.ipc.objs[self.obj.ghid], b'hello')
+        # Nothing left to flush.
+        self.obj.flush_threadsafe()
+        self.assertEqual(len(self.ipc.updates), 1)
+    
+    def test_failure(self):
+        theirs = self.make_obj(binder=make_random_ghid())
+        theirs.push_window = 10
+        pending = theirs.push_threadsafe()
+        
+        with self.assertRaises(LocallyImmutable):
+            theirs.flush_threadsafe()
+        with self.assertRaises(LocallyImmutable):
+            pending.result(timeout=1)
+    
+    def test_threadsafe(self):
+        ''' Futures handed outside of the link loop must be usable there.
+        '''
+        self.obj.push_window = .05
+        self.obj.state = b'hello'
+        pending = self.obj.push_threadsafe()
+        
+        self.assertIsInstance(pending, concurrent.futures.Future)
+        self.assertIsNone(pending.result(timeout=1))
+        self.assertEqual(self.ipc.objs[self.obj.ghid], b'hello')
+        
+        async def push_from_elsewhere():
+            self.obj.state = b'world'
+            pending = await self.obj.push_loopsafe()
+            self.assertIsInstance(pending, asyncio.Future)
+            await asyncio.wait_for(pending, 1)
+        
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(push_from_elsewhere())
+        finally:
+            loop.close()
+        
+        self.assertEqual(self.ipc.objs[self.obj.ghid], b'world')
+    
+    def test_delete(self):
+        self.obj.push_window = 10
+        pending = self.obj.push_threadsafe()
+        self.obj.delete_threadsafe()
+        
+        self.assertTrue(pending.cancelled())
+        self.assertEqual(self.ipc.updates, [])
+
+
+class UpdateDeliveryTest(_ObjLoopTest):
+    ''' Test coalesced callbacks and update streams.
+    '''
+    
+    def test_callback(self):
+        calls = []
+        
+        async def callback(obj):
+            calls.append(obj.state)
+            await asyncio.sleep(.05)
+        
+        async def pull():
+            self.obj.callback = callback
+            self.obj.coalesce_callbacks = True
+            await self.obj._hgx_force_pull(b'0')
+            # Let the first callback start before the burst arrives
+            await asyncio.sleep(.01)
+            for ii in range(1, 5):
+                await self.obj._hgx_force_pull(str(ii).encode())
+            await asyncio.sleep(.2)
+        
+        self.run_coro(pull())
+        self.assertEqual(calls, [b'0', b'4'])
+    
+    def test_uncoalesced(self):
+        calls = []
+        
+        async def callback(obj):
+            calls.append(obj.state)
+        
+        async def pull():
+            self.obj.callback = callback
+            for ii in range(5):
+                await self.obj._hgx_force_pull(str(ii).encode())
+            await asyncio.sleep(.05)
+        
+        self.run_coro(pull())
+        self.assertEqual(len(calls), 5)
+    
+    def test_stream(self):
+        async def pull():
+            stream = self.obj.updates()
+            for ii in range(3):
+                await self.obj._hgx_force_pull(str(ii).encode())
+            
+            # Intermediate updates are skipped
+            first = await stream.__anext__()
+            await self.obj._hgx_force_pull(b'3')
+            second = await stream.__anext__()
+            return first, second
+        
+        self.assertEqual(self.run_coro(pull()), (b'2', b'3'))
+    
+    def test_stream_end(self):
+        async def consume(stream):
+            states = []
+            async for state in stream:
+                states.append(state)
+            return states
+        
+        async def pull():
+            consumer = asyncio.ensure_future(consume(self.obj.updates()))
+            await asyncio.sleep(0)
+            await self.obj._hgx_force_pull(b'hello')
+            await asyncio.sleep(0)
+            await self.obj.delete()
+            return await asyncio.wait_for(consumer, timeout=1)
+        
+        self.assertEqual(self.run_coro(pull()), [b'hello'])
+        
+        with self.assertRaises(DeadObject):
+            self.obj.updates()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,248 @@
+'''
+Scratchpad for test-based development.
+
+LICENSING
+-------------------------------------------------
+
+hypergolix: A python Golix client.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+    
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+    
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+    
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the
+    Free Software Foundation, Inc.,
+    51 Franklin Street,
+    Fifth Floor,
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+
+import unittest
+import asyncio
+import concurrent.futures
+
+from loopa import NoopLoop
+from loopa.utils import await_coroutine_threadsafe
+
+from hypergolix.privateer import Privateer
+from hypergolix.exceptions import RatchetError
+
+
+# ###############################################
+# Testing fixtures
+# ###############################################
+
+
+from _fixtures.identities import TEST_AGENT1
+from _fixtures.ghidutils import make_random_ghid
+
+
+def make_chain(length):
+    ''' Returns a target vector, newest first, like the GAO keeps.
+    '''
+    return [make_random_ghid() for __ in range(length)]
+
+
+class _CountingExecutor(concurrent.futures.ThreadPoolExecutor):
+    ''' Keeps track of how many jobs were submitted to it.
+    '''
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.submitted = 0
+    
+    def submit(self, *args, **kwargs):
+        self.submitted += 1
+        return super().submit(*args, **kwargs)
+
+
+# ###############################################
+# Testing
+# ###############################################
+
+
+class PrivateerHealTest(unittest.TestCase):
+    ''' Test ratchet healing.
+    '''
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.nooploop = NoopLoop(
+            debug = True,
+            threaded = True
+        )
+        cls.nooploop.start()
+    
+    @classmethod
+    def tearDownClass(cls):
+        # Kill the running loop.
+        cls.nooploop.stop_threadsafe_nowait()
+    
+    def setUp(self):
+        self.privateer = Privateer.__fixture__(TEST_AGENT1)
+        self.executor = _CountingExecutor(max_workers=2)
+        self.privateer._executor = self.executor
+        # The reference implementation, healed synchronously
+        self.reference = Privateer.__fixture__(TEST_AGENT1)
+    
+    def tearDown(self):
+        self.executor.shutdown()
+    
+    def heal(self, *args, **kwargs):
+        return await_coroutine_threadsafe(
+            coro = self.privateer.heal(*args, **kwargs),
+            loop = self.nooploop._loop
+        )
+    
+    def test_master(self):
+        proxy = make_random_ghid()
+        master = TEST_AGENT1.new_secret()
+        targets = make_chain(7)
+        
+        self.heal(proxy, targets, master_secret=master)
+        self.reference.heal_chain(proxy, targets, master_secret=master)
+        
+        # The oldest target only salts the first ratchet, so it's never
+        # derived itself.
+        for target in targets[:-1]:
+            self.assertIn(target, self.privateer)
+            self.assertEqual(
+                self.privateer.get(target),
+                self.reference.get(target)
+            )
+        self.assertNotIn(targets[-1], self.privateer)
+    
+    def test_chain(self):
+        proxy = make_random_ghid()
+        targets = make_chain(5)
+        seed = TEST_AGENT1.new_secret()
+        self.privateer.stage(targets[3], seed)
+        self.reference.stage(targets[3], seed)
+        
+        self.heal(proxy, targets)
+        self.reference.heal_chain(proxy, targets)
+        
+        for target in targets[:3]:
+            self.assertEqual(
+                self.privateer.get(target),
+                self.reference.get(target)
+            )
+        # Older than the seed: untouched.
+        self.assertNotIn(targets[4], self.privateer)
+        
+        # Healing again is a noop.
+        self.heal(proxy, targets)
+    
+    def test_checkpoints(self):
+        ''' Heals must be able to pick back up from previously-derived
+        secrets, even once they've left the secrets store.
+        '''
+        proxy = make_random_ghid()
+        targets = make_chain(5)
+        seed = TEST_AGENT1.new_secret()
+        self.privateer.stage(targets[-1], seed)
+        self.heal(proxy, targets)
+        
+        expected = {target: self.privateer.get(target) for target in targets}
+        # Forget everything, including the seed.
+        self.privateer._secrets_staging.clear()
+        
+        # Two new frames came in since then.
+        targets = make_chain(2) + targets
+        self.heal(proxy, targets)
+        self.reference.stage(targets[-1], seed)
+        self.reference.heal_chain(proxy, targets)
+        
+        for target in targets:
+            self.assertEqual(
+                self.privateer.get(target),
+                self.reference.get(target)
+            )
+        for target, secret in expected.items():
+            self.assertEqual(self.privateer.get(target), secret)
+        
+        # But abandoned secrets must not be resurrected.
+        self.privateer._secrets_staging.clear()
+        for target in targets:
+            self.privateer.abandon(target)
+        with self.assertRaises(RatchetError):
+            self.heal(proxy, targets)
+    
+    def test_inline(self):
+        ''' Short heals stay on the loop; long ones go to the executor.
+        '''
+        master = TEST_AGENT1.new_secret()
+        limit = self.privateer.HEAL_INLINE_LIMIT
+        
+        proxy = make_random_ghid()
+        targets = make_chain(limit + 1)
+        self.heal(proxy, targets, master_secret=master)
+        self.assertEqual(self.executor.submitted, 0)
+        
+        proxy = make_random_ghid()
+        targets = make_chain(limit + 2)
+        self.heal(proxy, targets, master_secret=master)
+        self.assertEqual(self.executor.submitted, 1)
+        
+        self.reference.heal_chain(proxy, targets, master_secret=master)
+        for target in targets[:-1]:
+            self.assertEqual(
+                self.privateer.get(target),
+                self.reference.get(target)
+            )
+        
+        # Only the new frames count towards the limit.
+        targets = make_chain(limit) + targets
+        self.heal(proxy, targets, master_secret=master)
+        self.assertEqual(self.executor.submitted, 1)
+    
+    def test_broken(self):
+        with self.assertRaises(RatchetError):
+            self.heal(make_random_ghid(), make_chain(3))
+    
+    def test_concurrent(self):
+        ''' Heals for many proxies at once must all land.
+        '''
+        master = TEST_AGENT1.new_secret()
+        length = self.privateer.HEAL_INLINE_LIMIT + 4
+        chains = {make_random_ghid(): make_chain(length) for __ in range(10)}
+        
+        async def heal_all():
+            await asyncio.gather(*[
+                self.privateer.heal(proxy, targets, master_secret=master)
+                for proxy, targets in chains.items()
+            ])
+        
+        await_coroutine_threadsafe(
+            coro = heal_all(),
+            loop = self.nooploop._loop
+        )
+        
+        for proxy, targets in chains.items():
+            self.reference.heal_chain(proxy, targets, master_secret=master)
+            for target in targets[:-1]:
+                self.assertEqual(
+                    self.privateer.get(target),
+                    self.reference.get(target)
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
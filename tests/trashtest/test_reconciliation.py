@@ -0,0 +1,162 @@
+'''
+Scratchpad for test-based development.
+
+LICENSING
+-------------------------------------------------
+
+hypergolix: A python Golix client.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+    
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+    
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+    
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the
+    Free Software Foundation, Inc.,
+    51 Franklin Street,
+    Fifth Floor,
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+
+import unittest
+
+from hypergolix import reconciliation
+from hypergolix.reconciliation import DigestIndex
+
+
+# ###############################################
+# Testing fixtures
+# ###############################################
+
+
+from _fixtures.ghidutils import make_random_ghid
+
+
+# ###############################################
+# Testing
+# ###############################################
+
+
+class DigestIndexTest(unittest.TestCase):
+    ''' Test the digest index, with whatever backend is available.
+    '''
+    
+    def test_roundtrip(self):
+        ghids = [make_random_ghid() for __ in range(100)]
+        index = DigestIndex(ghids)
+        
+        self.assertEqual(len(index), 100)
+        self.assertEqual(set(index.ghids), set(ghids))
+        self.assertEqual(len(bytes(index)), 100 * DigestIndex.DIGEST_LEN)
+        
+        loaded = DigestIndex.from_bytes(bytes(index))
+        self.assertIsNone(loaded.ghids)
+        self.assertEqual(bytes(loaded), bytes(index))
+        
+        with self.assertRaises(ValueError):
+            DigestIndex.from_bytes(bytes(index)[:-1])
+    
+    def test_missing(self):
+        shared = [make_random_ghid() for __ in range(50)]
+        ours_only = [make_random_ghid() for __ in range(5)]
+        theirs_only = [make_random_ghid() for __ in range(7)]
+        
+        ours = DigestIndex(shared + ours_only)
+        theirs = DigestIndex(shared + theirs_only)
+        # Go over the wire, like the remote would.
+        ours_remote = DigestIndex.from_bytes(bytes(ours))
+        
+        positions = ours_remote.missing_from(theirs)
+        positions = DigestIndex.unpack_positions(
+            DigestIndex.pack_positions(positions)
+        )
+        self.assertEqual(
+            set(ours.ghids[position] for position in positions),
+            set(ours_only)
+        )
+        
+        # Nothing is missing from an identical index, and everything is
+        # missing from an empty one.
+        self.assertEqual(ours.missing_from(ours_remote), [])
+        self.assertEqual(
+            ours.missing_from(DigestIndex()),
+            list(range(len(ours)))
+        )
+    
+    def test_updated(self):
+        ghids = [make_random_ghid() for __ in range(50)]
+        index = DigestIndex(ghids[:40])
+        
+        # Removing something missing is a no-op
+        updated = index.updated(
+            added = ghids[40:],
+            removed = ghids[:10] + [make_random_ghid()]
+        )
+        
+        rebuilt = DigestIndex(ghids[10:])
+        self.assertEqual(updated.ghids, rebuilt.ghids)
+        self.assertEqual(bytes(updated), bytes(rebuilt))
+        # The original is unaffected
+        self.assertEqual(bytes(index), bytes(DigestIndex(ghids[:40])))
+        
+        self.assertEqual(
+            bytes(DigestIndex().updated(added=ghids)),
+            bytes(DigestIndex(ghids))
+        )
+        self.assertEqual(len(index.updated(removed=ghids)), 0)
+    
+    def test_chunks(self):
+        ghids = [make_random_ghid() for __ in range(25)]
+        index = DigestIndex(ghids)
+        
+        chunks = list(index.chunks(10))
+        self.assertEqual([len(chunk) for chunk in chunks], [10, 10, 5])
+        self.assertEqual(
+            [ghid for chunk in chunks for ghid in chunk.ghids],
+            index.ghids
+        )
+        self.assertEqual(
+            b''.join(bytes(chunk) for chunk in chunks),
+            bytes(index)
+        )
+        
+        loaded = DigestIndex.from_bytes(bytes(index))
+        for chunk in loaded.chunks(10):
+            self.assertIsNone(chunk.ghids)
+        
+        self.assertEqual(list(DigestIndex().chunks(10)), [])
+
+
+class PurePythonTest(DigestIndexTest):
+    ''' Repeat the tests without numpy.
+    '''
+    
+    def setUp(self):
+        self._np = reconciliation.np
+        reconciliation.np = None
+    
+    def tearDown(self):
+        reconciliation.np = self._np
+
+
+if __name__ == "__main__":
+    from hypergolix import logutils
+    logutils.autoconfig(loglevel='debug')
+    
+    unittest.main()
@@ -0,0 +1,969 @@
+'''
+Scratchpad for test-based development.
+
+LICENSING
+-------------------------------------------------
+
+hypergolix: A python Golix client.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+    
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+    
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+    
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the
+    Free Software Foundation, Inc.,
+    51 Franklin Street,
+    Fifth Floor,
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+import unittest
+import tempfile
+import shutil
+import pathlib
+import asyncio
+import functools
+
+from loopa import NoopLoop
+from loopa.utils import await_coroutine_threadsafe
+
+from hypergolix.librarian import LibrarianCore
+from hypergolix.persistence import PersistenceCore
+from hypergolix.remotes import Salmonator
+from hypergolix.remotes import RemotePersistenceProtocol
+from hypergolix.remotes import _Outbox
+from hypergolix.utils import _BijectDict
+
+from hypergolix.exceptions import HypergolixException
+from hypergolix.exceptions import CommsError
+from hypergolix.exceptions import UnboundContainer
+from hypergolix.exceptions import DoesNotExist
+
+from hypergolix.persistence import _GeocLite
+from hypergolix.persistence import _GobsLite
+from hypergolix.persistence import _GobdLite
+
+
+# ###############################################
+# Testing fixtures
+# ###############################################
+
+
+from _fixtures.ghidutils import make_random_ghid
+
+from _fixtures.remote_exchanges import cont1_1
+from _fixtures.remote_exchanges import cont1_2
+from _fixtures.remote_exchanges import cont2_1
+from _fixtures.remote_exchanges import cont2_2
+from _fixtures.remote_exchanges import bind1_1
+from _fixtures.remote_exchanges import dyn1_1a
+from _fixtures.remote_exchanges import dyn1_1b
+from _fixtures.remote_exchanges import gidc1
+geoc1_1 = _GeocLite.from_golix(cont1_1)
+geoc1_2 = _GeocLite.from_golix(cont1_2)
+geoc2_1 = _GeocLite.from_golix(cont2_1)
+geoc2_2 = _GeocLite.from_golix(cont2_2)
+gobs1_1 = _GobsLite.from_golix(bind1_1)
+gobd1_1a = _GobdLite.from_golix(dyn1_1a)
+gobd1_1b = _GobdLite.from_golix(dyn1_1b)
+
+# Packed fixtures are bytearrays, which aren't hashable
+packed_cont1_1 = bytes(cont1_1.packed)
+packed_cont1_2 = bytes(cont1_2.packed)
+packed_cont2_1 = bytes(cont2_1.packed)
+packed_cont2_2 = bytes(cont2_2.packed)
+packed_bind1_1 = bytes(bind1_1.packed)
+packed_dyn1_1a = bytes(dyn1_1a.packed)
+packed_dyn1_1b = bytes(dyn1_1b.packed)
+
+
+class _RemoteFixture:
+    ''' Records the order of publishes, and how many were in flight at
+    once.
+    '''
+    _conn_desc = 'RemoteFixture'
+    
+    def __init__(self, reject=(), delay=.01, missing=False,
+                 desc='RemoteFixture', existing=()):
+        self._conn_desc = desc
+        self.has_connection = True
+        self.reject = set(reject)
+        self.existing = set(existing)
+        self.queried = []
+        self.reconciled = []
+        self.delay = delay
+        self.missing = missing
+        self.started = []
+        self.finished = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+    
+    async def publish(self, packed):
+        packed = bytes(packed)
+        self.started.append(packed)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(.01)
+            if packed in self.reject:
+                raise UnboundContainer()
+        finally:
+            self.in_flight -= 1
+        self.finished.append(packed)
+        return True
+    
+    async def get(self, ghid):
+        self.started.append(ghid)
+        await asyncio.sleep(self.delay)
+        if self.missing:
+            raise DoesNotExist()
+        return packed_cont1_1
+
+    async def query_existence(self, ghid):
+        self.queried.append(ghid)
+        return ghid in self.existing
+    
+    async def reconcile(self, index):
+        self.reconciled.append(list(index.ghids))
+        return [
+            position for position, ghid in enumerate(index.ghids)
+            if ghid not in self.existing
+        ]
+    
+    async def get_many(self, ghids, with_targets=False):
+        try:
+            return [(await self.get(ghid)) for ghid in ghids]
+        except DoesNotExist:
+            return []
+
+
+class _PercoreFixture:
+    ''' Loads and stores objects at the librarian, without any of the
+    validation, so that we can see what was ingested.
+    '''
+    
+    def __init__(self, librarian):
+        self._librarian = librarian
+        self._loader = PersistenceCore.__fixture__(librarian=librarian)
+        self.ingested = []
+    
+    async def attempt_load(self, packed):
+        return (await self._loader.attempt_load(bytes(packed)))
+    
+    async def ingest(self, packed, remotable=True, skip_conn=None,
+                     loaded=None):
+        if loaded is None:
+            loaded = await self.attempt_load(packed)
+        await self._librarian.store(loaded, bytes(packed))
+        self.ingested.append(loaded.ghid)
+        return loaded
+
+
+class _LoopbackConnection:
+    ''' Connects a client protocol straight through to a server protocol
+    in the same event loop, without any actual networking.
+    '''
+    
+    def __init__(self, receiver):
+        self.peer = None
+        self.receiver = receiver
+    
+    @classmethod
+    def pair(cls, client, server):
+        ''' Returns the client's end of a new connection to the server.
+        Its peer is the server's end.
+        '''
+        client_end = cls(client)
+        server_end = cls(server)
+        client_end.peer = server_end
+        server_end.peer = client_end
+        return client_end
+    
+    async def send(self, msg):
+        peer = self.peer
+        asyncio.ensure_future(peer.receiver(peer, bytes(msg)))
+
+
+class _LoopbackRemote:
+    ''' Stands in for a ConnectionPool, making every request through the
+    protocol over a single loopback connection.
+    '''
+    _conn_desc = 'Loopback'
+    
+    def __init__(self, protocol, connection):
+        self.has_connection = True
+        self._protocol = protocol
+        self._connection = connection
+    
+    def __getattr__(self, name):
+        return functools.partial(
+            getattr(self._protocol, name),
+            self._connection,
+            timeout = 1
+        )
+
+
+def _forget_request(protocol, code):
+    ''' Make the protocol instance handle the request code as unknown,
+    like a peer from before it was added.
+    '''
+    responders = protocol._RESPONDERS
+    protocol._RESPONDERS = _BijectDict({
+        key: responders[key] for key in responders
+        if code not in (key, responders[key])
+    })
+
+
+# ###############################################
+# Testing
+# ###############################################
+
+
+class OutboxTest(unittest.TestCase):
+    ''' Test the durable outbox itself.
+    '''
+    
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path = pathlib.Path(self.root) / 'test.outbox'
+    
+    def tearDown(self):
+        shutil.rmtree(self.root)
+    
+    def test_durability(self):
+        ghids = [make_random_ghid() for __ in range(5)]
+        
+        outbox = _Outbox(self.path)
+        for ghid in ghids:
+            outbox.append(ghid)
+        # Duplicates should be ignored.
+        outbox.append(ghids[0])
+        self.assertEqual(len(outbox), 5)
+        
+        # Appends must survive without an explicit snapshot.
+        self.assertEqual(list(_Outbox(self.path)._queue), ghids)
+        
+        self.assertEqual(outbox.popleft(), ghids[0])
+        outbox.snapshot()
+        self.assertEqual(list(_Outbox(self.path)._queue), ghids[1:])
+        
+        outbox.restore(ghids[:1])
+        outbox.snapshot()
+        self.assertEqual(list(_Outbox(self.path)._queue), ghids)
+        
+        outbox.clear()
+        self.assertFalse(_Outbox(self.path))
+
+
+class ReplayTest(unittest.TestCase):
+    ''' Test replaying deferred pushes.
+    '''
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.nooploop = NoopLoop(
+            debug = True,
+            threaded = True
+        )
+        cls.nooploop.start()
+    
+    @classmethod
+    def tearDownClass(cls):
+        # Kill the running loop.
+        cls.nooploop.stop_threadsafe_nowait()
+    
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.librarian = LibrarianCore.__fixture__()
+        self.salmonator = Salmonator(outbox_dir=self.root)
+        self.salmonator._librarian = self.librarian
+        
+        for obj, packed in ((gobs1_1, packed_bind1_1),
+                            (geoc1_1, packed_cont1_1),
+                            (geoc1_2, packed_cont1_2),
+                            (geoc2_1, packed_cont2_1)):
+            await_coroutine_threadsafe(
+                coro = self.librarian.store(obj, packed),
+                loop = self.nooploop._loop
+            )
+    
+    def tearDown(self):
+        shutil.rmtree(self.root)
+    
+    def _add_remote(self, remote):
+        self.salmonator._upstream_remotes.add(remote)
+        self.salmonator._outboxes[remote] = self.salmonator._make_outbox(
+            remote._conn_desc
+        )
+    
+    def test_ordering(self):
+        ''' Bindings must finish before anything after them starts, but
+        consecutive containers should be pipelined.
+        '''
+        remote = _RemoteFixture()
+        self._add_remote(remote)
+        outbox = self.salmonator._outboxes[remote]
+        for obj in (geoc1_2, gobs1_1, geoc1_1, geoc2_1):
+            outbox.append(obj.ghid)
+        
+        await_coroutine_threadsafe(
+            coro = self.salmonator._replay_outbox(remote),
+            loop = self.nooploop._loop
+        )
+        
+        self.assertEqual(
+            remote.started,
+            [packed_cont1_2, packed_bind1_1, packed_cont1_1, packed_cont2_1]
+        )
+        # The binding must have finished before the next container started
+        self.assertLess(
+            remote.finished.index(packed_bind1_1),
+            remote.started.index(packed_cont1_1)
+        )
+        self.assertEqual(remote.max_in_flight, 2)
+        
+        self.assertFalse(outbox)
+        self.assertEqual(
+            self.salmonator.outbox_stats()['RemoteFixture'][0],
+            0
+        )
+        self.assertIsNotNone(outbox.replay_rate)
+    
+    def test_push_deferral(self):
+        ''' Pushes to disconnected remotes must be deferred to disk, and
+        rejected pushes dropped during replay.
+        '''
+        remote = _RemoteFixture(reject={packed_cont1_1})
+        remote.has_connection = False
+        self._add_remote(remote)
+        
+        for obj in (gobs1_1, geoc1_1, geoc1_2):
+            await_coroutine_threadsafe(
+                coro = self.salmonator.push(obj.ghid),
+                loop = self.nooploop._loop
+            )
+        self.assertFalse(remote.started)
+        
+        # Simulate a restart.
+        self._add_remote(remote)
+        self.assertEqual(len(self.salmonator._outboxes[remote]), 3)
+        
+        remote.has_connection = True
+        await_coroutine_threadsafe(
+            coro = self.salmonator._replay_outbox(remote),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(
+            remote.finished,
+            [packed_bind1_1, packed_cont1_2]
+        )
+        self.assertFalse(self.salmonator._outboxes[remote])
+    
+    def test_reconcile(self):
+        ''' Objects missing at the remote must be pushed, bindings first.
+        '''
+        remote = _RemoteFixture(existing={geoc1_1.ghid})
+        self._add_remote(remote)
+        
+        await_coroutine_threadsafe(
+            coro = self.salmonator.reconcile(remote),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(remote.started[0], packed_bind1_1)
+        self.assertEqual(
+            set(remote.finished),
+            {packed_bind1_1, packed_cont1_2, packed_cont2_1}
+        )
+        self.assertFalse(self.salmonator._outboxes[remote])
+    
+    def test_reconcile_chunks(self):
+        ''' Large indices must be sent in chunks, and later reconciliations
+        should only send whatever is new since the last one.
+        '''
+        remote = _RemoteFixture(existing={geoc1_1.ghid})
+        self._add_remote(remote)
+        self.salmonator.RECONCILE_CHUNK = 3
+        
+        await_coroutine_threadsafe(
+            coro = self.salmonator.reconcile(remote),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual([len(sent) for sent in remote.reconciled], [3, 1])
+        self.assertEqual(
+            set(remote.finished),
+            {packed_bind1_1, packed_cont1_2, packed_cont2_1}
+        )
+        
+        await_coroutine_threadsafe(
+            coro = self.librarian.store(geoc2_2, packed_cont2_2),
+            loop = self.nooploop._loop
+        )
+        remote.reconciled.clear()
+        await_coroutine_threadsafe(
+            coro = self.salmonator.reconcile(remote),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(remote.reconciled, [[geoc2_2.ghid]])
+        self.assertIn(packed_cont2_2, remote.finished)
+        self.assertFalse(self.salmonator._outboxes[remote])
+    
+    def test_existence_check(self):
+        ''' Large containers must not be uploaded if the remote already
+        has them.
+        '''
+        remote = _RemoteFixture(existing={geoc1_1.ghid})
+        self._add_remote(remote)
+        # All of the fixture containers count as "large" here.
+        self.salmonator.EXISTENCE_CHECK_SIZE = 1
+        
+        for obj in (gobs1_1, geoc1_1, geoc1_2):
+            await_coroutine_threadsafe(
+                coro = self.salmonator.push(obj.ghid),
+                loop = self.nooploop._loop
+            )
+        
+        # Bindings are never checked.
+        self.assertEqual(remote.queried, [geoc1_1.ghid, geoc1_2.ghid])
+        self.assertEqual(remote.finished, [packed_bind1_1, packed_cont1_2])
+        self.assertEqual(
+            self.salmonator.push_stats(),
+            {'skipped': 1, 'bytes_saved': len(packed_cont1_1)}
+        )
+
+
+
+class PullTest(unittest.TestCase):
+    ''' Test pulling from upstream.
+    '''
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.nooploop = NoopLoop(
+            debug = True,
+            threaded = True
+        )
+        cls.nooploop.start()
+    
+    @classmethod
+    def tearDownClass(cls):
+        # Kill the running loop.
+        cls.nooploop.stop_threadsafe_nowait()
+    
+    def setUp(self):
+        self.librarian = LibrarianCore.__fixture__()
+        self.percore = PersistenceCore.__fixture__(librarian=self.librarian)
+        self.salmonator = Salmonator()
+        self.salmonator._librarian = self.librarian
+        self.salmonator._percore = self.percore
+        
+        self.remote = _RemoteFixture()
+        self.salmonator._upstream_remotes.add(self.remote)
+    
+    def test_singleflight(self):
+        ''' Concurrent pulls for the same ghid must be collapsed.
+        '''
+        async def pull_many(ghid, count):
+            await asyncio.gather(
+                *(self.salmonator.pull(ghid) for __ in range(count)),
+                loop = self.nooploop._loop
+            )
+        
+        await_coroutine_threadsafe(
+            coro = pull_many(geoc1_1.ghid, 5),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(self.remote.started, [geoc1_1.ghid])
+        self.assertEqual(
+            self.salmonator.pull_stats(),
+            {'started': 1, 'collapsed': 4, 'hedged': 0}
+        )
+        self.assertFalse(self.salmonator._pulls_in_flight)
+        
+        # Once finished, the next pull must go upstream again.
+        await_coroutine_threadsafe(
+            coro = self.salmonator.pull(geoc1_1.ghid),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(len(self.remote.started), 2)
+    
+    def _add_remote(self, latency, **kwargs):
+        remote = _RemoteFixture(**kwargs)
+        self.salmonator._upstream_remotes.add(remote)
+        self.salmonator._health(remote).record(latency)
+        return remote
+    
+    def test_ranked(self):
+        ''' Pulls must go to the healthiest remote only.
+        '''
+        slow = self._add_remote(.5, desc='slow')
+        # This one is down.
+        self._add_remote(.001, desc='down').has_connection = False
+        # Note that self.remote has no latency samples, so it is tried
+        # first; replace it so that the ranking is deterministic.
+        self.salmonator._upstream_remotes.discard(self.remote)
+        fast = self._add_remote(.01, desc='fast')
+        
+        await_coroutine_threadsafe(
+            coro = self.salmonator.pull(geoc1_1.ghid),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(fast.started, [geoc1_1.ghid])
+        self.assertFalse(slow.started)
+        self.assertEqual(self.salmonator.pull_stats()['hedged'], 0)
+        self.assertIn('fast', self.salmonator.remote_health())
+    
+    def test_miss(self):
+        ''' Remotes that simply don't have the object are still healthy.
+        '''
+        self.remote.missing = True
+        with self.assertRaises(DoesNotExist):
+            await_coroutine_threadsafe(
+                coro = self.salmonator._fetch(geoc1_1.ghid, self.remote),
+                loop = self.nooploop._loop
+            )
+        
+        health = self.salmonator._health(self.remote)
+        self.assertEqual(health.error_rate, 0)
+        self.assertIsNotNone(health.latency)
+    
+    def test_hedged(self):
+        ''' Slow or failed remotes must cause the pull to move on to the
+        next remote.
+        '''
+        self.salmonator._upstream_remotes.discard(self.remote)
+        # Historically fast, but currently sluggish.
+        sluggish = self._add_remote(.01, delay=1, desc='sluggish')
+        backup = self._add_remote(.02, desc='backup')
+        
+        await_coroutine_threadsafe(
+            coro = self.salmonator.pull(geoc1_1.ghid),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(sluggish.started, [geoc1_1.ghid])
+        self.assertEqual(backup.started, [geoc1_1.ghid])
+        self.assertEqual(self.salmonator.pull_stats()['hedged'], 1)
+        
+        # Now a missing object at the best remote should fall straight
+        # through to the next one, without waiting to hedge.
+        self.salmonator._upstream_remotes.discard(sluggish)
+        missing = self._add_remote(.001, missing=True, desc='missing')
+        missing.delay = 0
+        await_coroutine_threadsafe(
+            coro = self.salmonator.pull(geoc1_2.ghid),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(missing.started, [geoc1_2.ghid])
+        self.assertEqual(backup.started[-1], geoc1_2.ghid)
+        self.assertEqual(self.salmonator.pull_stats()['hedged'], 1)
+        # ...and without counting against the remote's health.
+        self.assertEqual(self.salmonator._health(missing).error_rate, 0)
+    
+    def test_legacy_remote(self):
+        ''' Remotes without get_many must fall back to get.
+        '''
+        async def get_many(ghids, with_targets=False):
+            # This is how an unknown request comes back from the remote.
+            raise CommsError("b'GM'")
+        self.remote.get_many = get_many
+        
+        for ghid in (geoc1_1.ghid, geoc1_2.ghid):
+            await_coroutine_threadsafe(
+                coro = self.salmonator.pull(ghid),
+                loop = self.nooploop._loop
+            )
+        self.assertEqual(self.remote.started, [geoc1_1.ghid, geoc1_2.ghid])
+        self.assertIn(self.remote, self.salmonator._legacy_remotes)
+    
+    def test_broadcast(self):
+        ''' With broadcast pulls, every remote must be asked at once.
+        '''
+        salmonator = Salmonator(broadcast_pulls=True)
+        salmonator._librarian = self.librarian
+        salmonator._percore = self.percore
+        remotes = [_RemoteFixture(desc=str(i)) for i in range(3)]
+        salmonator._upstream_remotes.update(remotes)
+        
+        await_coroutine_threadsafe(
+            coro = salmonator.pull(geoc1_1.ghid),
+            loop = self.nooploop._loop
+        )
+        for remote in remotes:
+            self.assertEqual(remote.started, [geoc1_1.ghid])
+
+
+
+class PoolRoutingTest(unittest.TestCase):
+    ''' Test which publishes may use bulk lanes.
+    '''
+    
+    def test_publish(self):
+        # Nothing here can trigger a subscription update...
+        for packed in (packed_cont1_1, packed_bind1_1, memoryview(gidc1)):
+            self.assertTrue(Salmonator._bulk_publish(packed))
+        
+        # ...but dynamic bindings can, so they must stay on the control lane
+        # (or the server would echo them back to the publishing client).
+        self.assertFalse(Salmonator._bulk_publish(packed_dyn1_1a))
+
+
+class SubscriptionTest(unittest.TestCase):
+    ''' Test handling subscription updates for dynamic bindings.
+    '''
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.nooploop = NoopLoop(
+            debug = True,
+            threaded = True
+        )
+        cls.nooploop.start()
+    
+    @classmethod
+    def tearDownClass(cls):
+        # Kill the running loop.
+        cls.nooploop.stop_threadsafe_nowait()
+    
+    def setUp(self):
+        self.librarian = LibrarianCore.__fixture__()
+        self.percore = _PercoreFixture(self.librarian)
+        self.salmonator = Salmonator()
+        self.salmonator._librarian = self.librarian
+        self.salmonator._percore = self.percore
+        self.remote = _RemoteFixture()
+        self.salmonator._upstream_remotes.add(self.remote)
+        
+        self.protocol = RemotePersistenceProtocol.__fixture__(
+            percore = self.percore,
+            librarian = self.librarian
+        )
+        self.protocol._salmonator = self.salmonator
+    
+    def _await_target(self):
+        ''' Wait for the background notification to get the target.
+        '''
+        async def wait_for_target():
+            while not (await self.librarian.contains(geoc1_1.ghid)):
+                await asyncio.sleep(.01)
+        
+        await_coroutine_threadsafe(
+            coro = asyncio.wait_for(wait_for_target(), timeout=1),
+            loop = self.nooploop._loop
+        )
+    
+    def test_bundled(self):
+        ''' A bundled target must be used without going upstream.
+        '''
+        await_coroutine_threadsafe(
+            coro = self.protocol._handle_update(
+                None,
+                gobd1_1a.ghid,
+                memoryview(packed_dyn1_1a),
+                memoryview(packed_cont1_1)
+            ),
+            loop = self.nooploop._loop
+        )
+        self._await_target()
+        
+        # Binding first, then target.
+        self.assertEqual(self.percore.ingested, [gobd1_1a.ghid, geoc1_1.ghid])
+        self.assertFalse(self.remote.started)
+    
+    def test_prefetch(self):
+        ''' Unbundled targets must be prefetched from upstream, instead of
+        waiting for the binding to be ingested and pulling afterwards.
+        '''
+        await_coroutine_threadsafe(
+            coro = self.protocol._handle_update(
+                None,
+                gobd1_1a.ghid,
+                memoryview(packed_dyn1_1a)
+            ),
+            loop = self.nooploop._loop
+        )
+        self._await_target()
+        
+        self.assertEqual(self.percore.ingested, [gobd1_1a.ghid, geoc1_1.ghid])
+        # The prefetch satisfied the notification, so there was no pull.
+        self.assertEqual(self.remote.started, [geoc1_1.ghid])
+        self.assertEqual(self.salmonator.pull_stats()['started'], 0)
+
+
+class LoopbackTest(unittest.TestCase):
+    ''' Test requests end to end, over a loopback connection to a real
+    server protocol, but without the rest of the service.
+    '''
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.nooploop = NoopLoop(
+            debug = True,
+            threaded = True
+        )
+        cls.nooploop.start()
+    
+    @classmethod
+    def tearDownClass(cls):
+        # Kill the running loop.
+        cls.nooploop.stop_threadsafe_nowait()
+    
+    def setUp(self):
+        self.server_librarian = LibrarianCore.__fixture__()
+        self.server = RemotePersistenceProtocol()
+        self.server._librarian = self.server_librarian
+        
+        # The client needs all of this to handle subscription updates.
+        self.client_librarian = LibrarianCore.__fixture__()
+        self.percore = _PercoreFixture(self.client_librarian)
+        self.salmonator = Salmonator()
+        self.salmonator._librarian = self.client_librarian
+        self.salmonator._percore = self.percore
+        self.remote = _RemoteFixture()
+        self.salmonator._upstream_remotes.add(self.remote)
+        
+        self.client = RemotePersistenceProtocol()
+        self.client._percore = self.percore
+        self.client._librarian = self.client_librarian
+        self.client._salmonator = self.salmonator
+        self.connection = _LoopbackConnection.pair(self.client, self.server)
+    
+    def run_coro(self, coro):
+        return await_coroutine_threadsafe(
+            coro = coro,
+            loop = self.nooploop._loop
+        )
+    
+    def store(self, librarian, *objs):
+        for obj, packed in objs:
+            self.run_coro(librarian.store(obj, packed))
+    
+    def test_get_many(self):
+        self.store(
+            self.server_librarian,
+            (gobd1_1a, packed_dyn1_1a),
+            (geoc1_1, packed_cont1_1),
+            (geoc2_1, packed_cont2_1)
+        )
+        ghids = [gobd1_1a.ghid, make_random_ghid(), geoc2_1.ghid]
+        
+        # Missing objects are just left out.
+        results = self.run_coro(
+            self.client.get_many(self.connection, ghids, timeout=1)
+        )
+        self.assertEqual(
+            [bytes(packed) for packed in results],
+            [packed_dyn1_1a, packed_cont2_1]
+        )
+        
+        # Targets immediately follow their bindings.
+        results = self.run_coro(
+            self.client.get_many(
+                self.connection,
+                ghids,
+                with_targets = True,
+                timeout = 1
+            )
+        )
+        self.assertEqual(
+            [bytes(packed) for packed in results],
+            [packed_dyn1_1a, packed_cont1_1, packed_cont2_1]
+        )
+        
+        results = self.run_coro(
+            self.client.get_many(self.connection, [], timeout=1)
+        )
+        self.assertEqual(results, [])
+    
+    def test_get_many_budget(self):
+        ''' Targets must be left out once the response is over budget,
+        but requested objects never are.
+        '''
+        self.store(
+            self.server_librarian,
+            (gobd1_1a, packed_dyn1_1a),
+            (geoc1_1, packed_cont1_1),
+            (geoc2_1, packed_cont2_1)
+        )
+        ghids = [gobd1_1a.ghid, geoc2_1.ghid]
+        # Each object also has a 4-byte length prefix.
+        fits = len(packed_dyn1_1a) + len(packed_cont1_1) + 8
+        
+        self.server.GET_MANY_BUDGET = fits - 1
+        results = self.run_coro(
+            self.client.get_many(
+                self.connection,
+                ghids,
+                with_targets = True,
+                timeout = 1
+            )
+        )
+        self.assertEqual(
+            [bytes(packed) for packed in results],
+            [packed_dyn1_1a, packed_cont2_1]
+        )
+        
+        self.server.GET_MANY_BUDGET = fits
+        results = self.run_coro(
+            self.client.get_many(
+                self.connection,
+                ghids,
+                with_targets = True,
+                timeout = 1
+            )
+        )
+        self.assertEqual(
+            [bytes(packed) for packed in results],
+            [packed_dyn1_1a, packed_cont1_1, packed_cont2_1]
+        )
+    
+    def test_legacy_get_many(self):
+        ''' Pulls from a server that doesn't know get_many must fall back
+        to get.
+        '''
+        _forget_request(self.server, b'GM')
+        self.store(self.server_librarian, (geoc1_1, packed_cont1_1))
+        
+        remote = _LoopbackRemote(self.client, self.connection)
+        self.salmonator._upstream_remotes.clear()
+        self.salmonator._upstream_remotes.add(remote)
+        
+        self.run_coro(self.salmonator.pull(geoc1_1.ghid))
+        self.assertEqual(self.percore.ingested, [geoc1_1.ghid])
+        self.assertIn(remote, self.salmonator._legacy_remotes)
+    
+    def deliver(self):
+        ''' Have the server send the client a subscription update for
+        the dynamic binding.
+        '''
+        self.store(
+            self.server_librarian,
+            (gobd1_1a, packed_dyn1_1a),
+            (geoc1_1, packed_cont1_1)
+        )
+        self.run_coro(
+            self.server.deliver(
+                self.connection.peer,
+                gobd1_1a.ghid,
+                gobd1_1a.frame_ghid,
+                timeout = 1
+            )
+        )
+    
+    def test_bundled(self):
+        ''' Small targets must arrive with the binding, without the client
+        going back upstream for them.
+        '''
+        self.deliver()
+        
+        # The client has already ingested both by the time it responds.
+        self.assertEqual(self.percore.ingested, [gobd1_1a.ghid, geoc1_1.ghid])
+        self.assertFalse(self.remote.started)
+        self.assertFalse(self.server._legacy_connections)
+    
+    def test_unbundled(self):
+        ''' Targets over the threshold must be left out, and then
+        prefetched by the client instead.
+        '''
+        self.server.bundle_threshold = len(packed_cont1_1) - 1
+        self.deliver()
+        
+        async def wait_for_target():
+            while not (await self.client_librarian.contains(geoc1_1.ghid)):
+                await asyncio.sleep(.01)
+        
+        self.run_coro(asyncio.wait_for(wait_for_target(), timeout=1))
+        self.assertEqual(self.percore.ingested, [gobd1_1a.ghid, geoc1_1.ghid])
+        self.assertEqual(self.remote.started, [geoc1_1.ghid])
+    
+    def test_legacy_client(self):
+        ''' Clients that don't know bundled updates must get plain ones
+        instead.
+        '''
+        _forget_request(self.client, b'!T')
+        self.deliver()
+        
+        self.assertEqual(self.percore.ingested[0], gobd1_1a.ghid)
+        self.assertIn(self.connection.peer, self.server._legacy_connections)
+    
+    def test_reconcile(self):
+        ''' The server must report anything the client has that it
+        doesn't, including newer dynamic frames.
+        '''
+        self.store(
+            self.server_librarian,
+            (gobd1_1a, packed_dyn1_1a),
+            (geoc1_1, packed_cont1_1)
+        )
+        self.store(
+            self.client_librarian,
+            (gobd1_1b, packed_dyn1_1b),
+            (geoc1_1, packed_cont1_1),
+            (geoc1_2, packed_cont1_2)
+        )
+        
+        index = self.run_coro(self.client_librarian.digest_index())
+        positions = self.run_coro(
+            self.client.reconcile(self.connection, index, timeout=1)
+        )
+        self.assertEqual(
+            {index.ghids[position] for position in positions},
+            {gobd1_1b.frame_ghid, geoc1_2.ghid}
+        )
+    
+    def test_reconcile_push(self):
+        ''' After reconciling through the salmonator, the server must have
+        everything the client does.
+        '''
+        server_percore = _PercoreFixture(self.server_librarian)
+        self.server._percore = server_percore
+        self.store(self.server_librarian, (geoc1_1, packed_cont1_1))
+        self.store(
+            self.client_librarian,
+            (gobd1_1b, packed_dyn1_1b),
+            (geoc1_1, packed_cont1_1),
+            (geoc1_2, packed_cont1_2)
+        )
+        
+        remote = _LoopbackRemote(self.client, self.connection)
+        self.salmonator._upstream_remotes.clear()
+        self.salmonator._upstream_remotes.add(remote)
+        self.salmonator._outboxes[remote] = self.salmonator._make_outbox(
+            remote._conn_desc
+        )
+        
+        self.run_coro(self.salmonator.reconcile(remote))
+        # Bindings first.
+        self.assertEqual(
+            server_percore.ingested,
+            [gobd1_1b.ghid, geoc1_2.ghid]
+        )
+        self.assertFalse(self.salmonator._outboxes[remote])
+        
+        # Afterwards, both sides agree.
+        index = self.run_coro(self.client_librarian.digest_index())
+        positions = self.run_coro(
+            self.client.reconcile(self.connection, index, timeout=1)
+        )
+        self.assertEqual(positions, [])
+
+
+if __name__ == "__main__":
+    from hypergolix import logutils
+    logutils.autoconfig(loglevel='debug')
+    
+    unittest.main()
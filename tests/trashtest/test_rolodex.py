@@ -187,6 +187,58 @@ class RolodexTest(unittest.TestCase):
             loop = self.nooploop._loop
         )
         
+    def test_share_many(self):
+        ''' Test share_many.
+        '''
+        await_coroutine_threadsafe(
+            coro = self.librarian.store(gidclite1, gidc1),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = self.librarian.store(gidclite2, gidc2),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = self.librarian.store(obj1, cont1_1.packed),
+            loop = self.nooploop._loop
+        )
+        self.privateer.stage(obj1.ghid, secret1_1)
+        token = AppToken.pseudorandom()
+        
+        await_coroutine_threadsafe(
+            coro = self.rolodex.share_many(
+                target = obj1.ghid,
+                recipients = [gidclite1.ghid, gidclite2.ghid],
+                requesting_token = token
+            ),
+            loop = self.nooploop._loop
+        )
+        
+        self.assertEqual(len(self.rolodex._pending_requests), 2)
+        for recipient in (gidclite1.ghid, gidclite2.ghid):
+            self.assertIn(recipient, self.rolodex._identities)
+            self.assertIn(
+                token,
+                self.rolodex._outstanding_shares.get_any(
+                    (obj1.ghid, recipient)
+                )
+            )
+        
+        # One bad recipient mustn't stop the others.
+        unknown = make_random_ghid()
+        self.rolodex._pending_requests.clear()
+        with self.assertRaises(Exception):
+            await_coroutine_threadsafe(
+                coro = self.rolodex.share_many(
+                    target = obj1.ghid,
+                    recipients = [unknown, gidclite2.ghid],
+                    requesting_token = None
+                ),
+                loop = self.nooploop._loop
+            )
+        self.assertEqual(len(self.rolodex._pending_requests), 1)
+        self.assertNotIn(unknown, self.rolodex._identities)
+    
     def test_notification_handler(self):
         ''' Test share_object.
         '''
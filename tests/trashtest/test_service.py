@@ -53,8 +53,11 @@ from hypergolix.service import RemotePersistenceServer
 from hypergolix.comms import BasicServer
 from hypergolix.comms import WSConnection
 from hypergolix.comms import ConnectionManager
+from hypergolix.comms import ConnectionPool
 from hypergolix.comms import _ConnectionBase
 
+from hypergolix.reconciliation import DigestIndex
+
 from hypergolix.utils import Aengel
 
 from hypergolix.persistence import PersistenceCore
@@ -221,6 +224,28 @@ class ServiceTest(unittest.TestCase):
             tls = False
         )
         
+        # And a pooled client, sharing the same commander.
+        cls.client2_librarian = LibrarianCore.__fixture__()
+        cls.client2_percore = PersistenceCore.__fixture__(
+            librarian = cls.client2_librarian
+        )
+        cls.client2_protocol = RemotePersistenceProtocol()
+        cls.client2_protocol._percore = cls.client2_percore
+        cls.client2_protocol._librarian = cls.client2_librarian
+        cls.client2 = ConnectionPool(
+            connection_cls = WSConnection,
+            msg_handler = cls.client2_protocol,
+            lanes = 3,
+            bulk_requests = {'publish', 'get'}
+        )
+        for lane in cls.client2.lanes:
+            cls.client1_commander.register_task(
+                lane,
+                host = 'localhost',
+                port = 1989,
+                tls = False
+            )
+        
         cls.rps.start()
         cls.client1_commander.start()
         
@@ -234,6 +259,7 @@ class ServiceTest(unittest.TestCase):
         ''' Do any per-test fixturing.
         '''
         self.client1_librarian.RESET()
+        self.client2_librarian.RESET()
         
     def test_ping(self):
         ''' Perform one test ping.
@@ -291,6 +317,163 @@ class ServiceTest(unittest.TestCase):
             )
         )
         
+    def test_pool(self):
+        ''' Test exchanges through a connection pool.
+        '''
+        await_coroutine_threadsafe(
+            coro = self.client2.ping(timeout=1),
+            loop = self.client1_commander._loop
+        )
+        for lane in self.client2.lanes:
+            await_coroutine_threadsafe(
+                coro = lane.await_connection(),
+                loop = self.client1_commander._loop
+            )
+        
+        # Control traffic stays on the control lane; bulk traffic doesn't.
+        self.assertIs(
+            self.client2._pick_lane('subscribe'),
+            self.client2.control_lane
+        )
+        self.assertIn(
+            self.client2._pick_lane('publish'),
+            self.client2.lanes[1:]
+        )
+        
+        await_coroutine_threadsafe(
+            coro = self.client2.publish(gidc1, timeout=1),
+            loop = self.client1_commander._loop
+        )
+        self.assertTrue(
+            await_coroutine_threadsafe(
+                coro = self.rps.librarian.contains(gidclite1.ghid),
+                loop = self.rps._loop
+            )
+        )
+        self.assertEqual(
+            await_coroutine_threadsafe(
+                coro = self.client2.get(gidclite1.ghid, timeout=1),
+                loop = self.client1_commander._loop
+            ),
+            gidc1
+        )
+        
+        # Make sure everything was cleaned up afterwards.
+        self.assertFalse(any(self.client2._in_flight.values()))
+    
+    def test_get_many(self):
+        ''' Fetch a binding and its target in one request.
+        '''
+        for packed in (gidc1, bind1_1.packed, cont1_1.packed):
+            await_coroutine_threadsafe(
+                coro = self.client1.publish(packed, timeout=1),
+                loop = self.client1_commander._loop
+            )
+        
+        result = await_coroutine_threadsafe(
+            coro = self.client1.get_many(
+                [sbind1.ghid, obj3.ghid],
+                with_targets = True,
+                timeout = 1
+            ),
+            loop = self.client1_commander._loop
+        )
+        self.assertEqual(
+            [bytes(packed) for packed in result],
+            [bytes(bind1_1.packed), bytes(cont1_1.packed)]
+        )
+        
+        # Without targets, only the requested (and available) objects
+        result = await_coroutine_threadsafe(
+            coro = self.client1.get_many(
+                [obj3.ghid, obj1.ghid, sbind1.ghid],
+                timeout = 1
+            ),
+            loop = self.client1_commander._loop
+        )
+        self.assertEqual(
+            [bytes(packed) for packed in result],
+            [bytes(cont1_1.packed), bytes(bind1_1.packed)]
+        )
+        
+    
+    def test_bundling(self):
+        ''' Small targets of dynamic bindings must be bundled with their
+        subscription updates.
+        '''
+        for packed in (gidc1, dyn1_1a.packed, cont1_1.packed):
+            await_coroutine_threadsafe(
+                coro = self.client1.publish(packed, timeout=1),
+                loop = self.client1_commander._loop
+            )
+        
+        protocol = self.rps.remote_protocol
+        self.assertEqual(
+            await_coroutine_threadsafe(
+                coro = protocol._bundleable_target(dbind1a.ghid),
+                loop = self.rps._loop
+            ),
+            obj1.ghid
+        )
+        
+        # But not if the target is too big.
+        protocol.bundle_threshold = 10
+        try:
+            self.assertIsNone(
+                await_coroutine_threadsafe(
+                    coro = protocol._bundleable_target(dbind1a.ghid),
+                    loop = self.rps._loop
+                )
+            )
+        finally:
+            protocol.bundle_threshold = protocol.BUNDLE_THRESHOLD
+        
+        # Now make sure the client understands the bundle.
+        await_coroutine_threadsafe(
+            coro = self.client1.subscribe(dbind1a.ghid, timeout=1),
+            loop = self.client1_commander._loop
+        )
+        connection = next(iter(
+            self.rps.postman._connections.get_any(dbind1a.ghid)
+        ))
+        await_coroutine_threadsafe(
+            coro = protocol.deliver(
+                connection,
+                dbind1a.ghid,
+                dbind1a.ghid,
+                timeout = 1
+            ),
+            loop = self.rps._loop
+        )
+        self.assertNotIn(connection, protocol._legacy_connections)
+    
+    def test_reconcile(self):
+        ''' Find out which of our objects the remote is missing.
+        '''
+        for packed in (gidc1, bind1_1.packed, cont1_1.packed,
+                       dyn1_1a.packed):
+            await_coroutine_threadsafe(
+                coro = self.client1.publish(packed, timeout=1),
+                loop = self.client1_commander._loop
+            )
+        
+        # Note that the remote has an older frame of the dynamic binding.
+        index = DigestIndex([
+            gidclite1.ghid,
+            sbind1.ghid,
+            obj1.ghid,
+            obj2.ghid,
+            obj3.ghid,
+            dbind1b.frame_ghid
+        ])
+        positions = await_coroutine_threadsafe(
+            coro = self.client1.reconcile(index, timeout=1),
+            loop = self.client1_commander._loop
+        )
+        self.assertEqual(
+            set(index.ghids[position] for position in positions),
+            {obj2.ghid, obj3.ghid, dbind1b.frame_ghid}
+        )
 
 if __name__ == "__main__":
     from hypergolix import logutils
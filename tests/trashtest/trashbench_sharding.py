@@ -0,0 +1,167 @@
+'''
+Scratchpad for benchmarking sharded account containers.
+
+Times pushing a single changed secret through a ShardedGAODict (as used
+for Account.privateer_persistent), versus through a flat GAODict, at a
+few account sizes. Run directly; optionally pass the sizes to test:
+    
+    python trashbench_sharding.py 10000 100000 1000000
+
+The flat GAODict is skipped above FLAT_LIMIT, since each of its snapshots
+re-encodes the whole account.
+
+LICENSING
+-------------------------------------------------
+
+hypergolix: A python Golix client.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+    
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+    
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+    
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the
+    Free Software Foundation, Inc.,
+    51 Franklin Street,
+    Fifth Floor,
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+import sys
+import time
+import statistics
+
+from loopa import NoopLoop
+from loopa.utils import await_coroutine_threadsafe
+
+from hypergolix.gao import GAODict
+from hypergolix.gao import ShardedGAODict
+
+from hypergolix.persistence import PersistenceCore
+from hypergolix.core import GolixCore
+from hypergolix.core import GhidProxier
+from hypergolix.privateer import Privateer
+from hypergolix.librarian import LibrarianCore
+
+
+# ###############################################
+# Fixtures
+# ###############################################
+
+
+from _fixtures.ghidutils import make_random_ghid
+from _fixtures.identities import TEST_AGENT1
+
+
+SIZES = [10000, 100000, 1000000]
+FLAT_LIMIT = 100000
+# Number of single-secret pushes to time per size
+SAMPLES = 20
+
+
+class ShardingBench:
+    ''' Set up just enough of a hypergolix core to push GAOs.
+    '''
+    
+    def __init__(self, loop):
+        self.loop = loop
+        # The fixture has nothing behind its memory cache, so it must never
+        # evict anything (big accounts have far more than 10k objects).
+        self.librarian = LibrarianCore.__fixture__(memory_cache=2 ** 32)
+        self.golcore = GolixCore.__fixture__(TEST_AGENT1,
+                                             librarian=self.librarian)
+        self.ghidproxy = GhidProxier()
+        self.ghidproxy.assemble(self.librarian)
+        self.privateer = Privateer.__fixture__(TEST_AGENT1)
+        self.percore = PersistenceCore.__fixture__(librarian=self.librarian)
+    
+    def run_coro(self, coro):
+        return await_coroutine_threadsafe(
+            coro = coro,
+            loop = self.loop._loop
+        )
+    
+    def make_gao(self, cls):
+        return cls(
+            None,
+            True,
+            None,
+            7,
+            golcore = self.golcore,
+            ghidproxy = self.ghidproxy,
+            privateer = self.privateer,
+            percore = self.percore,
+            librarian = self.librarian
+        )
+    
+    def time_push(self, gao):
+        start = time.monotonic()
+        self.run_coro(gao.push())
+        return time.monotonic() - start
+    
+    def bench(self, cls, secrets):
+        ''' Returns the time for the initial push, and the median and
+        worst times for pushing a single changed secret. The worst case
+        matters, since delta frames make most flat pushes cheap, but
+        every few of them is a full snapshot.
+        '''
+        gao = self.make_gao(cls)
+        gao.update(secrets)
+        initial = self.time_push(gao)
+        
+        timer = []
+        keys = iter(secrets)
+        for __ in range(SAMPLES):
+            gao[next(keys)] = self.privateer.new_secret()
+            timer.append(self.time_push(gao))
+        
+        return initial, statistics.median(timer), max(timer)
+
+
+def main(sizes):
+    loop = NoopLoop(debug=False, threaded=True)
+    loop.start()
+    
+    try:
+        for size in sizes:
+            bench = ShardingBench(loop)
+            secrets = {
+                make_random_ghid(): bench.privateer.new_secret()
+                for __ in range(size)
+            }
+            
+            classes = [ShardedGAODict]
+            if size <= FLAT_LIMIT:
+                classes.append(GAODict)
+            
+            for cls in classes:
+                initial, median, worst = bench.bench(cls, secrets)
+                print(
+                    '{:>8} secrets, {:<14}: initial push {:8.2f} s, '
+                    'single secret push {:8.2f} ms (worst {:8.2f} ms)'.format(
+                        size, cls.__name__, initial, median * 1000,
+                        worst * 1000
+                    )
+                )
+    
+    finally:
+        loop.stop_threadsafe_nowait()
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)